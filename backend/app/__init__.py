@@ -2,17 +2,21 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from app.config import config
 from app.extensions import db, jwt
+from app.utils.log import configure_logging
 import logging
+import threading
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+logger = logging.getLogger(__name__)
 
 
-def create_app(config_name='development'):
+def create_app(config_name='development', with_scheduler=True):
+    """
+    with_scheduler=False skips the background scheduler and its leader
+    election, for one-off scripts (migrations) and tests.
+    """
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    configure_logging(app)
 
     # CORS configuration 
     CORS(app, resources={
@@ -28,6 +32,28 @@ def create_app(config_name='development'):
     db.init_app(app)
     jwt.init_app(app)
 
+    from app.services.ai_service import ollama_client
+    from app.services.llm_cache import llm_cache
+    from app.services.circuit_breaker import init_breakers, breaker_states
+    ollama_client.init_app(app)
+    llm_cache.init_app(app)
+    init_breakers(app)
+
+    from app.services.emotion_service import emotion_lexicon
+    from app.services.weather_service import WeatherService
+    from app.services.weather_cache import weather_cache
+    from app.services.city_service import city_index
+    from app.services.activity_service import activity_tracker
+    emotion_lexicon.init_app(app)
+    city_index.init_app(app)
+    activity_tracker.init_app(app)
+    WeatherService.init_app(app)
+    weather_cache.init_app(app)
+
+    # Preload the model without blocking startup
+    if app.config['OLLAMA_WARMUP_ON_START']:
+        threading.Thread(target=ollama_client.warm_up, name='ollama-warmup', daemon=True).start()
+
     # Import blueprints 
     from app.routes import (
         auth_bp,
@@ -37,7 +63,8 @@ def create_app(config_name='development'):
         scheduler_bp,
         today_bp,
         history_bp,
-        settings_bp
+        settings_bp,
+        metrics_bp
     )
 
     # Register blueprints with correct prefixes
@@ -47,6 +74,7 @@ def create_app(config_name='development'):
     app.register_blueprint(evening_bp, url_prefix='/evening')
     app.register_blueprint(scheduler_bp, url_prefix='/scheduler')
     app.register_blueprint(settings_bp, url_prefix='/settings')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
     
     # expose root-level endpoints
     app.register_blueprint(today_bp, url_prefix='/today')      
@@ -90,20 +118,38 @@ def create_app(config_name='development'):
 
     @app.route('/health', methods=['GET'])
     def health_check():
+        ollama_client.is_model_resident()
         return jsonify({
             'status': 'healthy',
             'message': 'PITCH++ Backend',
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'ollama': ollama_client.stats(),
+            'llm_cache': llm_cache.stats(),
+            'weather_cache': weather_cache.stats(),
+            'circuit_breakers': breaker_states()
         }), 200
 
     # Initialize database
     with app.app_context():
         db.create_all()
-        print("✅ Database tables created")
-
-        # Initialize scheduler
+        logger.info("✅ Database tables created")
+
+        # Background journal analysis
+        from app.services.journal_analysis_service import journal_analysis_service
+        journal_analysis_service.init_app(app)
+        try:
+            journal_analysis_service.resume_pending()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not resume pending journal analyses (run migrate_journal_summary_status.py?): {e}")
+
+        # Initialize scheduler (jobs run only in the elected leader process);
+        # without it the app is still bound, so manual triggers and run status work
         from app.services.scheduler_service import scheduler_service
-        scheduler_service.init_app(app)
-        print("✅ Scheduler initialized")
+        if with_scheduler:
+            scheduler_service.init_app(app)
+            logger.info("✅ Scheduler initialized")
+        else:
+            scheduler_service.app = app
 
     return app
\ No newline at end of file
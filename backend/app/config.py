@@ -21,10 +21,116 @@ class Config:
     # Ollama
     OLLAMA_API_URL = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', 5))
+    OLLAMA_READ_TIMEOUT = float(os.getenv('OLLAMA_READ_TIMEOUT', 200))
+    OLLAMA_MAX_IN_FLIGHT = int(os.getenv('OLLAMA_MAX_IN_FLIGHT', 2))
+    OLLAMA_QUEUE_TIMEOUT = float(os.getenv('OLLAMA_QUEUE_TIMEOUT', 60))
+    OLLAMA_POOL_SIZE = int(os.getenv('OLLAMA_POOL_SIZE', 10))
+    OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+    OLLAMA_WARMUP_ON_START = os.getenv('OLLAMA_WARMUP_ON_START', 'true').lower() == 'true'
+    OLLAMA_WARMUP_LEAD_MINUTES = int(os.getenv('OLLAMA_WARMUP_LEAD_MINUTES', 5))
+
+    # Circuit breakers: consecutive failures before opening, seconds before a trial call
+    OLLAMA_BREAKER_FAILURE_THRESHOLD = int(os.getenv('OLLAMA_BREAKER_FAILURE_THRESHOLD', 3))
+    OLLAMA_BREAKER_COOLDOWN = float(os.getenv('OLLAMA_BREAKER_COOLDOWN', 30))
+    WEATHER_BREAKER_FAILURE_THRESHOLD = int(os.getenv('WEATHER_BREAKER_FAILURE_THRESHOLD', 3))
+    WEATHER_BREAKER_COOLDOWN = float(os.getenv('WEATHER_BREAKER_COOLDOWN', 60))
+
+    # LLM response cache
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 512))
+    LLM_CACHE_SQLITE_PATH = os.getenv('LLM_CACHE_SQLITE_PATH', '')
+    LLM_CACHE_DEFAULT_TTL = int(os.getenv('LLM_CACHE_DEFAULT_TTL', 3600))
+    LLM_CACHE_TTLS = {
+        'morning_plan': int(os.getenv('LLM_CACHE_TTL_MORNING_PLAN', 3600)),
+        'evening_prompt': int(os.getenv('LLM_CACHE_TTL_EVENING_PROMPT', 86400)),
+        'journal_analysis': int(os.getenv('LLM_CACHE_TTL_JOURNAL_ANALYSIS', 604800)),
+        'pattern_suggestions': int(os.getenv('LLM_CACHE_TTL_PATTERN_SUGGESTIONS', 43200)),
+    }
+
+    # Emotion detection lexicon (JSON; empty = bundled app/data/emotion_lexicon.json)
+    EMOTION_LEXICON_PATH = os.getenv('EMOTION_LEXICON_PATH', '')
+
+    # Background journal analysis
+    JOURNAL_ANALYSIS_ASYNC = os.getenv('JOURNAL_ANALYSIS_ASYNC', 'true').lower() == 'true'
+    JOURNAL_ANALYSIS_WORKERS = int(os.getenv('JOURNAL_ANALYSIS_WORKERS', 2))
+    JOURNAL_ANALYSIS_MAX_ATTEMPTS = int(os.getenv('JOURNAL_ANALYSIS_MAX_ATTEMPTS', 3))
+    JOURNAL_ANALYSIS_RETRY_BASE_DELAY = float(os.getenv('JOURNAL_ANALYSIS_RETRY_BASE_DELAY', 5))
+    JOURNAL_ANALYSIS_STALE_AFTER = int(os.getenv('JOURNAL_ANALYSIS_STALE_AFTER', 600))
+
+    # Scheduler batch jobs: parallel workers per run (default: Ollama's parallel capacity)
+    SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', OLLAMA_MAX_IN_FLIGHT))
+    # Users are read and processed in keyset-paginated chunks of this size
+    SCHEDULER_CHUNK_SIZE = int(os.getenv('SCHEDULER_CHUNK_SIZE', 500))
+    # Only users active (login, /today, journal) within this many days get pre-generated
+    # plans/prompts; dormant users get theirs lazily on their next /today. 0 = everyone
+    SCHEDULER_ACTIVE_DAYS = int(os.getenv('SCHEDULER_ACTIVE_DAYS', 30))
+    # users.last_active_at is written at most once per user per this many seconds
+    ACTIVITY_TOUCH_INTERVAL = int(os.getenv('ACTIVITY_TOUCH_INTERVAL', 900))
+    # Generated plans/prompts are bulk-inserted in batches of this size, or once the oldest
+    # buffered row is SCHEDULER_WRITE_MAX_DELAY seconds old (keep well below GENERATION_LEASE_TTL)
+    SCHEDULER_WRITE_BATCH_SIZE = int(os.getenv('SCHEDULER_WRITE_BATCH_SIZE', 50))
+    SCHEDULER_WRITE_MAX_DELAY = float(os.getenv('SCHEDULER_WRITE_MAX_DELAY', 2.0))
+
+    # fixed: everyone at 06:00 / 20:00. bucketed: every SCHEDULER_BUCKET_MINUTES, users whose own
+    # UserSettings morning/evening time (in their timezone) is SCHEDULER_LEAD_MINUTES away
+    SCHEDULER_MODE = os.getenv('SCHEDULER_MODE', 'fixed')
+    SCHEDULER_BUCKET_MINUTES = int(os.getenv('SCHEDULER_BUCKET_MINUTES', 5))
+    SCHEDULER_LEAD_MINUTES = int(os.getenv('SCHEDULER_LEAD_MINUTES', 30))
+    # Also the timezone daily records are dated in for users without one (User.local_today)
+    SCHEDULER_DEFAULT_TIMEZONE = os.getenv('SCHEDULER_DEFAULT_TIMEZONE', 'Europe/Berlin')
+
+    # Only the process holding the leader lease (scheduler_leaders table) runs the jobs.
+    # It renews every SCHEDULER_LEADER_RENEW seconds; a standby takes over once
+    # SCHEDULER_LEADER_TTL seconds pass without renewal. false = this process always runs them
+    SCHEDULER_LEADER_ELECTION = os.getenv('SCHEDULER_LEADER_ELECTION', 'true').lower() == 'true'
+    SCHEDULER_LEADER_TTL = int(os.getenv('SCHEDULER_LEADER_TTL', 30))
+    SCHEDULER_LEADER_RENEW = float(os.getenv('SCHEDULER_LEADER_RENEW', 10))
+
+    # Run ledger (job_runs): progress/heartbeat written every SCHEDULER_RUN_HEARTBEAT seconds;
+    # a run without heartbeat for SCHEDULER_RUN_STALE_AFTER seconds is resumed by the leader
+    SCHEDULER_RUN_HEARTBEAT = float(os.getenv('SCHEDULER_RUN_HEARTBEAT', 5))
+    SCHEDULER_RUN_STALE_AFTER = int(os.getenv('SCHEDULER_RUN_STALE_AFTER', 60))
+
+    # Logging: records go through a queue to a background writer thread.
+    # LOG_SAMPLE_RATE keeps that share of INFO/DEBUG structured events (warnings/errors always),
+    # LOG_SAMPLE_RATES overrides it per event, e.g. "llm.generate=0.1,llm.stream=0.1".
+    # LOG_REDACT: hash | truncate | off, applied to LOG_REDACT_FIELDS (prompts, AI output, journal text)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
+    LOG_SAMPLE_RATES = {
+        event.strip(): float(rate)
+        for event, _, rate in (item.partition('=') for item in os.getenv('LOG_SAMPLE_RATES', '').split(',') if '=' in item)
+    }
+    LOG_REDACT = os.getenv('LOG_REDACT', 'hash')
+    LOG_REDACT_FIELDS = tuple(
+        field.strip() for field in
+        os.getenv('LOG_REDACT_FIELDS', 'prompt,system_prompt,response,text,error_detail').split(',') if field.strip()
+    )
+    LOG_REDACT_KEEP = int(os.getenv('LOG_REDACT_KEEP', 40))
+
+    # Single-flight generation leases (seconds)
+    GENERATION_LEASE_TTL = int(os.getenv('GENERATION_LEASE_TTL', 300))
+    GENERATION_LEASE_WAIT = float(os.getenv('GENERATION_LEASE_WAIT', 90))
 
     # Weather API
     OPENWEATHERMAP_API_KEY = os.getenv('OPENWEATHERMAP_API_KEY', '')
-    OPENWEATHERMAP_BASE_URL = 'https://api.openweathermap.org/data/2.5/weather'
+    OPENWEATHERMAP_BASE_URL = os.getenv('OPENWEATHERMAP_BASE_URL', 'https://api.openweathermap.org/data/2.5/weather')
+    OPENWEATHERMAP_TIMEOUT = float(os.getenv('OPENWEATHERMAP_TIMEOUT', 5))
+
+    # City resolution: gazetteer JSON (empty = bundled app/data/cities.json), difflib similarity cutoff
+    CITY_GAZETTEER_PATH = os.getenv('CITY_GAZETTEER_PATH', '')
+    CITY_MATCH_CUTOFF = float(os.getenv('CITY_MATCH_CUTOFF', 0.85))
+
+    # Per-city weather cache: memory (per process) | database (shared by all workers) | none
+    WEATHER_CACHE_BACKEND = os.getenv('WEATHER_CACHE_BACKEND', 'database')
+    WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', 900))
+    # Expired readings are served (flagged stale) while refreshing in the background, up to this age
+    WEATHER_CACHE_MAX_STALE = int(os.getenv('WEATHER_CACHE_MAX_STALE', 21600))
+    # Parallel OpenWeatherMap requests when prefetching distinct cities before the morning job
+    WEATHER_PREFETCH_WORKERS = int(os.getenv('WEATHER_PREFETCH_WORKERS', 8))
 
 
 class DevelopmentConfig(Config):
@@ -40,6 +146,11 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    LLM_CACHE_SQLITE_PATH = ''
+    JOURNAL_ANALYSIS_ASYNC = False
+    OLLAMA_WARMUP_ON_START = False
+    # The in-memory database is private to the process anyway
+    SCHEDULER_LEADER_ELECTION = False
 
 
 config = {
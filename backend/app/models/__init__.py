@@ -3,6 +3,9 @@ from app.models.journal import JournalEntry
 from app.models.session import MorningSession, EveningPrompt
 from app.models.token import TokenBlocklist
 from app.models.user_settings import UserSettings
+from app.models.lease import GenerationLease, SchedulerLeader
+from app.models.weather import WeatherCacheEntry
+from app.models.job_run import JobRun, JobRunItem
 
 
 __all__ = [
@@ -11,5 +14,10 @@ __all__ = [
     'MorningSession',
     'EveningPrompt',
     'TokenBlocklist',
-    'UserSettings'
+    'UserSettings',
+    'GenerationLease',
+    'SchedulerLeader',
+    'WeatherCacheEntry',
+    'JobRun',
+    'JobRunItem'
 ]
\ No newline at end of file
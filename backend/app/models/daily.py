@@ -0,0 +1,89 @@
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+
+# Dialects with INSERT ... ON CONFLICT; others use a savepoint + IntegrityError fallback
+DIALECT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+class DailyRecordMixin:
+    """
+    One row per (user_id, date), enforced by a unique index, written with
+    atomic INSERT ... ON CONFLICT instead of "exists? then insert". On
+    dialects without ON CONFLICT the insert runs in a savepoint and a
+    unique violation falls back to updating (or keeping) the existing row.
+    """
+
+    DAILY_KEY = ('user_id', 'date')
+
+    @staticmethod
+    def supports_on_conflict():
+        return db.engine.dialect.name in DIALECT_INSERTS
+
+    @classmethod
+    def insert_ignoring_conflicts(cls):
+        """
+        INSERT that leaves an existing row for the same (user_id, date)
+        untouched. Without ON CONFLICT support this is a plain INSERT, and a
+        conflicting row raises IntegrityError.
+        """
+        if not cls.supports_on_conflict():
+            return insert(cls.__table__)
+        statement = DIALECT_INSERTS[db.engine.dialect.name](cls.__table__)
+        return statement.on_conflict_do_nothing(index_elements=list(cls.DAILY_KEY))
+
+    @classmethod
+    def upsert(cls, user_id, day, commit=True, **values):
+        """Create the user's row for `day`, or overwrite `values` on the existing one."""
+        if not cls.supports_on_conflict():
+            if not cls._insert_in_savepoint(user_id, day, values):
+                db.session.execute(
+                    update(cls.__table__)
+                    .where(cls.__table__.c.user_id == user_id, cls.__table__.c.date == day)
+                    .values(**values)
+                )
+            return cls._fetch(user_id, day, commit)
+
+        statement = DIALECT_INSERTS[db.engine.dialect.name](cls.__table__).values(user_id=user_id, date=day, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(cls.DAILY_KEY),
+            set_={key: statement.excluded[key] for key in values}
+        )
+        db.session.execute(statement)
+        return cls._fetch(user_id, day, commit)
+
+    @classmethod
+    def insert_if_absent(cls, user_id, day, commit=True, **values):
+        """
+        Create the user's row for `day` unless one exists.
+        Returns (row, created); on conflict the existing row is returned unchanged.
+        """
+        if not cls.supports_on_conflict():
+            created = cls._insert_in_savepoint(user_id, day, values)
+            return cls._fetch(user_id, day, commit), created
+
+        result = db.session.execute(
+            cls.insert_ignoring_conflicts().values(user_id=user_id, date=day, **values)
+        )
+        return cls._fetch(user_id, day, commit), result.rowcount == 1
+
+    @classmethod
+    def _insert_in_savepoint(cls, user_id, day, values):
+        """Plain INSERT; False if the (user_id, date) row already exists."""
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(cls.__table__).values(user_id=user_id, date=day, **values))
+            return True
+        except IntegrityError:
+            return False
+
+    @classmethod
+    def _fetch(cls, user_id, day, commit):
+        if commit:
+            db.session.commit()
+        return cls.query.filter_by(user_id=user_id, date=day).populate_existing().one()
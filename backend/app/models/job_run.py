@@ -0,0 +1,98 @@
+from app.extensions import db
+from uuid import uuid4
+from datetime import datetime
+import json
+
+
+class JobRun(db.Model):
+    """
+    One execution of a scheduler batch job. While running, the executing
+    process refreshes heartbeat_at and the counters; `checkpoint` is the
+    last user id of the last fully processed chunk, so a run whose process
+    died can be resumed from there (see JobLedger). Times are naive UTC.
+    """
+
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        # At most one running run per job across all processes (overlap guard)
+        db.Index(
+            'uq_job_runs_running', 'job_name', unique=True,
+            sqlite_where=db.text("status = 'running'"),
+            postgresql_where=db.text("status = 'running'")
+        ),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
+    job_name = db.Column(db.String(50), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # morning | evening | cursor (bucketed-mode cursor, see JobLedger)
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running | done | failed | abandoned
+
+    owner = db.Column(db.String(120))  # process identity executing it
+    user_ids = db.Column(db.Text)  # JSON list for explicit (bucketed/manual) runs, None = all users
+    checkpoint = db.Column(db.String())
+
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    success = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    resumes = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<JobRun {self.job_name} {self.status} {self.processed}/{self.total}>"
+
+    def explicit_user_ids(self):
+        return json.loads(self.user_ids) if self.user_ids else None
+
+    def to_dict(self):
+        finished_or_now = self.finished_at or self.heartbeat_at
+        duration = (finished_or_now - self.started_at).total_seconds() if finished_or_now else 0.0
+
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'kind': self.kind,
+            'day': self.day.isoformat(),
+            'status': self.status,
+            'owner': self.owner,
+            'total': self.total,
+            'processed': self.processed,
+            'progress': round(self.processed / self.total, 3) if self.total else None,
+            'success': self.success,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'resumes': self.resumes,
+            'error': self.error,
+            'started_at': self.started_at.isoformat(),
+            'heartbeat_at': self.heartbeat_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_s': round(duration, 1),
+            'users_per_minute': round(self.processed / duration * 60, 1) if duration > 0 else 0.0
+        }
+
+
+class JobRunItem(db.Model):
+    """Outcome of one user in a JobRun."""
+
+    __tablename__ = 'job_run_items'
+    __table_args__ = (
+        db.UniqueConstraint('run_id', 'user_id', name='uq_job_run_items_run_user'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    run_id = db.Column(db.String(36), db.ForeignKey('job_runs.id'), nullable=False, index=True)
+    user_id = db.Column(db.String(), nullable=False)
+
+    status = db.Column(db.String(20), nullable=False)  # success | skipped | error
+    error = db.Column(db.Text)
+    latency_ms = db.Column(db.Float)
+    finished_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<JobRunItem run={self.run_id} user={self.user_id} {self.status}>"
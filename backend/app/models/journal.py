@@ -1,11 +1,16 @@
 from app.extensions import db
+from app.models.daily import DailyRecordMixin
 from uuid import uuid4
-from datetime import datetime, timezone, date as date_type
+from datetime import datetime, timezone
 
 
-class JournalEntry(db.Model):
+class JournalEntry(DailyRecordMixin, db.Model):
 
     __tablename__ = 'journal_entries'
+    __table_args__ = (
+        # One entry per user and day; also serves "WHERE user_id ORDER BY date DESC"
+        db.Index('uq_journal_entries_user_date', 'user_id', 'date', unique=True),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
@@ -14,7 +19,7 @@ class JournalEntry(db.Model):
     user_id = db.Column(db.String(), db.ForeignKey('users.id'), nullable=False)
 
     # Date & Mood
-    date = db.Column(db.Date, nullable=False, default=date_type.today)
+    date = db.Column(db.Date, nullable=False)  # the user's local date (User.local_today), always passed explicitly
     mood = db.Column(db.String(50))
 
     # Strukturierte Reflexion
@@ -27,6 +32,10 @@ class JournalEntry(db.Model):
 
     # Ki
     ai_summary = db.Column(db.Text)
+    ai_summary_status = db.Column(db.String(20))  # pending | running | done | failed
+    ai_summary_attempts = db.Column(db.Integer, nullable=False, default=0)
+    ai_summary_claimed_at = db.Column(db.DateTime)  # naive UTC, set when a worker claims the entry
+    ai_summary_claim = db.Column(db.String(36))  # token of the worker's claim; its outcome is written only under it
     emotion_detected = db.Column(db.String(50))
 
     # Context
@@ -39,24 +48,23 @@ class JournalEntry(db.Model):
     def __repr__(self):
         return f"<JournalEntry user={self.user_id} date={self.date}>"
 
-    @classmethod
-    def get_or_create_today(cls, user_id):
-        today = date_type.today()
-        entry = cls.query.filter_by(user_id=user_id, date=today).first()
-
-        if entry:
-            return entry
-
-        entry = cls(user_id=user_id, date=today)
-        db.session.add(entry)
-        db.session.commit()
-        return entry
-
     def update_reflection(self, mood, reflection):
         self.mood = mood
         self.evening_reflection = reflection
         db.session.commit()
 
+    def analysis_text(self):
+        return f"""
+PAST (heute, bereits passiert):
+- What went well: {self.what_went_well}
+
+FUTURE (Plan / Verbesserung für morgen oder die Zukunft, noch NICHT passiert):
+- What to improve / Tomorrow plan: {self.what_to_improve}
+
+CURRENT (jetzt):
+- How I feel right now: {self.how_i_feel}
+""".strip()
+
     def set_morning_plan(self, plan):
         self.morning_plan = plan
         db.session.commit()
@@ -81,6 +89,7 @@ class JournalEntry(db.Model):
             'morning_plan': self.morning_plan,
             'evening_reflection': self.evening_reflection,
             'ai_summary': self.ai_summary,
+            'ai_summary_status': self.ai_summary_status,
             'emotion_detected': self.emotion_detected,
             'sleep_duration': self.sleep_duration,
             'weather': self.weather,
@@ -0,0 +1,41 @@
+from app.extensions import db
+from datetime import datetime
+
+
+class GenerationLease(db.Model):
+    """
+    Short-lived lock row: whoever holds (user_id, date, kind) is the only
+    process allowed to generate that artifact. Expired leases can be taken over.
+    """
+
+    __tablename__ = 'generation_leases'
+
+    user_id = db.Column(db.String(), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    kind = db.Column(db.String(30), primary_key=True)  # morning_plan | evening_prompt
+
+    owner = db.Column(db.String(36), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GenerationLease {self.kind} user={self.user_id} date={self.date}>"
+
+
+class SchedulerLeader(db.Model):
+    """
+    One row per elected role (e.g. 'scheduler'): the process named in `owner`
+    runs the scheduled jobs until `expires_at`, renewing it while alive.
+    """
+
+    __tablename__ = 'scheduler_leaders'
+
+    name = db.Column(db.String(30), primary_key=True)
+
+    owner = db.Column(db.String(120), nullable=False)  # host:pid:nonce
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SchedulerLeader {self.name} owner={self.owner} expires_at={self.expires_at}>"
@@ -1,14 +1,18 @@
 from app.extensions import db
+from app.models.daily import DailyRecordMixin
 from uuid import uuid4
-from datetime import datetime, timezone, date as date_type
+from datetime import datetime, timezone
 
 
-class MorningSession(db.Model):
+class MorningSession(DailyRecordMixin, db.Model):
     __tablename__ = 'morning_sessions'
+    __table_args__ = (
+        db.Index('uq_morning_sessions_user_date', 'user_id', 'date', unique=True),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
     user_id = db.Column(db.String(), db.ForeignKey('users.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False, default=date_type.today)
+    date = db.Column(db.Date, nullable=False)  # the user's local date (User.local_today), always passed explicitly
     
     plan_text = db.Column(db.Text, nullable=False)
     
@@ -33,13 +37,16 @@ class MorningSession(db.Model):
         }
 
 
-class EveningPrompt(db.Model):
+class EveningPrompt(DailyRecordMixin, db.Model):
 
     __tablename__ = 'evening_prompts'
+    __table_args__ = (
+        db.Index('uq_evening_prompts_user_date', 'user_id', 'date', unique=True),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
     user_id = db.Column(db.String(), db.ForeignKey('users.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False, default=date_type.today)
+    date = db.Column(db.Date, nullable=False)  # the user's local date (User.local_today), always passed explicitly
     
     prompt_text = db.Column(db.Text, nullable=False)
     
@@ -2,6 +2,8 @@ from app.extensions import db
 from uuid import uuid4
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timezone
+from flask import current_app
+from app.utils.local_time import get_zone, local_date, default_zone
 
 
 class User(db.Model):
@@ -17,10 +19,13 @@ class User(db.Model):
     
     # Profile
     city = db.Column(db.String(100), nullable=False)
+    city_id = db.Column(db.String(64), index=True)  # canonical place from CityIndex, None if unresolved
     sleep_goal_hours = db.Column(db.Float, default=8.0)
     
     # Audit
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    # Naive UTC, throttled (see ActivityTracker); the scheduler skips users inactive for SCHEDULER_ACTIVE_DAYS
+    last_active_at = db.Column(db.DateTime, index=True)
     
     # Relationships
     journal_entries = db.relationship(
@@ -59,6 +64,16 @@ class User(db.Model):
     def find_by_username(cls, username):
         return cls.query.filter_by(username=username).first()
     
+    def local_today(self):
+        """
+        Today in the user's timezone (UserSettings.timezone, else
+        SCHEDULER_DEFAULT_TIMEZONE): the date daily records are keyed by.
+        """
+        from app.models.user_settings import UserSettings
+
+        tz_name = db.session.query(UserSettings.timezone).filter_by(user_id=self.id).scalar()
+        return local_date(get_zone(tz_name, default_zone(current_app.config)))
+    
     def save(self):
         db.session.add(self)
         db.session.commit()
@@ -73,6 +88,7 @@ class User(db.Model):
             'id': self.id,
             'username': self.username,
             'city': self.city,
+            'city_id': self.city_id,
             'sleep_goal_hours': self.sleep_goal_hours,
             'created_at': self.created_at.isoformat()
         }
\ No newline at end of file
@@ -10,10 +10,14 @@ class UserSettings(db.Model):
     morning_time = db.Column(db.String(5), nullable=False, default="07:30")
     evening_time = db.Column(db.String(5), nullable=False, default="21:00")
 
+    # IANA name, e.g. "Europe/Berlin"; None = SCHEDULER_DEFAULT_TIMEZONE
+    timezone = db.Column(db.String(64))
+
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     def to_dict(self):
         return {
             "morning_time": self.morning_time,
-            "evening_time": self.evening_time
+            "evening_time": self.evening_time,
+            "timezone": self.timezone
         }
@@ -0,0 +1,17 @@
+from app.extensions import db
+
+
+class WeatherCacheEntry(db.Model):
+    """
+    Last OpenWeatherMap reading per normalized city, shared by all workers
+    (WEATHER_CACHE_BACKEND=database). fetched_at is unix time.
+    """
+
+    __tablename__ = 'weather_cache'
+
+    city_key = db.Column(db.String(120), primary_key=True)
+    data = db.Column(db.Text, nullable=False)  # JSON of WeatherService's weather_info
+    fetched_at = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<WeatherCacheEntry {self.city_key} fetched_at={self.fetched_at}>"
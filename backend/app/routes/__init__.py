@@ -6,6 +6,7 @@ from app.routes.scheduler import scheduler_bp
 from app.routes.today import today_bp
 from app.routes.history import history_bp
 from app.routes.settings import settings_bp
+from app.routes.metrics import metrics_bp
 
 
 __all__ = [
@@ -17,4 +18,5 @@ __all__ = [
     "today_bp",
     "history_bp",
     "settings_bp",
+    "metrics_bp",
 ]
\ No newline at end of file
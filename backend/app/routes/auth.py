@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, current_user,get_jwt_identity
 from app.models import User, TokenBlocklist
+from app.services.city_service import city_index
+from app.services.activity_service import activity_tracker
 from app.extensions import db
+from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -28,7 +31,9 @@ def register():
         new_user = User(
             username=data['username'],
             city=data['city'],
-            sleep_goal_hours=data.get('sleep_goal_hours', 8.0)
+            city_id=city_index.resolve_id(data['city']),
+            sleep_goal_hours=data.get('sleep_goal_hours', 8.0),
+            last_active_at=datetime.utcnow()
         )
         new_user.set_password(data['password'])
         new_user.save()
@@ -62,6 +67,8 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        activity_tracker.touch(user.id)
+
         # erstellt tokens
         access_token = create_access_token(identity=user.username)
         refresh_token = create_refresh_token(identity=user.username)
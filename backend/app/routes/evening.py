@@ -1,9 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import User, MorningSession, EveningPrompt
 from app.services.ai_service import AIService
+from app.services.lease_service import GenerationLeaseService
+from app.utils.sse import format_sse, SSE_HEADERS
 from app.extensions import db
-from datetime import date
 
 evening_bp = Blueprint('evening', __name__)
 
@@ -18,23 +19,109 @@ def get_evening_prompt():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        today = date.today()
+        today = user.local_today()
         
-        # Prüfen ob Prompt existiert
-        existing_prompt = EveningPrompt.query.filter_by(
-            user_id=user.id,
-            date=today
-        ).first()
+        def find_existing():
+            return EveningPrompt.query.filter_by(
+                user_id=user.id,
+                date=today
+            ).first()
+
+        def generate():
+            # Morning Plan holen
+            morning_session = MorningSession.query.filter_by(
+                user_id=user.id,
+                date=today
+            ).first()
+            
+            today_plan = morning_session.plan_text if morning_session else None
+            
+            # Prompt generieren
+            prompt, error = AIService.generate_evening_reflection_prompt(
+                user_name=user.username,
+                today_plan=today_plan
+            )
+            
+            if error:
+                prompt = f"Hallo {user.username}! 🌙\n\nZeit für Reflexion!"
+            
+            # Speichern
+            evening_prompt, _ = EveningPrompt.insert_if_absent(user.id, today, prompt_text=prompt)
+            return evening_prompt
+
+        # Prüfen ob Prompt existiert, sonst genau einmal generieren
+        evening_prompt, generated = GenerationLeaseService.single_flight(
+            user.id, today, 'evening_prompt', find_existing, generate
+        )
+
+        if not evening_prompt:
+            return jsonify({'error': 'Prompt generation in progress, please retry'}), 503
+        
+        return jsonify({
+            'prompt': evening_prompt.prompt_text,
+            'date': evening_prompt.date.isoformat(),
+            'generated_at': evening_prompt.created_at.isoformat(),
+            'pre_generated': not generated
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@evening_bp.route('/prompt/stream', methods=['GET'])
+@jwt_required()
+def stream_evening_prompt():
+    """
+    Same as GET /prompt, streamed as Server-Sent Events (chunk / done / error).
+    The prompt is persisted once the stream has completed.
+    """
+    owner = None
+
+    try:
+        username = get_jwt_identity()
+        user = User.find_by_username(username=username)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        today = user.local_today()
+        
+        def find_existing():
+            return EveningPrompt.query.filter_by(
+                user_id=user.id,
+                date=today
+            ).first()
+
+        existing_prompt = find_existing()
+
+        if not existing_prompt:
+            owner = GenerationLeaseService.acquire(user.id, today, 'evening_prompt')
+            if owner:
+                existing_prompt = find_existing()
+            else:
+                existing_prompt = GenerationLeaseService.wait_for(
+                    user.id, today, 'evening_prompt', find_existing
+                )
+                if not existing_prompt:
+                    return jsonify({'error': 'Prompt generation in progress, please retry'}), 503
         
         if existing_prompt:
-            return jsonify({
+            if owner:
+                GenerationLeaseService.release(user.id, today, 'evening_prompt', owner)
+
+            cached_prompt = {
                 'prompt': existing_prompt.prompt_text,
                 'date': existing_prompt.date.isoformat(),
                 'generated_at': existing_prompt.created_at.isoformat(),
                 'pre_generated': True
-            }), 200
+            }
+
+            def replay():
+                yield format_sse('chunk', {'text': cached_prompt['prompt']})
+                yield format_sse('done', cached_prompt)
+
+            return Response(replay(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
-        # Morning Plan holen
         morning_session = MorningSession.query.filter_by(
             user_id=user.id,
             date=today
@@ -42,33 +129,60 @@ def get_evening_prompt():
         
         today_plan = morning_session.plan_text if morning_session else None
         
-        # Prompt generieren
-        prompt, error = AIService.generate_evening_reflection_prompt(
+    except Exception as e:
+        if owner:
+            GenerationLeaseService.release(user.id, today, 'evening_prompt', owner)
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+    release_lease = GenerationLeaseService.releaser(user.id, today, 'evening_prompt', owner)
+
+    def generate():
+        try:
+            yield from _stream_and_save()
+        finally:
+            release_lease()
+
+    def _stream_and_save():
+        parts = []
+
+        for chunk, error in AIService.stream_evening_reflection_prompt(
             user_name=user.username,
             today_plan=today_plan
-        )
-        
-        if error:
+        ):
+            if error and parts:
+                # Stream broke midway: don't persist a truncated prompt
+                yield format_sse('error', {'error': error})
+                return
+            if error:
+                break
+
+            parts.append(chunk)
+            yield format_sse('chunk', {'text': chunk})
+
+        prompt = "".join(parts)
+        if not prompt:
+            # Same fallback as GET /prompt when the AI is unavailable
             prompt = f"Hallo {user.username}! 🌙\n\nZeit für Reflexion!"
-        
-        # Speichern
-        evening_prompt = EveningPrompt(
-            user_id=user.id,
-            date=today,
-            prompt_text=prompt
-        )
-        db.session.add(evening_prompt)
-        db.session.commit()
-        
-        return jsonify({
+            yield format_sse('chunk', {'text': prompt})
+
+        try:
+            evening_prompt, _ = EveningPrompt.insert_if_absent(user.id, today, prompt_text=prompt)
+        except Exception as e:
+            db.session.rollback()
+            yield format_sse('error', {'error': f'Server error: {str(e)}'})
+            return
+
+        yield format_sse('done', {
             'prompt': prompt,
             'date': today.isoformat(),
             'generated_at': evening_prompt.created_at.isoformat(),
             'pre_generated': False
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': f'Server error: {str(e)}'}), 500
+        })
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+    # Also on close: a client gone before the first chunk never runs generate()'s finally
+    response.call_on_close(release_lease)
+    return response
 
 
 @evening_bp.route('/history', methods=['GET'])
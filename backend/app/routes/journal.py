@@ -1,10 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import date
+import time
 
 from app.models import JournalEntry, User
 from app.services.ai_service import AIService
+from app.services.journal_analysis_service import journal_analysis_service
+from app.services.activity_service import activity_tracker
 from app.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
 
 journal_bp = Blueprint('journal', __name__)
 
@@ -46,51 +52,45 @@ def create_journal_entry():
                 400,
             )
 
-        entry_text = f"""
-PAST (heute, bereits passiert):
-- What went well: {data['what_went_well']}
-
-FUTURE (Plan / Verbesserung für morgen oder die Zukunft, noch NICHT passiert):
-- What to improve / Tomorrow plan: {data['what_to_improve']}
-
-CURRENT (jetzt):
-- How I feel right now: {data['how_i_feel']}
-""".strip()
-
-        ai_summary = None
         emotion_detected = None
 
-        try:
-            summary, error = AIService.analyze_journal_entry(entry_text)
-            if not error and summary:
-                ai_summary = summary
-        except Exception as e:
-            print(f"AI Analysis failed: {e}")
-
         try:
             emotion_detected = AIService.detect_emotion_simple(data['how_i_feel'])
         except Exception as e:
-            print(f"Emotion detection failed: {e}")
+            logger.warning(f"Emotion detection failed: {e}")
             emotion_detected = "unknown"
 
-        entry = JournalEntry(
-            user_id=user.id,
-            date=date.today(),
+        # One entry per day: writing again replaces today's reflection (and its analysis)
+        today = user.local_today()
+        replaced = JournalEntry.query.filter_by(user_id=user.id, date=today).first() is not None
+        entry = JournalEntry.upsert(
+            user.id,
+            today,
             mood=mood,
             what_went_well=data['what_went_well'],
             what_to_improve=data['what_to_improve'],
             how_i_feel=data['how_i_feel'],
-            ai_summary=ai_summary,
+            ai_summary=None,
+            ai_summary_status=journal_analysis_service.STATUS_PENDING,
+            ai_summary_attempts=0,
+            ai_summary_claimed_at=None,
+            ai_summary_claim=None,
             emotion_detected=emotion_detected
         )
+        activity_tracker.touch(user.id)
 
-        db.session.add(entry)
-        db.session.commit()
+        # AI summary runs in the background; poll GET /journal/<id>/summary
+        try:
+            journal_analysis_service.submit(entry.id)
+        except Exception as e:
+            logger.error(f"AI Analysis could not be queued: {e}")
 
+        # 200 + replaced=true when today's entry already existed and was overwritten
         return jsonify({
-            'message': 'Journal entry created successfully',
+            'message': 'Journal entry for today replaced' if replaced else 'Journal entry created successfully',
+            'replaced': replaced,
             'entry': entry.to_dict()
-        }), 201
+        }), 200 if replaced else 201
 
     except Exception as e:
         db.session.rollback()
@@ -156,6 +156,43 @@ def get_journal_entry(entry_id):
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 
+@journal_bp.route('/<entry_id>/summary', methods=['GET'])
+@jwt_required()
+def get_journal_summary(entry_id):
+    """
+    Status of the background AI summary.
+    ?wait=<seconds> (max 30) long-polls until the summary is no longer pending.
+    """
+    try:
+        username = get_jwt_identity()
+        user = User.find_by_username(username=username)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        entry = JournalEntry.query.filter_by(id=entry_id, user_id=user.id).first()
+        if not entry:
+            return jsonify({'error': 'Journal entry not found'}), 404
+
+        wait = min(max(request.args.get('wait', type=float, default=0), 0), 30)
+        deadline = time.monotonic() + wait
+        in_progress = (journal_analysis_service.STATUS_PENDING, journal_analysis_service.STATUS_RUNNING)
+
+        while entry.ai_summary_status in in_progress and time.monotonic() < deadline:
+            time.sleep(0.5)
+            db.session.refresh(entry)
+
+        return jsonify({
+            'id': entry.id,
+            'ai_summary': entry.ai_summary,
+            'ai_summary_status': entry.ai_summary_status,
+            'attempts': entry.ai_summary_attempts
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
 @journal_bp.route('/<entry_id>', methods=['PUT'])
 @jwt_required()
 def update_journal_entry(entry_id):
@@ -217,6 +254,7 @@ def update_journal_entry(entry_id):
             return jsonify({'error': 'No valid fields to update'}), 400
 
         db.session.commit()
+        activity_tracker.touch(user.id)
 
         return jsonify({
             'message': 'Journal entry updated successfully',
@@ -287,5 +325,5 @@ def get_task_suggestions():
         )
 
     except Exception as e:
-        print(f"Fehler beim Abrufen der Vorschläge: {str(e)}")
+        logger.error(f"Fehler beim Abrufen der Vorschläge: {str(e)}")
         return jsonify({"error": f"Server-Fehler: {str(e)}"}), 500
@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify, request
+from app.services.telemetry_service import generation_telemetry, LATENCY_BUCKETS_MS
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/generation', methods=['GET'])
+def get_generation_metrics():
+    """
+    Per-kind latency histograms, outcome counts and tokens/sec for LLM calls.
+    Query: ?kind=morning_plan to filter, ?recent=N for the last N raw records.
+    """
+    try:
+        kind = request.args.get('kind') or None
+        recent = min(max(request.args.get('recent', 20, type=int), 0), 500)
+
+        return jsonify({
+            'buckets_ms': list(LATENCY_BUCKETS_MS),
+            'kinds': generation_telemetry.summary(kind),
+            'recent': generation_telemetry.recent(recent, kind)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
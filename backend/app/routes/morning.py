@@ -1,15 +1,100 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import date
 
 from app.models import User, MorningSession, JournalEntry
 from app.services.ai_service import AIService
 from app.services.weather_service import WeatherService
+from app.services.lease_service import GenerationLeaseService
+from app.utils.sse import format_sse, SSE_HEADERS
+from app.utils.mood import mood_emoji
 from app.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
 
 morning_bp = Blueprint('morning', __name__)
 
 
+def _build_plan_context(user, force_regenerate=False):
+    # Weather (force regenerate also refreshes the cached reading)
+    weather_info, weather_error = WeatherService.get_weather(
+        user.city, use_cache=not force_regenerate, city_id=user.city_id
+    )
+    weather_string = WeatherService.format_weather_string(weather_info) if weather_info else "Wetter nicht verfügbar"
+    if weather_error:
+        logger.warning(f"Weather API warning: {weather_error}")
+
+    # Last entries mood 
+    recent_entries = (JournalEntry.query
+                      .filter_by(user_id=user.id)
+                      .order_by(JournalEntry.date.desc())
+                      .limit(3)
+                      .all())
+
+    last_entries_summary = None
+    if recent_entries:
+        entries_text = []
+        for entry in recent_entries:
+            entries_text.append(f"{entry.date.strftime('%d.%m.')}: {mood_emoji(entry.mood)} Stimmung {entry.mood}")
+        last_entries_summary = "\n".join(entries_text)
+
+    # Pull "tomorrow plan" from latest journal entry (what_to_improve)
+    latest_entry = recent_entries[0] if recent_entries else None
+    tomorrow_plan_text = latest_entry.what_to_improve if latest_entry and latest_entry.what_to_improve else None
+
+    return {
+        'weather_info': weather_info,
+        'weather_string': weather_string,
+        'last_entries_summary': last_entries_summary,
+        'tomorrow_plan_text': tomorrow_plan_text
+    }
+
+
+def _find_session(user, today):
+    return MorningSession.query.filter_by(
+        user_id=user.id,
+        date=today
+    ).first()
+
+
+def _cached_plan(session):
+    return {
+        'plan': session.plan_text,
+        'weather': session.weather,
+        'sleep_duration': session.sleep_duration,
+        'generated_at': session.created_at.isoformat(),
+        'cached': True
+    }
+
+
+def _wait_for_other_generation(user, today, force_regenerate):
+    """
+    Called when another request/worker holds the morning_plan lease.
+    Returns (plan_dict, error_response).
+    """
+    if force_regenerate:
+        return None, (jsonify({'error': 'Plan generation already in progress'}), 409)
+
+    session = GenerationLeaseService.wait_for(
+        user.id, today, 'morning_plan', lambda: _find_session(user, today)
+    )
+    if session:
+        return _cached_plan(session), None
+
+    return None, (jsonify({'error': 'Plan generation in progress, please retry'}), 503)
+
+
+def _save_plan(user, today, plan, weather_string, sleep_hours):
+    # Regenerated plans overwrite today's row
+    return MorningSession.upsert(
+        user.id,
+        today,
+        plan_text=plan,
+        weather=weather_string,
+        sleep_duration=sleep_hours
+    )
+
+
 @morning_bp.route('/plan', methods=['GET'])
 @jwt_required()
 def get_morning_plan():
@@ -20,100 +105,183 @@ def get_morning_plan():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        today = date.today()
+        today = user.local_today()
         force_regenerate = request.args.get('force', 'false').lower() == 'true'
 
-        existing_session = MorningSession.query.filter_by(
-            user_id=user.id,
-            date=today
-        ).first()
+        existing_session = _find_session(user, today)
 
         if existing_session and not force_regenerate:
+            return jsonify(_cached_plan(existing_session)), 200
+
+        # Only one caller generates per (user, day); others reuse its result
+        owner = GenerationLeaseService.acquire(user.id, today, 'morning_plan')
+        if not owner:
+            plan, error_response = _wait_for_other_generation(user, today, force_regenerate)
+            return error_response or (jsonify(plan), 200)
+
+        try:
+            existing_session = _find_session(user, today)
+            if existing_session and not force_regenerate:
+                return jsonify(_cached_plan(existing_session)), 200
+
+            context = _build_plan_context(user, force_regenerate)
+            weather_info = context['weather_info']
+            weather_string = context['weather_string']
+            tomorrow_plan_text = context['tomorrow_plan_text']
+
+            # Sleep
+            sleep_hours = request.args.get('sleep_hours', type=float)
+            if not sleep_hours:
+                sleep_hours = user.sleep_goal_hours
+
+            # Generate plan with tomorrow_plan
+            plan, error = AIService.generate_morning_plan(
+                user_name=user.username,
+                city=user.city,
+                weather=weather_string,
+                sleep_hours=sleep_hours,
+                last_entries=context['last_entries_summary'],
+                tomorrow_plan=tomorrow_plan_text,
+                use_cache=not force_regenerate
+            )
+
+            if error:
+                return jsonify({'error': f'Failed to generate plan: {error}'}), 500
+            if not plan:
+                return jsonify({'error': 'AI returned empty plan'}), 500
+
+            # Save or update session
+            session = _save_plan(user, today, plan, weather_string, sleep_hours)
+
             return jsonify({
-                'plan': existing_session.plan_text,
-                'weather': existing_session.weather,
-                'sleep_duration': existing_session.sleep_duration,
-                'generated_at': existing_session.created_at.isoformat(),
-                'cached': True
+                'plan': plan,
+                'weather': weather_string,
+                'weather_details': weather_info,
+                'sleep_duration': sleep_hours,
+                'generated_at': session.created_at.isoformat(),
+                'cached': False,
+                'tomorrow_plan_used': bool(tomorrow_plan_text)
             }), 200
 
-        # Weather
-        weather_info, weather_error = WeatherService.get_weather(user.city)
-        weather_string = WeatherService.format_weather_string(weather_info) if weather_info else "Wetter nicht verfügbar"
-        if weather_error:
-            print(f"Weather API warning: {weather_error}")
-
-        # Last entries mood 
-        recent_entries = (JournalEntry.query
-                          .filter_by(user_id=user.id)
-                          .order_by(JournalEntry.date.desc())
-                          .limit(3)
-                          .all())
-
-        last_entries_summary = None
-        if recent_entries:
-            entries_text = []
-            for entry in recent_entries:
-                mood_emoji = "😊" if entry.mood and entry.mood >= 4 else "😐" if entry.mood == 3 else "😔"
-                entries_text.append(f"{entry.date.strftime('%d.%m.')}: {mood_emoji} Stimmung {entry.mood}/5")
-            last_entries_summary = "\n".join(entries_text)
-
-        # Pull "tomorrow plan" from latest journal entry (what_to_improve)
-        latest_entry = (JournalEntry.query
-                        .filter_by(user_id=user.id)
-                        .order_by(JournalEntry.date.desc())
-                        .first())
-        tomorrow_plan_text = latest_entry.what_to_improve if latest_entry and latest_entry.what_to_improve else None
-
-        # Sleep
+        finally:
+            GenerationLeaseService.release(user.id, today, 'morning_plan', owner)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in get_morning_plan: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+def _replay_plan(plan):
+    def replay():
+        yield format_sse('chunk', {'text': plan['plan']})
+        yield format_sse('done', plan)
+
+    return Response(replay(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
+@morning_bp.route('/plan/stream', methods=['GET'])
+@jwt_required()
+def stream_morning_plan():
+    """
+    Same as GET /plan, but streams the plan as Server-Sent Events:
+      event: chunk  -> {"text": "..."}   (incremental model output)
+      event: done   -> {...}             (same fields as GET /plan)
+      event: error  -> {"error": "..."}
+    The plan is persisted once the stream has completed.
+    """
+    owner = None
+
+    try:
+        username = get_jwt_identity()
+        user = User.find_by_username(username=username)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        today = user.local_today()
+        force_regenerate = request.args.get('force', 'false').lower() == 'true'
+
+        existing_session = _find_session(user, today)
+
+        if not existing_session or force_regenerate:
+            owner = GenerationLeaseService.acquire(user.id, today, 'morning_plan')
+            if not owner:
+                plan, error_response = _wait_for_other_generation(user, today, force_regenerate)
+                if error_response:
+                    return error_response
+                return _replay_plan(plan)
+
+            existing_session = _find_session(user, today)
+
+        if existing_session and not force_regenerate:
+            if owner:
+                GenerationLeaseService.release(user.id, today, 'morning_plan', owner)
+            return _replay_plan(_cached_plan(existing_session))
+
+        context = _build_plan_context(user, force_regenerate)
+
         sleep_hours = request.args.get('sleep_hours', type=float)
         if not sleep_hours:
             sleep_hours = user.sleep_goal_hours
 
-        # Generate plan with tomorrow_plan
-        plan, error = AIService.generate_morning_plan(
+    except Exception as e:
+        db.session.rollback()
+        if owner:
+            GenerationLeaseService.release(user.id, today, 'morning_plan', owner)
+        logger.error(f"Error in stream_morning_plan: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+    release_lease = GenerationLeaseService.releaser(user.id, today, 'morning_plan', owner)
+
+    def generate():
+        try:
+            yield from _stream_and_save()
+        finally:
+            release_lease()
+
+    def _stream_and_save():
+        parts = []
+
+        for chunk, error in AIService.stream_morning_plan(
             user_name=user.username,
             city=user.city,
-            weather=weather_string,
+            weather=context['weather_string'],
             sleep_hours=sleep_hours,
-            last_entries=last_entries_summary,
-            tomorrow_plan=tomorrow_plan_text
-        )
+            last_entries=context['last_entries_summary'],
+            tomorrow_plan=context['tomorrow_plan_text'],
+            use_cache=not force_regenerate
+        ):
+            if error:
+                yield format_sse('error', {'error': f'Failed to generate plan: {error}'})
+                return
 
-        if error:
-            return jsonify({'error': f'Failed to generate plan: {error}'}), 500
+            parts.append(chunk)
+            yield format_sse('chunk', {'text': chunk})
+
+        plan = "".join(parts)
         if not plan:
-            return jsonify({'error': 'AI returned empty plan'}), 500
-
-        # Save or update session
-        if existing_session and force_regenerate:
-            existing_session.plan_text = plan
-            existing_session.weather = weather_string
-            existing_session.sleep_duration = sleep_hours
-            session = existing_session
-        else:
-            session = MorningSession(
-                user_id=user.id,
-                date=today,
-                plan_text=plan,
-                weather=weather_string,
-                sleep_duration=sleep_hours
-            )
-            db.session.add(session)
+            yield format_sse('error', {'error': 'AI returned empty plan'})
+            return
 
-        db.session.commit()
+        try:
+            session = _save_plan(user, today, plan, context['weather_string'], sleep_hours)
+        except Exception as e:
+            db.session.rollback()
+            yield format_sse('error', {'error': f'Server error: {str(e)}'})
+            return
 
-        return jsonify({
+        yield format_sse('done', {
             'plan': plan,
-            'weather': weather_string,
-            'weather_details': weather_info,
+            'weather': context['weather_string'],
+            'weather_details': context['weather_info'],
             'sleep_duration': sleep_hours,
             'generated_at': session.created_at.isoformat(),
             'cached': False,
-            'tomorrow_plan_used': bool(tomorrow_plan_text)
-        }), 200
+            'tomorrow_plan_used': bool(context['tomorrow_plan_text'])
+        })
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error in get_morning_plan: {str(e)}")
-        return jsonify({'error': f'Server error: {str(e)}'}), 500
\ No newline at end of file
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+    # Also on close: a client gone before the first chunk never runs generate()'s finally
+    response.call_on_close(release_lease)
+    return response
@@ -1,6 +1,13 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, url_for
 from flask_jwt_extended import jwt_required
+from apscheduler.schedulers.base import STATE_PAUSED
 from app.services.scheduler_service import scheduler_service
+from app.services.leader_service import scheduler_leader
+from app.services.job_ledger import JobLedger, RunInProgress
+from app.models import JobRun, JobRunItem
+from app.extensions import db
+from app.services.circuit_breaker import breaker_states
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +18,7 @@ scheduler_bp = Blueprint('scheduler', __name__)
 @scheduler_bp.route('/status', methods=['GET'])
 def get_scheduler_status():
     try:
+        runs_limit = min(max(request.args.get('runs', default=10, type=int), 0), 100)
         jobs = scheduler_service.scheduler.get_jobs()
         
         jobs_info = []
@@ -24,25 +32,49 @@ def get_scheduler_status():
         
         return jsonify({
             'running': scheduler_service.scheduler.running,
+            'paused': scheduler_service.scheduler.state == STATE_PAUSED,
+            'leader': scheduler_leader.status(),
             'jobs_count': len(jobs),
-            'jobs': jobs_info
+            'jobs': jobs_info,
+            'last_runs': scheduler_service.last_runs,
+            'current_runs': JobLedger.current_runs(),
+            'recent_runs': JobLedger.recent_runs(runs_limit),
+            'circuit_breakers': breaker_states()
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 
+def _trigger(kind, label):
+    """Start a background run; 202 with its id, or 409 pointing at the run still in progress."""
+    try:
+        run_id = scheduler_service.start_manual_run(kind)
+    except RunInProgress as e:
+        return jsonify({
+            'error': f'{label} already in progress',
+            'run_id': e.run_id,
+            'status_url': url_for('scheduler.get_run', run_id=e.run_id) if e.run_id else None
+        }), 409
+
+    logger.info(f"Manual trigger: {label} started (run {run_id})")
+    status_url = url_for('scheduler.get_run', run_id=run_id)
+
+    response = jsonify({
+        'message': f'{label} started',
+        'run_id': run_id,
+        'status_url': status_url
+    })
+    response.headers['Location'] = status_url
+    return response, 202
+
+
 @scheduler_bp.route('/trigger/morning', methods=['POST'])
 @jwt_required()
 def trigger_morning_routine():
     try:
-        logger.info("Manual trigger: Morning plans generation")
-        scheduler_service.generate_morning_plans()
-        
-        return jsonify({
-            'message': 'Morning plans generated successfully'
-        }), 200
-        
+        return _trigger('morning', 'Morning plans generation')
+
     except Exception as e:
         logger.error(f"Manual morning trigger error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -52,13 +84,47 @@ def trigger_morning_routine():
 @jwt_required()
 def trigger_evening_routine():
     try:
-        logger.info("Manual trigger: Evening data preparation")
-        scheduler_service.prepare_evening_data()
-        
+        return _trigger('evening', 'Evening data preparation')
+
+    except Exception as e:
+        logger.error(f"Manual evening trigger error: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@scheduler_bp.route('/runs/<run_id>', methods=['GET'])
+@jwt_required()
+def get_run(run_id):
+    """
+    Progress of a run.
+    ?wait=<seconds> (max 30) long-polls until its progress or status changes.
+    """
+    try:
+        run = db.session.get(JobRun, run_id)
+        if not run:
+            return jsonify({'error': 'Run not found'}), 404
+
+        wait = min(max(request.args.get('wait', type=float, default=0), 0), 30)
+        deadline = time.monotonic() + wait
+        seen = (run.status, run.processed)
+
+        while run.status == 'running' and (run.status, run.processed) == seen and time.monotonic() < deadline:
+            time.sleep(0.5)
+            db.session.refresh(run)
+
+        recent_errors = (JobRunItem.query
+                         .with_entities(JobRunItem.user_id, JobRunItem.error, JobRunItem.finished_at)
+                         .filter_by(run_id=run.id, status='error')
+                         .order_by(JobRunItem.finished_at.desc())
+                         .limit(5)
+                         .all())
+
         return jsonify({
-            'message': 'Evening data prepared successfully'
+            'run': run.to_dict(),
+            'recent_errors': [
+                {'user_id': user_id, 'error': error, 'finished_at': finished_at.isoformat()}
+                for user_id, error, finished_at in recent_errors
+            ]
         }), 200
-        
+
     except Exception as e:
-        logger.error(f"Manual evening trigger error: {str(e)}")
-        return jsonify({'error': f'Server error: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
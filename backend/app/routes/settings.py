@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app.models import User, UserSettings
+from app.services.city_service import city_index
+from app.utils.local_time import parse_hhmm, format_hhmm, get_zone
 from app.extensions import db
 
 settings_bp = Blueprint("settings", __name__)
@@ -27,6 +29,7 @@ def get_settings():
             "user": {
                 "username": user.username,
                 "city": user.city,
+                "city_id": user.city_id,
                 "sleep_goal_hours": user.sleep_goal_hours
             },
             "settings": settings.to_dict()
@@ -54,6 +57,7 @@ def update_city():
             return jsonify({"error": "User not found"}), 404
 
         user.city = city
+        user.city_id = city_index.resolve_id(city)
         db.session.commit()
 
         # Ensure settings row exists
@@ -65,7 +69,12 @@ def update_city():
 
         return jsonify({
             "message": "City updated",
-            "user": {"username": user.username, "city": user.city, "sleep_goal_hours": user.sleep_goal_hours},
+            "user": {
+                "username": user.username,
+                "city": user.city,
+                "city_id": user.city_id,
+                "sleep_goal_hours": user.sleep_goal_hours
+            },
             "settings": settings.to_dict()
         }), 200
 
@@ -81,7 +90,8 @@ def update_notifications():
     Expected:
     {
       "morning_time": "07:30",
-      "evening_time": "21:00"
+      "evening_time": "21:00",
+      "timezone": "Europe/Berlin"   (optional)
     }
     """
     try:
@@ -92,6 +102,15 @@ def update_notifications():
         if not morning_time or not evening_time:
             return jsonify({"error": "morning_time and evening_time are required"}), 400
 
+        morning_minutes = parse_hhmm(morning_time)
+        evening_minutes = parse_hhmm(evening_time)
+        if morning_minutes is None or evening_minutes is None:
+            return jsonify({"error": "Times must be in HH:MM format"}), 400
+
+        tz_name = (data.get("timezone") or "").strip() or None
+        if tz_name and get_zone(tz_name) is None:
+            return jsonify({"error": f"Unknown timezone: {tz_name}"}), 400
+
         username = get_jwt_identity()
         user = User.find_by_username(username=username)
 
@@ -103,8 +122,10 @@ def update_notifications():
             settings = UserSettings(user_id=user.id)
             db.session.add(settings)
 
-        settings.morning_time = morning_time
-        settings.evening_time = evening_time
+        settings.morning_time = format_hhmm(morning_minutes)
+        settings.evening_time = format_hhmm(evening_minutes)
+        if tz_name:
+            settings.timezone = tz_name
 
         db.session.commit()
 
@@ -1,13 +1,18 @@
 import traceback
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import date
 
 
 from app.models import User, MorningSession, JournalEntry, EveningPrompt, UserSettings
 from app.services.weather_service import WeatherService
 from app.services.ai_service import AIService
+from app.services.lease_service import GenerationLeaseService
+from app.services.activity_service import activity_tracker
 from app.extensions import db
+from app.utils.mood import mood_emoji
+import logging
+
+logger = logging.getLogger(__name__)
 
 today_bp = Blueprint("today", __name__)
 
@@ -33,7 +38,8 @@ def get_today():
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        today_date = date.today()
+        activity_tracker.touch(user.id)
+        today_date = user.local_today()
 
         # Ensure settings exist
         settings = UserSettings.query.filter_by(user_id=user.id).first()
@@ -42,122 +48,27 @@ def get_today():
             db.session.add(settings)
             db.session.commit()
 
-        # Morning plan session
-        morning_session = MorningSession.query.filter_by(
-            user_id=user.id, date=today_date
-        ).first()
-
-        if not morning_session:
-            # Auto-generate morning plan if missing
-            weather_info, weather_error = WeatherService.get_weather(user.city)
-            weather_string = (
-                WeatherService.format_weather_string(weather_info)
-                if weather_info
-                else "Wetter nicht verfügbar"
-            )
-
-            # Get latest tomorrow-plan from journal
-            latest_entry = (
-                JournalEntry.query.filter_by(user_id=user.id)
-                .order_by(JournalEntry.date.desc())
-                .first()
-            )
-            tomorrow_plan_text = (
-                latest_entry.what_to_improve
-                if latest_entry and latest_entry.what_to_improve
-                else None
-            )
-
-            # Get last 3 entries for mood context
-            recent_entries = (
-                JournalEntry.query.filter_by(user_id=user.id)
-                .order_by(JournalEntry.date.desc())
-                .limit(3)
-                .all()
-            )
-
-            last_entries_summary = None
-            if recent_entries:
-                entries_text = []
-                for entry in recent_entries:
-                    try:
-                        mood_value = entry.mood
-
-                        # ROBUST: Handle different mood types
-                        if mood_value is None:
-                            mood_emoji = "😐"
-                        elif isinstance(mood_value, str):
-                            # String mood (new system)
-                            mood_map = {
-                                "Excited": "⚡",
-                                "Happy": "😄",
-                                "Calm": "😌",
-                                "Focused": "🎯",
-                                "Tired": "😴",
-                                "Sad": "😢",
-                                "Stressed": "😖",
-                                "Angry": "😠",
-                            }
-                            mood_emoji = mood_map.get(mood_value, "😐")
-                        elif isinstance(mood_value, (int, float)):
-                            # Numeric mood (old system)
-                            mood_emoji = (
-                                "😊"
-                                if mood_value >= 4
-                                else "😐" if mood_value == 3 else "😔"
-                            )
-                        else:
-                            mood_emoji = "😐"
-
-                        entries_text.append(
-                            f"{entry.date.strftime('%d.%m.')}: {mood_emoji}"
-                        )
-
-                    except Exception as e:
-                        print(f"⚠️ Error processing entry mood: {e}")
-                        entries_text.append(f"{entry.date.strftime('%d.%m.')}: 😐")
-
-                last_entries_summary = "\n".join(entries_text)
-
-            plan, error = AIService.generate_morning_plan(
-                user_name=user.username,
-                city=user.city,
-                weather=weather_string,
-                sleep_hours=user.sleep_goal_hours,
-                last_entries=last_entries_summary,
-                tomorrow_plan=tomorrow_plan_text,
-            )
-
-            if not error and plan:
-                morning_session = MorningSession(
-                    user_id=user.id,
-                    date=today_date,
-                    plan_text=plan,
-                    weather=weather_string,
-                    sleep_duration=user.sleep_goal_hours,
-                )
-                db.session.add(morning_session)
-                db.session.commit()
+        # Morning plan session (single-flight: concurrent callers reuse one generation)
+        morning_session, _ = GenerationLeaseService.single_flight(
+            user.id,
+            today_date,
+            "morning_plan",
+            lambda: MorningSession.query.filter_by(
+                user_id=user.id, date=today_date
+            ).first(),
+            lambda: _generate_morning_session(user, today_date),
+        )
 
         # Evening prompt
-        evening_prompt = EveningPrompt.query.filter_by(
-            user_id=user.id, date=today_date
-        ).first()
-
-        if not evening_prompt:
-            # Auto-generate evening prompt if missing
-            today_plan = morning_session.plan_text if morning_session else None
-
-            prompt, error = AIService.generate_evening_reflection_prompt(
-                user_name=user.username, today_plan=today_plan
-            )
-
-            if not error and prompt:
-                evening_prompt = EveningPrompt(
-                    user_id=user.id, date=today_date, prompt_text=prompt
-                )
-                db.session.add(evening_prompt)
-                db.session.commit()
+        evening_prompt, _ = GenerationLeaseService.single_flight(
+            user.id,
+            today_date,
+            "evening_prompt",
+            lambda: EveningPrompt.query.filter_by(
+                user_id=user.id, date=today_date
+            ).first(),
+            lambda: _generate_evening_prompt(user, today_date, morning_session),
+        )
 
         # Journal entry for today
         journal_entry = JournalEntry.query.filter_by(
@@ -184,5 +95,80 @@ def get_today():
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error in get_today: {str(e)}")
-        return jsonify({"error": f"Server error: {str(e)}"}), 500
\ No newline at end of file
+        logger.error(f"Error in get_today: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+def _generate_morning_session(user, today_date):
+    # Auto-generate morning plan if missing
+    weather_info, weather_error = WeatherService.get_weather(user.city, city_id=user.city_id)
+    weather_string = (
+        WeatherService.format_weather_string(weather_info)
+        if weather_info
+        else "Wetter nicht verfügbar"
+    )
+
+    # Get latest tomorrow-plan from journal
+    latest_entry = (
+        JournalEntry.query.filter_by(user_id=user.id)
+        .order_by(JournalEntry.date.desc())
+        .first()
+    )
+    tomorrow_plan_text = (
+        latest_entry.what_to_improve
+        if latest_entry and latest_entry.what_to_improve
+        else None
+    )
+
+    # Get last 3 entries for mood context
+    recent_entries = (
+        JournalEntry.query.filter_by(user_id=user.id)
+        .order_by(JournalEntry.date.desc())
+        .limit(3)
+        .all()
+    )
+
+    last_entries_summary = None
+    if recent_entries:
+        last_entries_summary = "\n".join(
+            f"{entry.date.strftime('%d.%m.')}: {mood_emoji(entry.mood)}"
+            for entry in recent_entries
+        )
+
+    plan, error = AIService.generate_morning_plan(
+        user_name=user.username,
+        city=user.city,
+        weather=weather_string,
+        sleep_hours=user.sleep_goal_hours,
+        last_entries=last_entries_summary,
+        tomorrow_plan=tomorrow_plan_text,
+    )
+
+    if error or not plan:
+        return None
+
+    morning_session, _ = MorningSession.insert_if_absent(
+        user.id,
+        today_date,
+        plan_text=plan,
+        weather=weather_string,
+        sleep_duration=user.sleep_goal_hours,
+    )
+    return morning_session
+
+
+def _generate_evening_prompt(user, today_date, morning_session):
+    # Auto-generate evening prompt if missing
+    today_plan = morning_session.plan_text if morning_session else None
+
+    prompt, error = AIService.generate_evening_reflection_prompt(
+        user_name=user.username, today_plan=today_plan
+    )
+
+    if error or not prompt:
+        return None
+
+    evening_prompt, _ = EveningPrompt.insert_if_absent(
+        user.id, today_date, prompt_text=prompt
+    )
+    return evening_prompt
@@ -1,9 +1,10 @@
-from app.services.ai_service import AIService
+from app.services.ai_service import AIService, ollama_client
 from app.services.weather_service import WeatherService
 from app.services.scheduler_service import scheduler_service
 
 __all__ = [
     'AIService',
+    'ollama_client',
     'WeatherService',
     'scheduler_service'
 ]
\ No newline at end of file
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+import time
+import logging
+
+from sqlalchemy import update, or_
+
+from app.extensions import db
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """
+    Maintains users.last_active_at (login, /today, journal writes) so the
+    scheduler can skip dormant accounts. Writes are throttled to one per
+    user per ACTIVITY_TOUCH_INTERVAL: an in-process LRU of recent touches,
+    backed by a conditional UPDATE for touches coming from other workers.
+    """
+
+    MAX_TRACKED = 10000
+
+    def __init__(self):
+        self.interval = 900
+        self._touched = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.interval = app.config['ACTIVITY_TOUCH_INTERVAL']
+        with self._lock:
+            self._touched.clear()
+
+    def touch(self, user_id):
+        """Record activity now; never raises (activity tracking must not fail a request)."""
+        if not user_id:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._touched.get(user_id)
+            if last is not None and now - last < self.interval:
+                return
+            self._touched[user_id] = now
+            self._touched.move_to_end(user_id)
+            if len(self._touched) > self.MAX_TRACKED:
+                self._touched.popitem(last=False)
+
+        table = User.__table__
+        current = datetime.utcnow()
+        try:
+            # Own connection: independent of the request's session and transaction
+            with db.engine.begin() as conn:
+                conn.execute(
+                    update(table)
+                    .where(
+                        table.c.id == user_id,
+                        or_(
+                            table.c.last_active_at.is_(None),
+                            table.c.last_active_at < current - timedelta(seconds=self.interval)
+                        )
+                    )
+                    .values(last_active_at=current)
+                )
+        except Exception as e:
+            with self._lock:
+                self._touched.pop(user_id, None)
+            logger.warning(f"Could not record activity for user {user_id}: {str(e)}")
+
+
+activity_tracker = ActivityTracker()
@@ -1,107 +1,521 @@
 import os
+import json
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.llm_cache import llm_cache
+from app.services.circuit_breaker import ollama_breaker, CircuitOpenError
+from app.services.emotion_service import emotion_lexicon
+from app.services.telemetry_service import generation_telemetry
+from app.utils.log import log_event
+
+logger = logging.getLogger(__name__)
+
+
+class AIQueueTimeout(Exception):
+    pass
+
+
+class OllamaClient:
+    """
+    Shared Ollama client: one pooled keep-alive requests.Session and a
+    semaphore bounding how many generations run against Ollama at once.
+    Callers beyond the limit queue up to `queue_timeout` seconds.
+    """
+
+    def __init__(self):
+        self.base_url = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
+        self.model = os.getenv("OLLAMA_MODEL", "gemma3:4b")
+        self.connect_timeout = 5
+        self.read_timeout = 200
+        self.queue_timeout = 60
+        self.pool_size = 10
+        self.max_in_flight = 2
+        self.keep_alive = '30m'
+
+        self._session = None
+        self._semaphore = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+
+        # Queue stats
+        self._waiting = 0
+        self._in_flight = 0
+        self._max_waiting = 0
+        self._requests = 0
+        self._queue_timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+        # Warm-up / readiness
+        self._warmup = None
+        self._resident = None
+        self._resident_checked_at = 0.0
+
+    def init_app(self, app):
+        self.base_url = app.config['OLLAMA_API_URL']
+        self.model = app.config['OLLAMA_MODEL']
+        self.connect_timeout = app.config['OLLAMA_CONNECT_TIMEOUT']
+        self.read_timeout = app.config['OLLAMA_READ_TIMEOUT']
+        self.queue_timeout = app.config['OLLAMA_QUEUE_TIMEOUT']
+        self.pool_size = app.config['OLLAMA_POOL_SIZE']
+        self.max_in_flight = app.config['OLLAMA_MAX_IN_FLIGHT']
+        self.keep_alive = app.config['OLLAMA_KEEP_ALIVE']
+
+        with self._lock:
+            self._semaphore = threading.BoundedSemaphore(self.max_in_flight)
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    @contextmanager
+    def slot(self):
+        """Wait for a free generation slot, tracking queue depth and wait time."""
+        semaphore = self._semaphore
+
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+
+        started = time.monotonic()
+        acquired = semaphore.acquire(timeout=self.queue_timeout)
+        waited = time.monotonic() - started
+
+        with self._lock:
+            self._waiting -= 1
+            self._last_wait = waited
+            if not acquired:
+                self._queue_timeouts += 1
+            else:
+                self._in_flight += 1
+                self._requests += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+
+        if not acquired:
+            raise AIQueueTimeout(f"No free AI slot after {self.queue_timeout}s")
+
+        if waited > 1:
+            logger.info(f"Ollama slot acquired after {waited:.1f}s queue wait")
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            semaphore.release()
+
+    def generate(self, payload):
+        """POST /api/generate (non-streaming) and return the decoded JSON body."""
+        if ollama_breaker.is_open():
+            raise CircuitOpenError("ollama circuit is open")
+
+        with self.slot():
+            ollama_breaker.check()
+
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": self.model, "keep_alive": self.keep_alive, **payload, "stream": False},
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.RequestException as e:
+                self._record_failure(e)
+                raise
+            except ValueError:
+                ollama_breaker.record_failure("invalid JSON from Ollama")
+                raise
+
+            ollama_breaker.record_success()
+            self._mark_resident(True)
+            return data
+
+    def stream(self, payload):
+        """POST /api/generate with streaming, yielding each decoded NDJSON line."""
+        if ollama_breaker.is_open():
+            raise CircuitOpenError("ollama circuit is open")
+
+        with self.slot():
+            ollama_breaker.check()
+            finished = False
+
+            try:
+                with self.session.post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": self.model, "keep_alive": self.keep_alive, **payload, "stream": True},
+                    stream=True,
+                    timeout=self.timeout
+                ) as response:
+                    response.raise_for_status()
+
+                    for line in response.iter_lines():
+                        if line:
+                            data = json.loads(line)
+                            if data.get('done'):
+                                ollama_breaker.record_success()
+                                self._mark_resident(True)
+                                finished = True
+                            yield data
+            except requests.exceptions.RequestException as e:
+                finished = True
+                self._record_failure(e)
+                raise
+            except ValueError:
+                # Malformed NDJSON line: a backend failure, as in generate()
+                finished = True
+                ollama_breaker.record_failure("invalid JSON from Ollama")
+                raise
+            finally:
+                if not finished:
+                    ollama_breaker.abandon()
+
+    def warm_up(self):
+        """
+        Load the model into Ollama's memory (an empty prompt only loads it)
+        and pin it for `keep_alive`. Records the cold-load latency.
+        """
+        if ollama_breaker.is_open():
+            logger.info("Ollama warm-up skipped: circuit is open")
+            return self.warmup_status()
+
+        started = time.monotonic()
+        result = {
+            'at': datetime.now(timezone.utc).isoformat(),
+            'model': self.model,
+            'keep_alive': self.keep_alive
+        }
+
+        try:
+            # Same slot and breaker trial as generate(): counts against OLLAMA_MAX_IN_FLIGHT
+            with self.slot():
+                ollama_breaker.check()
+
+                try:
+                    response = self.session.post(
+                        f"{self.base_url}/api/generate",
+                        json={"model": self.model, "prompt": "", "keep_alive": self.keep_alive, "stream": False},
+                        timeout=self.timeout
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    self._record_failure(e)
+                    raise
+
+                ollama_breaker.record_success()
+
+            # Ollama reports durations in nanoseconds
+            result['load_ms'] = round(data.get('load_duration', 0) / 1e6, 1)
+            result['ok'] = True
+            self._mark_resident(True)
+
+        except (CircuitOpenError, AIQueueTimeout) as e:
+            result['ok'] = False
+            result['error'] = str(e)
+
+        except (requests.exceptions.RequestException, ValueError) as e:
+            result['ok'] = False
+            result['error'] = str(e)
+            self._mark_resident(False)
+
+        result['wall_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+        with self._lock:
+            self._warmup = result
+
+        if result['ok']:
+            logger.info(f"Ollama warm-up: {self.model} ready (load {result['load_ms']} ms, wall {result['wall_ms']} ms)")
+        else:
+            logger.warning(f"Ollama warm-up failed: {result['error']}")
+
+        return self.warmup_status()
+
+    def is_model_resident(self, max_age=15):
+        """Ask Ollama (/api/ps) whether the model is loaded; cached for `max_age` seconds."""
+        with self._lock:
+            if self._resident is not None and time.monotonic() - self._resident_checked_at < max_age:
+                return self._resident
+
+        if ollama_breaker.is_open():
+            self._mark_resident(False)
+            return False
+
+        try:
+            response = self.session.get(f"{self.base_url}/api/ps", timeout=(self.connect_timeout, 5))
+            response.raise_for_status()
+            models = response.json().get('models', [])
+            resident = any(m.get('name') == self.model or m.get('model') == self.model for m in models)
+        except (requests.exceptions.RequestException, ValueError):
+            resident = False
+
+        self._mark_resident(resident)
+        return resident
+
+    def warmup_status(self):
+        with self._lock:
+            return {
+                'model_resident': self._resident,
+                'last_warmup': dict(self._warmup) if self._warmup else None
+            }
+
+    def _mark_resident(self, resident):
+        with self._lock:
+            self._resident = resident
+            self._resident_checked_at = time.monotonic()
+
+    @staticmethod
+    def _record_failure(error):
+        # 4xx means our request was wrong, not that Ollama is unhealthy
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code < 500:
+            ollama_breaker.record_success()
+        else:
+            ollama_breaker.record_failure(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'model': self.model,
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self._in_flight,
+                'queue_depth': self._waiting,
+                'max_queue_depth': self._max_waiting,
+                'requests': self._requests,
+                'queue_timeouts': self._queue_timeouts,
+                'avg_wait_ms': round(self._total_wait / self._requests * 1000, 1) if self._requests else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 1),
+                'last_wait_ms': round(self._last_wait * 1000, 1),
+                'keep_alive': self.keep_alive,
+                'model_resident': self._resident,
+                'last_warmup': dict(self._warmup) if self._warmup else None
+            }
+
+
+ollama_client = OllamaClient()
 
 
 class AIService:
     @staticmethod
-    def generate_text(prompt, system_prompt=None):
-        try:
-            ollama_url = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
-            ollama_model = os.getenv("OLLAMA_MODEL", "gemma3:4b")
-
-            # ============ DEBUG START ============
-            print("\n" + "=" * 70)
-            print("🤖 AI SERVICE CALLED")
-            print("=" * 70)
-            print(f"📍 Ollama URL: {ollama_url}")
-            print(f"🏷️  Model: {ollama_model}")
-            print(f"📝 Prompt (first 100 chars): {prompt[:100]}...")
-            if system_prompt:
-                print(f"⚙️  System Prompt: {system_prompt[:100]}...")
-            # ============ DEBUG END ============
+    def generate_text(prompt, system_prompt=None, kind=None, options=None, use_cache=True):
+        """
+        Generate a completion. `kind` (morning_plan, evening_prompt, ...) selects
+        the cache TTL; use_cache=False skips the cache lookup but still stores
+        the fresh result.
+        """
+        started = time.monotonic()
+
+        def record(outcome, data=None, response=None, error=None):
+            entry = generation_telemetry.record(kind, outcome, time.monotonic() - started, data)
+            AIService._log_generation('llm.generate', entry, prompt, response, error)
+
+        cache_key = llm_cache.make_key(ollama_client.model, system_prompt, prompt, options)
+        if use_cache:
+            cached = llm_cache.get(cache_key, kind)
+            if cached is not None:
+                record('cache_hit', response=cached)
+                return cached, None
+        else:
+            llm_cache.record_bypass(kind)
 
-            url = f"{ollama_url}/api/generate"
+        try:
             payload = {
-                "model": ollama_model,
-                "prompt": prompt,
-                "stream": False
+                "prompt": prompt
             }
 
             if system_prompt:
                 payload["system"] = system_prompt
+            if options:
+                payload["options"] = options
 
-            print(f"\n📤 Sending request to Ollama...")
-            response = requests.post(url, json=payload, timeout=200)
-
-            print(f"📥 Response Status: {response.status_code}")
-
-            response.raise_for_status()
-
-            data = response.json()
+            data = ollama_client.generate(payload)
             result = data.get('response', '')
 
-            print(f"✅ Ollama response received!")
-            print(f"📊 Length: {len(result)} characters")
-            print(f"📄 First 200 chars: {result[:200]}...")
-            print("=" * 70 + "\n")
-
+            record('ok' if result else 'empty', data, response=result)
+            llm_cache.set(cache_key, result, kind)
             return result, None
 
+        except CircuitOpenError:
+            record('circuit_open')
+            return None, "AI service unavailable"
+
+        except AIQueueTimeout:
+            record('busy')
+            return None, "AI service busy, please try again"
+
         except requests.exceptions.Timeout:
-            print("\n❌ TIMEOUT ERROR!")
-            print("=" * 70 + "\n")
+            record('timeout')
             return None, "AI request timed out"
 
         except requests.exceptions.RequestException as e:
-            print(f"\n❌ REQUEST ERROR: {str(e)}")
-            print("=" * 70 + "\n")
+            record('error', error=e)
             return None, f"AI service error: {str(e)}"
 
         except Exception as e:
-            print(f"\n❌ UNKNOWN ERROR: {str(e)}")
-            print("=" * 70 + "\n")
+            record('error', error=e)
             return None, f"Unexpected error: {str(e)}"
 
     @staticmethod
-    def detect_emotion_simple(text):
-        if not text:
-            return "neutral"
-
-        text_lower = text.lower()
-
-        positive_keywords = [
-            'glücklich', 'fröhlich', 'gut', 'super', 'toll',
-            'freude', 'entspannt', 'zufrieden', 'motiviert'
-        ]
-        negative_keywords = [
-            'gestresst', 'müde', 'traurig', 'schlecht',
-            'ängstlich', 'sorge', 'problem', 'erschöpft', 'überfordert'
-        ]
-
-        positive_count = sum(1 for keyword in positive_keywords if keyword in text_lower)
-        negative_count = sum(1 for keyword in negative_keywords if keyword in text_lower)
-
-        if negative_count > positive_count:
-            if 'gestresst' in text_lower or 'überfordert' in text_lower:
-                return "gestresst"
-            elif 'müde' in text_lower or 'erschöpft' in text_lower:
-                return "erschöpft"
-            elif 'traurig' in text_lower:
-                return "traurig"
-            else:
-                return "negativ"
-        elif positive_count > negative_count:
-            if 'glücklich' in text_lower or 'freude' in text_lower:
-                return "glücklich"
-            elif 'motiviert' in text_lower:
-                return "motiviert"
-            else:
-                return "positiv"
+    def _log_generation(event, entry, prompt, response=None, error=None):
+        """One structured line per generation; prompt/response are redacted by the log policy."""
+        level = logging.INFO if entry['outcome'] in ('ok', 'cache_hit') else logging.WARNING
+        log_event(
+            logger, event, level,
+            kind=entry['kind'],
+            outcome=entry['outcome'],
+            latency_ms=entry['wall_ms'],
+            load_ms=entry['load_duration'],
+            eval_count=entry['eval_count'],
+            tokens_per_sec=entry['tokens_per_sec'],
+            prompt=prompt,
+            response=response,
+            error_detail=str(error) if error else None
+        )
+
+    @staticmethod
+    def stream_text(prompt, system_prompt=None, kind=None, options=None, use_cache=True):
+        """
+        Stream a generation from Ollama chunk by chunk.
+        Yields (chunk, error) tuples; on error a single (None, error) is yielded
+        and the stream ends. A cache hit is yielded as one chunk.
+        """
+        started = time.monotonic()
+
+        def record(outcome, data=None, error=None):
+            entry = generation_telemetry.record(kind, outcome, time.monotonic() - started, data, stream=True)
+            response = "".join(parts) if parts else None
+            AIService._log_generation('llm.stream', entry, prompt, response, error)
+
+        parts = []
+
+        cache_key = llm_cache.make_key(ollama_client.model, system_prompt, prompt, options)
+        if use_cache:
+            cached = llm_cache.get(cache_key, kind)
+            if cached is not None:
+                record('cache_hit')
+                yield cached, None
+                return
         else:
-            return "neutral"
+            llm_cache.record_bypass(kind)
+
+        payload = {
+            "prompt": prompt
+        }
+
+        if system_prompt:
+            payload["system"] = system_prompt
+        if options:
+            payload["options"] = options
+
+        first_chunk_at = None
+
+        try:
+            for data in ollama_client.stream(payload):
+                if data.get('error'):
+                    record('error', data, error=data['error'])
+                    yield None, f"AI service error: {data['error']}"
+                    return
+
+                chunk = data.get('response', '')
+                if chunk:
+                    if first_chunk_at is None:
+                        first_chunk_at = time.monotonic()
+                    parts.append(chunk)
+                    yield chunk, None
+
+                if data.get('done'):
+                    if first_chunk_at is not None:
+                        data = {**data, 'time_to_first_chunk_ms': round((first_chunk_at - started) * 1000, 1)}
+                    record('ok' if parts else 'empty', data)
+                    llm_cache.set(cache_key, "".join(parts), kind)
+                    return
+
+            # No done line: connection dropped, the partial text must not be used
+            record('error', error="stream ended before completion")
+            yield None, "AI stream ended before completion"
+
+        except CircuitOpenError:
+            record('circuit_open')
+            yield None, "AI service unavailable"
+
+        except AIQueueTimeout:
+            record('busy')
+            yield None, "AI service busy, please try again"
+
+        except requests.exceptions.Timeout:
+            record('timeout')
+            yield None, "AI request timed out"
+
+        except requests.exceptions.RequestException as e:
+            record('error', error=e)
+            yield None, f"AI service error: {str(e)}"
+
+        except ValueError as e:
+            record('error', error=e)
+            yield None, f"Invalid AI stream data: {str(e)}"
+
+    @staticmethod
+    def detect_emotion_simple(text):
+        return emotion_lexicon.classify(text)
+
+    @staticmethod
+    def detect_emotions(texts):
+        return emotion_lexicon.classify_many(texts)
 
     @staticmethod
     def generate_morning_plan(
+        user_name,
+        city,
+        weather=None,
+        sleep_hours=None,
+        last_entries=None,
+        tomorrow_plan=None,
+        use_cache=True
+    ):
+        prompt, system_prompt = AIService.build_morning_plan_prompt(
+            user_name, city, weather, sleep_hours, last_entries, tomorrow_plan
+        )
+        return AIService.generate_text(prompt, system_prompt, kind='morning_plan', use_cache=use_cache)
+
+    @staticmethod
+    def stream_morning_plan(
+        user_name,
+        city,
+        weather=None,
+        sleep_hours=None,
+        last_entries=None,
+        tomorrow_plan=None,
+        use_cache=True
+    ):
+        prompt, system_prompt = AIService.build_morning_plan_prompt(
+            user_name, city, weather, sleep_hours, last_entries, tomorrow_plan
+        )
+        return AIService.stream_text(prompt, system_prompt, kind='morning_plan', use_cache=use_cache)
+
+    @staticmethod
+    def build_morning_plan_prompt(
         user_name,
         city,
         weather=None,
@@ -110,7 +524,7 @@ class AIService:
         tomorrow_plan=None
     ):
         """
-        Generate a morning plan.
+        Build (prompt, system_prompt) for a morning plan.
         Key goals:
         - avoid monotony: produce concrete HH:MM timeline when possible
         - reuse tomorrow_plan if provided (usually from what_to_improve)
@@ -156,7 +570,7 @@ class AIService:
 
         prompt = "\n".join(context_parts)
 
-        return AIService.generate_text(prompt, system_prompt)
+        return prompt, system_prompt
 
     @staticmethod
     def analyze_journal_entry(entry_text):
@@ -183,10 +597,20 @@ class AIService:
             "- Ende mit einem Emoji"
         )
 
-        return AIService.generate_text(prompt, system_prompt)
+        return AIService.generate_text(prompt, system_prompt, kind='journal_analysis')
+
+    @staticmethod
+    def generate_evening_reflection_prompt(user_name, today_plan=None, use_cache=True):
+        prompt, system_prompt = AIService.build_evening_reflection_prompt(user_name, today_plan)
+        return AIService.generate_text(prompt, system_prompt, kind='evening_prompt', use_cache=use_cache)
+
+    @staticmethod
+    def stream_evening_reflection_prompt(user_name, today_plan=None, use_cache=True):
+        prompt, system_prompt = AIService.build_evening_reflection_prompt(user_name, today_plan)
+        return AIService.stream_text(prompt, system_prompt, kind='evening_prompt', use_cache=use_cache)
 
     @staticmethod
-    def generate_evening_reflection_prompt(user_name, today_plan=None):
+    def build_evening_reflection_prompt(user_name, today_plan=None):
         system_prompt = (
             "Du bist ein empathischer Coach für Tagesreflexion. "
             "Sei warmherzig, kurz und ermutigend."
@@ -203,4 +627,4 @@ class AIService:
         prompt_parts.append("- Ende mit einem passenden Emoji")
         prompt = "\n".join(prompt_parts)
 
-        return AIService.generate_text(prompt, system_prompt)
+        return prompt, system_prompt
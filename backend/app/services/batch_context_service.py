@@ -0,0 +1,117 @@
+import logging
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import User, MorningSession, EveningPrompt, JournalEntry
+
+logger = logging.getLogger(__name__)
+
+# Stays below SQLite's bound-parameter limit
+IN_LIST_SIZE = 500
+
+
+def _in_chunks(user_ids):
+    for i in range(0, len(user_ids), IN_LIST_SIZE):
+        yield user_ids[i:i + IN_LIST_SIZE]
+
+
+class BatchContextService:
+    """
+    Loads what the scheduled jobs need for a whole chunk of users in a
+    constant number of queries (per IN_LIST_SIZE users) instead of a few
+    queries per user. Records are plain dicts built from column tuples, so
+    they can be handed to worker threads with their own sessions.
+    """
+
+    @staticmethod
+    def load_morning_contexts(user_ids, day, recent=3):
+        """
+        {user_id: {'username', 'city', 'city_id', 'sleep_goal_hours',
+                   'has_plan', 'recent_moods': [(date, mood), ...],
+                   'tomorrow_plan'}}
+        recent_moods holds the latest `recent` journal entries, newest first;
+        tomorrow_plan is the newest entry's what_to_improve.
+        """
+        contexts = {}
+
+        for ids in _in_chunks(list(user_ids)):
+            users = (User.query
+                     .with_entities(User.id, User.username, User.city, User.city_id, User.sleep_goal_hours)
+                     .filter(User.id.in_(ids)))
+            for row in users:
+                contexts[row.id] = {
+                    'username': row.username,
+                    'city': row.city,
+                    'city_id': row.city_id,
+                    'sleep_goal_hours': row.sleep_goal_hours,
+                    'has_plan': False,
+                    'recent_moods': [],
+                    'tomorrow_plan': None
+                }
+
+            planned = (MorningSession.query
+                       .with_entities(MorningSession.user_id)
+                       .filter(MorningSession.user_id.in_(ids), MorningSession.date == day))
+            for row in planned:
+                if row.user_id in contexts:
+                    contexts[row.user_id]['has_plan'] = True
+
+            for row in BatchContextService._recent_entries(ids, recent):
+                context = contexts.get(row.user_id)
+                if context is None:
+                    continue
+                if not context['recent_moods']:
+                    context['tomorrow_plan'] = row.what_to_improve or None
+                context['recent_moods'].append((row.date, row.mood))
+
+        return contexts
+
+    @staticmethod
+    def load_evening_contexts(user_ids, day):
+        """{user_id: {'username', 'has_prompt', 'today_plan'}}"""
+        contexts = {}
+
+        for ids in _in_chunks(list(user_ids)):
+            for row in User.query.with_entities(User.id, User.username).filter(User.id.in_(ids)):
+                contexts[row.id] = {'username': row.username, 'has_prompt': False, 'today_plan': None}
+
+            prompted = (EveningPrompt.query
+                        .with_entities(EveningPrompt.user_id)
+                        .filter(EveningPrompt.user_id.in_(ids), EveningPrompt.date == day))
+            for row in prompted:
+                if row.user_id in contexts:
+                    contexts[row.user_id]['has_prompt'] = True
+
+            plans = (MorningSession.query
+                     .with_entities(MorningSession.user_id, MorningSession.plan_text)
+                     .filter(MorningSession.user_id.in_(ids), MorningSession.date == day))
+            for row in plans:
+                if row.user_id in contexts:
+                    contexts[row.user_id]['today_plan'] = row.plan_text
+
+        return contexts
+
+    @staticmethod
+    def _recent_entries(user_ids, limit):
+        """The newest `limit` journal entries per user, one window-function query."""
+        rank = func.row_number().over(
+            partition_by=JournalEntry.user_id,
+            order_by=(JournalEntry.date.desc(), JournalEntry.created_at.desc())
+        ).label('rank')
+
+        ranked = (select(
+                      JournalEntry.user_id,
+                      JournalEntry.date,
+                      JournalEntry.mood,
+                      JournalEntry.what_to_improve,
+                      rank
+                  )
+                  .where(JournalEntry.user_id.in_(user_ids))
+                  .subquery())
+
+        return db.session.execute(
+            select(ranked.c.user_id, ranked.c.date, ranked.c.mood, ranked.c.what_to_improve)
+            .where(ranked.c.rank <= limit)
+            .order_by(ranked.c.user_id, ranked.c.rank)
+        ).all()
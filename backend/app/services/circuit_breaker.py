@@ -0,0 +1,147 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+    closed    -> calls pass; `failure_threshold` consecutive failures open it
+    open      -> calls fail fast until `cooldown` seconds have passed
+    half_open -> up to `half_open_max_calls` trial calls; success closes,
+                 failure re-opens
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, cooldown=30, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_calls = 0
+        self._last_error = None
+        self._rejected = 0
+
+    def configure(self, failure_threshold, cooldown, half_open_max_calls=1):
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.cooldown = cooldown
+            self.half_open_max_calls = half_open_max_calls
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """True if a call may go to the upstream right now."""
+        with self._lock:
+            state = self._current_state()
+
+            if state == self.CLOSED:
+                return True
+
+            if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+
+            self._rejected += 1
+            return False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit {self.name}: closed again")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._half_open_calls = 0
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error else None
+            state = self._current_state()
+
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    logger.warning(f"Circuit {self.name}: opened after {self._failures} failures - {self._last_error}")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def abandon(self):
+        """A call allowed by allow() ended without a verdict (e.g. client went away)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def is_open(self):
+        return self.state == self.OPEN
+
+    def reset(self):
+        self.record_success()
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(self.cooldown - (time.monotonic() - self._opened_at), 1)
+
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'cooldown_s': self.cooldown,
+                'retry_in_s': retry_in,
+                'rejected_calls': self._rejected,
+                'last_error': self._last_error
+            }
+
+    # Callers must hold self._lock
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+
+ollama_breaker = CircuitBreaker('ollama')
+weather_breaker = CircuitBreaker('openweathermap')
+
+
+def init_breakers(app):
+    ollama_breaker.configure(
+        app.config['OLLAMA_BREAKER_FAILURE_THRESHOLD'],
+        app.config['OLLAMA_BREAKER_COOLDOWN']
+    )
+    weather_breaker.configure(
+        app.config['WEATHER_BREAKER_FAILURE_THRESHOLD'],
+        app.config['WEATHER_BREAKER_COOLDOWN']
+    )
+
+
+def breaker_states():
+    return {
+        breaker.name: breaker.snapshot()
+        for breaker in (ollama_breaker, weather_breaker)
+    }
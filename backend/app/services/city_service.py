@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import difflib
+import threading
+import unicodedata
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'cities.json')
+
+# Country hints accepted after a comma: "Berlin, DE", "Wien, Österreich"
+COUNTRY_HINTS = {
+    'de': 'DE', 'deu': 'DE', 'deutschland': 'DE', 'germany': 'DE',
+    'at': 'AT', 'aut': 'AT', 'oesterreich': 'AT', 'austria': 'AT',
+    'ch': 'CH', 'che': 'CH', 'schweiz': 'CH', 'switzerland': 'CH',
+}
+
+_UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text):
+    """'  Düsseldorf ' / 'duesseldorf' / 'DÜSSELDORF' -> 'duesseldorf'."""
+    text = unicodedata.normalize('NFKC', text or '').casefold().translate(_UMLAUTS)
+    # Remaining accents (Genève, Bâle) are dropped
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(' ', text).strip()
+
+
+class CityIndex:
+    """
+    Resolves free-text city input to a canonical place from a small local
+    gazetteer (app/data/cities.json): exact match on folded names/aliases
+    first, then difflib fuzzy matching above CITY_MATCH_CUTOFF.
+    A trailing ", <country>" narrows the candidates.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_GAZETTEER_PATH
+        self.cutoff = 0.85
+        self._places = None
+        self._names = None
+        self._resolved = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config['CITY_GAZETTEER_PATH'] or DEFAULT_GAZETTEER_PATH
+        self.cutoff = app.config['CITY_MATCH_CUTOFF']
+        with self._lock:
+            self._places = None
+            self._resolved.clear()
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            gazetteer = json.load(f)
+
+        places = {}
+        names = {}
+
+        for place in gazetteer.get('cities', []):
+            places[place['id']] = place
+            for name in [place['name'], *place.get('aliases', [])]:
+                # First entry wins: "Frankfurt" stays Frankfurt am Main
+                names.setdefault(fold(name), place['id'])
+
+        with self._lock:
+            self._places = places
+            self._names = names
+            self._resolved.clear()
+
+        logger.info(f"City gazetteer loaded: {len(places)} places, {len(names)} names from {self.path}")
+
+    def _compiled(self):
+        if self._places is None:
+            self.load()
+        return self._places, self._names
+
+    def get(self, city_id):
+        places, _ = self._compiled()
+        return places.get(city_id)
+
+    def resolve(self, text):
+        """Canonical place dict for free-text input, or None if nothing matches well enough."""
+        key = fold(text)
+        if not key:
+            return None
+
+        with self._lock:
+            if key in self._resolved:
+                self._resolved.move_to_end(key)
+                return self._resolved[key]
+
+        place = self._match(text)
+
+        with self._lock:
+            self._resolved[key] = place
+            if len(self._resolved) > 2048:
+                self._resolved.popitem(last=False)
+
+        return place
+
+    def resolve_id(self, text):
+        place = self.resolve(text)
+        return place['id'] if place else None
+
+    def _match(self, text):
+        places, names = self._compiled()
+
+        name, _, hint = text.partition(',')
+        folded = fold(name)
+        country = COUNTRY_HINTS.get(fold(hint), fold(hint).upper())
+
+        candidates = names
+        if country:
+            in_country = {n: pid for n, pid in names.items() if places[pid]['country'] == country}
+            # Unknown hints ("Berlin, Brandenburg") are ignored rather than matching nothing
+            candidates = in_country or names
+
+        if folded in candidates:
+            return places[candidates[folded]]
+
+        matches = difflib.get_close_matches(folded, list(candidates), n=1, cutoff=self.cutoff)
+        return places[candidates[matches[0]]] if matches else None
+
+
+city_index = CityIndex()
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'emotion_lexicon.json')
+
+_TOKEN_RE = re.compile(r"[a-zäöüß]+")
+
+# Inflection endings stripped by the light stemmer (longest first)
+_SUFFIXES = ('ern', 'em', 'en', 'er', 'es', 'e', 's')
+_MIN_STEM = 3
+
+POSITIVE = 'positive'
+NEGATIVE = 'negative'
+
+
+def stem(token):
+    """
+    Very light German stemming: 'müde'/'müder' -> 'müd', 'sorgen' -> 'sorg'.
+    Endings are stripped until none is left, so base and inflected forms
+    meet ('problem'/'probleme'/'problemen' -> 'probl').
+    """
+    token = token.replace('ß', 'ss')
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+                token = token[:-len(suffix)]
+                stripped = True
+                break
+    return token
+
+
+class EmotionLexicon:
+    """
+    Lexicon-driven emotion classifier.
+    The lexicon is compiled once into a stem -> (polarity, keyword) table, so
+    classifying a text is a single tokenize-and-lookup pass with whole-word
+    matching ("gut" no longer matches inside "gutartig").
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_LEXICON_PATH
+        self._table = None
+        self._labels = None
+        self._fallbacks = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config['EMOTION_LEXICON_PATH'] or DEFAULT_LEXICON_PATH
+        with self._lock:
+            self._table = None
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            lexicon = json.load(f)
+
+        table = {}
+        labels = {}
+        fallbacks = {}
+
+        for polarity in (POSITIVE, NEGATIVE):
+            section = lexicon.get(polarity, {})
+            fallbacks[polarity] = section.get('fallback', polarity)
+            labels[polarity] = []
+
+            for entry in section.get('labels', []):
+                keywords = {stem(w.lower()) for w in entry['words']}
+                labels[polarity].append((entry['label'], keywords))
+                for keyword in keywords:
+                    table[keyword] = polarity
+
+            for word in section.get('words', []):
+                table[stem(word.lower())] = polarity
+
+        with self._lock:
+            self._table = table
+            self._labels = labels
+            self._fallbacks = fallbacks
+
+        logger.info(f"Emotion lexicon loaded: {len(table)} stems from {self.path}")
+
+    def _compiled(self):
+        if self._table is None:
+            self.load()
+        return self._table, self._labels, self._fallbacks
+
+    def classify(self, text):
+        if not text:
+            return "neutral"
+
+        table, labels, fallbacks = self._compiled()
+
+        # Each keyword counts once, as in the original keyword check
+        hits = {POSITIVE: set(), NEGATIVE: set()}
+        for token in _TOKEN_RE.findall(text.lower()):
+            token_stem = stem(token)
+            polarity = table.get(token_stem)
+            if polarity:
+                hits[polarity].add(token_stem)
+
+        positive_count = len(hits[POSITIVE])
+        negative_count = len(hits[NEGATIVE])
+
+        if positive_count == negative_count:
+            return "neutral"
+
+        polarity = NEGATIVE if negative_count > positive_count else POSITIVE
+
+        for label, keywords in labels[polarity]:
+            if hits[polarity] & keywords:
+                return label
+
+        return fallbacks[polarity]
+
+    def classify_many(self, texts):
+        """Classify a batch of texts; returns labels in input order."""
+        self._compiled()
+        return [self.classify(text) for text in texts]
+
+
+emotion_lexicon = EmotionLexicon()
@@ -0,0 +1,238 @@
+from datetime import date, datetime, timedelta
+import json
+import threading
+import logging
+
+from sqlalchemy import update, func
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import JobRun, JobRunItem
+from app.services.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+
+# Bucketed mode: one job_runs row holds the end of the last handled bucket
+BUCKET_CURSOR_ID = 'bucket-cursor'
+BUCKET_CURSOR_KIND = 'cursor'
+
+
+class RunInProgress(Exception):
+    """A run of the same job is still running (possibly in another process)."""
+
+    def __init__(self, run_id):
+        super().__init__(f"Run {run_id} is still in progress")
+        self.run_id = run_id
+
+
+class JobLedger:
+    """
+    Persistent progress of one scheduler run (job_runs / job_run_items).
+
+    Per-user outcomes are buffered and written in batches together with the
+    run's counters and heartbeat, every SCHEDULER_RUN_HEARTBEAT seconds and
+    at each chunk checkpoint. A run whose heartbeat is older than
+    SCHEDULER_RUN_STALE_AFTER belongs to a dead process and can be claimed
+    and resumed after its checkpoint. Users of the interrupted chunk are
+    run again (their artifacts may not have been written) but not counted
+    twice.
+    """
+
+    def __init__(self, app, run, identity, done=None, counts=None):
+        self.app = app
+        self.run_id = run.id
+        self.job_name = run.job_name
+        self.kind = run.kind
+        self.day = run.day
+        self.total = run.total
+        self.user_ids = run.explicit_user_ids()
+        self.checkpoint = run.checkpoint
+        self.identity = identity
+        self.done = done or set()
+        self.counts = counts or {'success': 0, 'skipped': 0, 'error': 0}
+        self.lost = False
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._items = WriteBehindBuffer(
+            app,
+            JobRunItem,
+            batch_size=app.config['SCHEDULER_WRITE_BATCH_SIZE'],
+            max_delay=app.config['SCHEDULER_RUN_HEARTBEAT'],
+            on_flush=self._write_progress
+        )
+
+    @classmethod
+    def start(cls, app, job_name, kind, user_ids, total, identity):
+        """
+        Open a new run; explicit user ids are stored (sorted) so the run can
+        be resumed. Raises RunInProgress if `job_name` is already running.
+        """
+        with app.app_context():
+            run = JobRun(
+                job_name=job_name,
+                kind=kind,
+                day=date.today(),
+                owner=identity,
+                user_ids=json.dumps(sorted(user_ids)) if user_ids is not None else None,
+                total=total
+            )
+            try:
+                db.session.add(run)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                running = JobRun.query.filter_by(job_name=job_name, status='running').first()
+                db.session.remove()
+                raise RunInProgress(running.id if running else None)
+
+            ledger = cls(app, run, identity)
+            db.session.remove()
+            return ledger
+
+    @classmethod
+    def claim(cls, app, run_id, identity):
+        """Take over a stale run; None if it finished or someone else was faster."""
+        table = JobRun.__table__
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=app.config['SCHEDULER_RUN_STALE_AFTER'])
+
+        with app.app_context():
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    update(table)
+                    .where(table.c.id == run_id, table.c.status == 'running', table.c.heartbeat_at < stale_before)
+                    .values(owner=identity, heartbeat_at=now, resumes=table.c.resumes + 1)
+                )
+            if not result.rowcount:
+                return None
+
+            run = db.session.get(JobRun, run_id)
+            done = {row.user_id for row in JobRunItem.query.with_entities(JobRunItem.user_id).filter_by(run_id=run_id)}
+            counts = {'success': 0, 'skipped': 0, 'error': 0}
+            for status, count in (db.session.query(JobRunItem.status, func.count())
+                                  .filter(JobRunItem.run_id == run_id)
+                                  .group_by(JobRunItem.status)):
+                counts[status] = count
+
+            ledger = cls(app, run, identity, done=done, counts=counts)
+            db.session.remove()
+            return ledger
+
+    @staticmethod
+    def stale_runs(stale_after):
+        """Runs still marked running whose process stopped reporting."""
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_after)
+        return (JobRun.query
+                .filter(JobRun.status == 'running', JobRun.heartbeat_at < stale_before)
+                .order_by(JobRun.started_at)
+                .all())
+
+    @staticmethod
+    def abandon(run_id):
+        table = JobRun.__table__
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.id == run_id, table.c.status == 'running')
+                .values(status='abandoned', finished_at=datetime.utcnow())
+            )
+
+    @staticmethod
+    def bucket_cursor(app):
+        """End of the last bucket (aware UTC) whose runs started; None before the first."""
+        with app.app_context():
+            try:
+                row = db.session.get(JobRun, BUCKET_CURSOR_ID)
+                return datetime.fromisoformat(row.checkpoint) if row and row.checkpoint else None
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def save_bucket_cursor(app, window_end):
+        table = JobRun.__table__
+        now = datetime.utcnow()
+        with app.app_context(), db.engine.begin() as conn:
+            updated = conn.execute(
+                update(table).where(table.c.id == BUCKET_CURSOR_ID)
+                .values(checkpoint=window_end.isoformat(), day=date.today(), heartbeat_at=now)
+            ).rowcount
+            if not updated:
+                conn.execute(table.insert().values(
+                    id=BUCKET_CURSOR_ID, job_name='run_due_users', kind=BUCKET_CURSOR_KIND, day=date.today(),
+                    status='done', checkpoint=window_end.isoformat(), started_at=now, heartbeat_at=now
+                ))
+
+    @staticmethod
+    def current_runs():
+        return [run.to_dict() for run in JobRun.query.filter_by(status='running').order_by(JobRun.started_at)]
+
+    @staticmethod
+    def recent_runs(limit=10):
+        return [run.to_dict() for run in (JobRun.query
+                                          .filter(JobRun.status != 'running', JobRun.kind != BUCKET_CURSOR_KIND)
+                                          .order_by(JobRun.started_at.desc())
+                                          .limit(limit))]
+
+    @property
+    def processed(self):
+        return sum(self.counts.values())
+
+    def record(self, user_id, outcome, error=None, latency_ms=None):
+        if user_id in self.done:
+            # Re-run after a resume (its chunk had no checkpoint yet): already counted
+            return
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self._items.add(dict(
+            run_id=self.run_id,
+            user_id=user_id,
+            status=outcome,
+            error=error,
+            latency_ms=round(latency_ms, 1) if latency_ms is not None else None,
+            finished_at=datetime.utcnow()
+        ))
+
+    def save_checkpoint(self, last_user_id):
+        """Every user up to `last_user_id` is done: persist items, counters and the checkpoint."""
+        with self._lock:
+            self.checkpoint = last_user_id
+        self._items.flush()
+
+    def finish(self, status='done', error=None):
+        if self.finished:
+            return
+        self.finished = True
+
+        self._items.close()
+        if self.lost:
+            return
+
+        table = JobRun.__table__
+        with self.app.app_context(), db.engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.id == self.run_id, table.c.owner == self.identity)
+                .values(status=status, error=error, finished_at=datetime.utcnow())
+            )
+
+    def _write_progress(self, conn):
+        table = JobRun.__table__
+        with self._lock:
+            values = dict(
+                processed=sum(self.counts.values()),
+                success=self.counts.get('success', 0),
+                skipped=self.counts.get('skipped', 0),
+                errors=self.counts.get('error', 0),
+                checkpoint=self.checkpoint,
+                heartbeat_at=datetime.utcnow()
+            )
+
+        result = conn.execute(
+            update(table).where(table.c.id == self.run_id, table.c.owner == self.identity).values(**values)
+        )
+        if not result.rowcount and not self.lost:
+            # Declared stale and claimed by another process; stop at the next chunk
+            self.lost = True
+            logger.warning(f"{self.job_name}: run {self.run_id} was taken over by another process")
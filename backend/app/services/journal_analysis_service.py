@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from uuid import uuid4
+import threading
+import logging
+from app.utils.log import bind_log_context
+
+logger = logging.getLogger(__name__)
+
+
+class JournalAnalysisService:
+    """
+    Runs AIService.analyze_journal_entry outside the request.
+    Entries are saved with ai_summary_status='pending'; a worker claims the
+    row (pending -> running), writes the summary and marks it done.
+    Failed attempts go back to pending and are retried with exponential
+    backoff until JOURNAL_ANALYSIS_MAX_ATTEMPTS, then marked failed.
+    Claims older than JOURNAL_ANALYSIS_STALE_AFTER (the worker's process
+    died) are put back to pending on startup.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self, app=None):
+        self.app = app
+        self.executor = None
+        self.run_async = True
+        self.max_attempts = 3
+        self.retry_base_delay = 5
+        self.stale_after = 600
+
+    def init_app(self, app):
+        self.app = app
+        self.run_async = app.config['JOURNAL_ANALYSIS_ASYNC']
+        self.max_attempts = app.config['JOURNAL_ANALYSIS_MAX_ATTEMPTS']
+        self.retry_base_delay = app.config['JOURNAL_ANALYSIS_RETRY_BASE_DELAY']
+        self.stale_after = app.config['JOURNAL_ANALYSIS_STALE_AFTER']
+
+        if self.run_async and self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=app.config['JOURNAL_ANALYSIS_WORKERS'],
+                thread_name_prefix='journal-analysis'
+            )
+
+    def submit(self, entry_id, delay=0):
+        if not self.run_async:
+            self.analyze(entry_id)
+            return
+
+        if delay > 0:
+            timer = threading.Timer(delay, self.submit, args=(entry_id,))
+            timer.daemon = True
+            timer.start()
+            return
+
+        self.executor.submit(self._run, entry_id)
+
+    def resume_pending(self):
+        """Re-queue entries left pending, or stuck running, by a previous process."""
+        from app.models import JournalEntry
+        from app.extensions import db
+
+        stale = (JournalEntry.query
+                 .filter(
+                     JournalEntry.ai_summary_status == self.STATUS_RUNNING,
+                     db.or_(
+                         JournalEntry.ai_summary_claimed_at.is_(None),
+                         JournalEntry.ai_summary_claimed_at < datetime.utcnow() - timedelta(seconds=self.stale_after)
+                     )
+                 )
+                 .update({
+                     JournalEntry.ai_summary_status: self.STATUS_PENDING,
+                     JournalEntry.ai_summary_claimed_at: None,
+                     JournalEntry.ai_summary_claim: None
+                 }, synchronize_session=False))
+        db.session.commit()
+
+        if stale:
+            logger.warning(f"Reset {stale} stale running journal analyses to pending")
+
+        pending_ids = [
+            row.id for row in JournalEntry.query
+            .with_entities(JournalEntry.id)
+            .filter_by(ai_summary_status=self.STATUS_PENDING)
+            .all()
+        ]
+
+        for entry_id in pending_ids:
+            self.submit(entry_id)
+
+        if pending_ids:
+            logger.info(f"Re-queued {len(pending_ids)} pending journal analyses")
+
+    def _run(self, entry_id):
+        from app.extensions import db
+
+        with self.app.app_context(), bind_log_context(journal_entry=entry_id):
+            try:
+                self.analyze(entry_id)
+            except Exception as e:
+                logger.error(f"Journal analysis {entry_id}: worker error - {str(e)}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    def analyze(self, entry_id):
+        from app.models import JournalEntry
+        from app.services.ai_service import AIService
+        from app.extensions import db
+
+        # Claim atomically so two processes never analyze the same entry
+        claim = str(uuid4())
+        claimed = (JournalEntry.query
+                   .filter_by(id=entry_id, ai_summary_status=self.STATUS_PENDING)
+                   .update({
+                       JournalEntry.ai_summary_status: self.STATUS_RUNNING,
+                       JournalEntry.ai_summary_attempts: JournalEntry.ai_summary_attempts + 1,
+                       JournalEntry.ai_summary_claimed_at: datetime.utcnow(),
+                       JournalEntry.ai_summary_claim: claim
+                   }, synchronize_session=False))
+        db.session.commit()
+
+        if not claimed:
+            return
+
+        entry = db.session.get(JournalEntry, entry_id)
+        if not entry or entry.ai_summary_claim != claim:
+            return
+
+        attempt = entry.ai_summary_attempts
+        summary, error = AIService.analyze_journal_entry(entry.analysis_text())
+
+        if not error and summary:
+            self._finish(entry_id, claim, attempt, ai_summary=summary, ai_summary_status=self.STATUS_DONE)
+            return
+
+        if attempt >= self.max_attempts:
+            if self._finish(entry_id, claim, attempt, ai_summary_status=self.STATUS_FAILED):
+                logger.error(f"Journal analysis {entry_id}: giving up after {attempt} attempts - {error}")
+            return
+
+        if not self._finish(entry_id, claim, attempt, ai_summary_status=self.STATUS_PENDING):
+            return
+
+        delay = self.retry_base_delay * (2 ** (attempt - 1))
+        logger.warning(f"Journal analysis {entry_id}: attempt {attempt} failed ({error}), retrying in {delay}s")
+
+        if self.run_async:
+            self.submit(entry_id, delay=delay)
+
+    def _finish(self, entry_id, claim, attempt, **values):
+        """
+        Write the outcome only if the entry is still under this claim.
+        The entry may have been rewritten (POST /journal/ upserts it back to
+        pending) while the AI was running; that result is stale and dropped.
+        """
+        from app.models import JournalEntry
+        from app.extensions import db
+
+        written = (JournalEntry.query
+                   .filter_by(
+                       id=entry_id,
+                       ai_summary_status=self.STATUS_RUNNING,
+                       ai_summary_attempts=attempt,
+                       ai_summary_claim=claim
+                   )
+                   .update(values, synchronize_session=False))
+        db.session.commit()
+
+        if not written:
+            logger.info(f"Journal analysis {entry_id}: entry changed during attempt {attempt}, result dropped")
+        return written == 1
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+journal_analysis_service = JournalAnalysisService()
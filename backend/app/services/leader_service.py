@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+import atexit
+import os
+import socket
+import threading
+import time
+import logging
+
+from sqlalchemy import insert, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.lease import SchedulerLeader
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Lease-based leader election through the shared database: every process
+    tries to take or renew the `name` row every SCHEDULER_LEADER_RENEW
+    seconds; the holder keeps it for SCHEDULER_LEADER_TTL seconds. When the
+    leader dies, its lease expires and the next process to poll takes over.
+    A clean shutdown deletes the row so failover is immediate.
+
+    Expiry compares wall-clock times written by different hosts, so their
+    clocks must agree to well within the TTL.
+    """
+
+    def __init__(self, name='scheduler'):
+        self.name = name
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.app = None
+        self.enabled = True
+        self.ttl = 30
+        self.renew_interval = 10
+        self.is_leader = False
+        self.elected_at = None
+
+        self._on_elected = None
+        self._on_demoted = None
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app, on_elected, on_demoted):
+        self.app = app
+        self.enabled = app.config['SCHEDULER_LEADER_ELECTION']
+        self.ttl = app.config['SCHEDULER_LEADER_TTL']
+        self.renew_interval = min(app.config['SCHEDULER_LEADER_RENEW'], self.ttl / 2)
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+
+        if not self.enabled:
+            # Single-process deployment: this process always owns the jobs
+            self._set_leader(True)
+            return
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-leader', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            renewed_at = time.monotonic()
+            try:
+                with self.app.app_context():
+                    held = self._try_acquire()
+                if held:
+                    self._valid_until = renewed_at + self.ttl
+            except Exception as e:
+                # Keep leadership only as long as the last written lease is still valid
+                held = self.is_leader and time.monotonic() < self._valid_until
+                logger.warning(f"Leader election ({self.name}): lease renewal failed - {str(e)}")
+
+            self._set_leader(held)
+
+            if self._stop.wait(self.renew_interval):
+                return
+
+    def _try_acquire(self):
+        """Renew our lease or take over an expired one; insert if there is none yet."""
+        table = SchedulerLeader.__table__
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(
+                    table.c.name == self.name,
+                    or_(table.c.owner == self.identity, table.c.expires_at < now)
+                )
+                .values(owner=self.identity, expires_at=expires_at)
+            )
+            if result.rowcount:
+                if not self.is_leader:
+                    conn.execute(
+                        update(table).where(table.c.name == self.name).values(acquired_at=now)
+                    )
+                return True
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table).values(
+                    name=self.name,
+                    owner=self.identity,
+                    acquired_at=now,
+                    expires_at=expires_at
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    def _set_leader(self, leader):
+        if leader == self.is_leader:
+            return
+
+        self.is_leader = leader
+        if leader:
+            self.elected_at = datetime.utcnow()
+            logger.info(f"👑 {self.identity} elected {self.name} leader")
+            callback = self._on_elected
+        else:
+            self.elected_at = None
+            logger.warning(f"{self.identity} is no longer {self.name} leader")
+            callback = self._on_demoted
+
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Leader election ({self.name}): callback failed - {str(e)}")
+
+    def stop(self):
+        """Stop campaigning and hand the lease back."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+        if self.enabled and self.is_leader and self.app is not None:
+            try:
+                table = SchedulerLeader.__table__
+                with self.app.app_context(), db.engine.begin() as conn:
+                    conn.execute(delete(table).where(table.c.name == self.name, table.c.owner == self.identity))
+            except Exception as e:
+                logger.warning(f"Leader election ({self.name}): could not release lease - {str(e)}")
+
+        self._set_leader(False)
+
+    def status(self):
+        """This process' role and the current lease holder (None if nobody holds it)."""
+        current = None
+        if self.enabled:
+            row = db.session.get(SchedulerLeader, self.name)
+            if row is not None and row.expires_at >= datetime.utcnow():
+                current = {
+                    'owner': row.owner,
+                    'acquired_at': row.acquired_at.isoformat(),
+                    'expires_at': row.expires_at.isoformat()
+                }
+        elif self.is_leader:
+            current = {'owner': self.identity, 'acquired_at': None, 'expires_at': None}
+
+        return {
+            'election': self.enabled,
+            'identity': self.identity,
+            'is_leader': self.is_leader,
+            'elected_at': self.elected_at.isoformat() if self.elected_at else None,
+            'ttl_s': self.ttl,
+            'current': current
+        }
+
+
+scheduler_leader = LeaderElection('scheduler')
@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+import threading
+import time
+import logging
+
+from flask import current_app
+from sqlalchemy import insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.lease import GenerationLease
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationLeaseService:
+    """
+    Single-flight generation per (user_id, date, kind) across threads and
+    processes. The lease row is written on its own connection so it is
+    visible to other workers immediately, independent of the caller's session.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    @staticmethod
+    def acquire(user_id, day, kind, ttl=None):
+        """Returns an owner token if the lease was taken, else None."""
+        table = GenerationLease.__table__
+        ttl = ttl or current_app.config['GENERATION_LEASE_TTL']
+        owner = str(uuid4())
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table).values(
+                    user_id=user_id,
+                    date=day,
+                    kind=kind,
+                    owner=owner,
+                    expires_at=expires_at,
+                    created_at=now
+                ))
+            return owner
+        except IntegrityError:
+            pass
+
+        # Lease exists: take it over only if its holder let it expire
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(
+                    table.c.user_id == user_id,
+                    table.c.date == day,
+                    table.c.kind == kind,
+                    table.c.expires_at < now
+                )
+                .values(owner=owner, expires_at=expires_at, created_at=now)
+            )
+
+        if result.rowcount:
+            logger.warning(f"Took over expired {kind} lease for user {user_id} ({day})")
+            return owner
+
+        return None
+
+    @staticmethod
+    def release(user_id, day, kind, owner):
+        table = GenerationLease.__table__
+
+        with db.engine.begin() as conn:
+            conn.execute(
+                delete(table).where(
+                    table.c.user_id == user_id,
+                    table.c.date == day,
+                    table.c.kind == kind,
+                    table.c.owner == owner
+                )
+            )
+
+    @staticmethod
+    def releaser(user_id, day, kind, owner):
+        """
+        Idempotent release for a streamed response: call it from the
+        generator's finally and register it with response.call_on_close, since
+        a client that disconnects before the first chunk never starts the
+        generator. Carries its own app context (close runs after the request).
+        """
+        app = current_app._get_current_object()
+        released = threading.Event()
+
+        def release():
+            if released.is_set():
+                return
+            released.set()
+            with app.app_context():
+                GenerationLeaseService.release(user_id, day, kind, owner)
+
+        return release
+
+    @staticmethod
+    def release_many(owners, conn=None):
+        """Release several leases by owner token, optionally inside the caller's transaction."""
+        table = GenerationLease.__table__
+        statement = delete(table).where(table.c.owner.in_(list(owners)))
+
+        if conn is not None:
+            conn.execute(statement)
+            return
+
+        with db.engine.begin() as conn:
+            conn.execute(statement)
+
+    @staticmethod
+    def is_held(user_id, day, kind):
+        table = GenerationLease.__table__
+
+        with db.engine.connect() as conn:
+            expires_at = conn.execute(
+                table.select()
+                .with_only_columns(table.c.expires_at)
+                .where(
+                    table.c.user_id == user_id,
+                    table.c.date == day,
+                    table.c.kind == kind
+                )
+            ).scalar()
+
+        return expires_at is not None and expires_at >= datetime.utcnow()
+
+    @staticmethod
+    def wait_for(user_id, day, kind, find_existing, timeout=None):
+        """
+        Wait while another caller holds the lease.
+        Returns the artifact once it exists, or None when the lease was
+        released without a result or the timeout passed.
+        """
+        if timeout is None:
+            timeout = current_app.config['GENERATION_LEASE_WAIT']
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            time.sleep(GenerationLeaseService.POLL_INTERVAL)
+
+            existing = find_existing()
+            if existing:
+                return existing
+
+            if not GenerationLeaseService.is_held(user_id, day, kind):
+                return None
+
+        return None
+
+    @staticmethod
+    def single_flight(user_id, day, kind, find_existing, generate, wait_timeout=None, hand_off=False):
+        """
+        Return the existing artifact, or generate it while holding the lease.
+        Concurrent callers wait for the holder's result instead of calling
+        the LLM again.
+
+        With hand_off=True, `generate(owner)` receives the lease token and
+        keeps the lease when it returns a result; whoever persists the
+        artifact later releases it (see WriteBehindBuffer).
+
+        Returns (artifact, generated): generated is True only for the caller
+        that ran `generate`. (None, False) means another caller is still busy.
+        """
+        existing = find_existing()
+        if existing:
+            return existing, False
+
+        if wait_timeout is None:
+            wait_timeout = current_app.config['GENERATION_LEASE_WAIT']
+        deadline = time.monotonic() + wait_timeout
+
+        while True:
+            owner = GenerationLeaseService.acquire(user_id, day, kind)
+
+            if owner:
+                handed_off = False
+                try:
+                    # Re-check: the previous holder may have finished meanwhile
+                    existing = find_existing()
+                    if existing:
+                        return existing, False
+                    if not hand_off:
+                        return generate(), True
+                    artifact = generate(owner)
+                    handed_off = artifact is not None
+                    return artifact, True
+                finally:
+                    if not handed_off:
+                        GenerationLeaseService.release(user_id, day, kind, owner)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, False
+
+            existing = GenerationLeaseService.wait_for(user_id, day, kind, find_existing, timeout=remaining)
+            if existing:
+                return existing, False
@@ -0,0 +1,180 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for LLM responses.
+    Key = sha256 of (model, system prompt, prompt, options).
+    Tier 1 is an in-process LRU, tier 2 an optional SQLite file shared by
+    all workers on the host. TTLs are set per prompt kind; a TTL of 0
+    disables caching for that kind.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.max_entries = 512
+        self.default_ttl = 3600
+        self.ttls = {}
+        self.sqlite_path = None
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self._stats = {
+            'memory_hits': 0,
+            'sqlite_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+        self._kind_stats = {}
+
+    def init_app(self, app):
+        self.enabled = app.config['LLM_CACHE_ENABLED']
+        self.max_entries = app.config['LLM_CACHE_MAX_ENTRIES']
+        self.default_ttl = app.config['LLM_CACHE_DEFAULT_TTL']
+        self.ttls = dict(app.config['LLM_CACHE_TTLS'])
+        self.sqlite_path = app.config['LLM_CACHE_SQLITE_PATH'] or None
+
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+            if self.enabled and self.sqlite_path:
+                try:
+                    self._conn = sqlite3.connect(self.sqlite_path, timeout=5, check_same_thread=False)
+                    self._conn.execute('PRAGMA journal_mode=WAL')
+                    self._conn.execute(
+                        'CREATE TABLE IF NOT EXISTS llm_cache ('
+                        'key TEXT PRIMARY KEY, kind TEXT, response TEXT NOT NULL, '
+                        'created_at REAL NOT NULL, expires_at REAL NOT NULL)'
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache: SQLite tier disabled - {str(e)}")
+                    self._conn = None
+
+    @staticmethod
+    def make_key(model, system_prompt, prompt, options=None):
+        raw = json.dumps(
+            [model, system_prompt or '', prompt, options or {}],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, kind):
+        return self.ttls.get(kind, self.default_ttl)
+
+    def get(self, key, kind=None):
+        if not self.enabled or self.ttl_for(kind) <= 0:
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                response, expires_at = cached
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count('memory_hits', kind)
+                    return response
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        'SELECT response, expires_at FROM llm_cache WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row and row[1] > now:
+                        self._remember(key, row[0], row[1])
+                        self._count('sqlite_hits', kind)
+                        return row[0]
+                    if row:
+                        self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                        self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache: SQLite read failed - {str(e)}")
+
+            self._count('misses', kind)
+            return None
+
+    def set(self, key, response, kind=None):
+        ttl = self.ttl_for(kind)
+        if not self.enabled or ttl <= 0 or not response:
+            return
+
+        now = time.time()
+        expires_at = now + ttl
+
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._stats['stores'] += 1
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO llm_cache (key, kind, response, created_at, expires_at) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (key, kind, response, now, expires_at)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache: SQLite write failed - {str(e)}")
+
+    def record_bypass(self, kind=None):
+        with self._lock:
+            self._count('bypassed', kind)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM llm_cache')
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['memory_hits'] + self._stats['sqlite_hits'] + self._stats['misses']
+            hits = self._stats['memory_hits'] + self._stats['sqlite_hits']
+            return {
+                'enabled': self.enabled,
+                'sqlite_tier': self._conn is not None,
+                'entries': len(self._memory),
+                'max_entries': self.max_entries,
+                **self._stats,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'by_kind': {kind: dict(counts) for kind, counts in self._kind_stats.items()}
+            }
+
+    # Callers must hold self._lock
+    def _remember(self, key, response, expires_at):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _count(self, counter, kind):
+        self._stats[counter] += 1
+        kind_counts = self._kind_stats.setdefault(kind or 'other', {'hits': 0, 'misses': 0, 'bypassed': 0})
+        if counter in ('memory_hits', 'sqlite_hits'):
+            kind_counts['hits'] += 1
+        else:
+            kind_counts[counter] += 1
+
+
+llm_cache = LLMResponseCache()
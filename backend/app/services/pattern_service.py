@@ -1,7 +1,11 @@
 import json
+import logging
 import re
 from datetime import date, timedelta
 from app.services.ai_service import AIService
+from app.utils.log import log_event
+
+logger = logging.getLogger(__name__)
 
 
 class SmartPatternService:
@@ -31,7 +35,7 @@ class SmartPatternService:
         # Cache-Prüfung (vermeidet unnötige AI-Aufrufe)
         cache_key = f"{user_id}_{date.today()}"
         if cache_key in SmartPatternService._cache:
-            print("📦 Verwende gecachte AI-Vorschläge")
+            logger.debug("Verwende gecachte AI-Vorschläge")
             return SmartPatternService._cache[cache_key]
 
         # 1. Bestimme den morgigen Tag
@@ -53,7 +57,7 @@ class SmartPatternService:
 
         # Mindestens 3 Einträge nötig für sinnvolle Muster
         if len(entries) < 3:
-            print("⚠️ Nicht genug Daten für AI-Musteranalyse")
+            logger.info("Nicht genug Daten für AI-Musteranalyse")
             return []
 
         # 3. Bereite den Text für die AI vor
@@ -70,7 +74,7 @@ class SmartPatternService:
 
         # Wenn keine verwertbaren Daten vorhanden sind
         if not history_text.strip():
-            print("⚠️ Keine Aufgaben-Historie gefunden")
+            logger.info("Keine Aufgaben-Historie gefunden")
             return []
 
         # 4. Erstelle den intelligenten Prompt
@@ -105,27 +109,25 @@ Falls KEINE klaren Muster erkennbar: []
 
         # 5. Rufe die AI auf
         try:
-            print(f"🤖 Rufe AI für {tomorrow_day_name}-Vorschläge auf...")
-            response, error = AIService.generate_text(prompt, system_prompt)
+            logger.debug(f"Rufe AI für {tomorrow_day_name}-Vorschläge auf")
+            response, error = AIService.generate_text(prompt, system_prompt, kind='pattern_suggestions')
 
             # Fehlerbehandlung: AI-Service-Fehler
             if error:
-                print(f"❌ AI-Fehler: {error}")
+                logger.warning(f"AI-Fehler: {error}")
                 return []
 
             # Fehlerbehandlung: Leere Antwort
             if not response or not response.strip():
-                print("⚠️ AI hat leere Antwort zurückgegeben")
+                logger.warning("AI hat leere Antwort zurückgegeben")
                 return []
 
             # 6. Bereinige und analysiere die AI-Antwort
-            print(f"📥 AI-Antwort (erste 200 Zeichen): {response[:200]}")
-
             # Extrahiere JSON-Array mit Regex
             # Beispiel: "Hier sind die Vorschläge: ["Gym", "Meeting"]" → ["Gym", "Meeting"]
             match = re.search(r"\[.*?\]", response, re.DOTALL)
             if not match:
-                print("⚠️ Kein JSON-Array in AI-Antwort gefunden")
+                log_event(logger, "patterns.no_json_array", logging.WARNING, user_id=user_id, response=response)
                 return []
 
             # Parse JSON
@@ -133,7 +135,7 @@ Falls KEINE klaren Muster erkennbar: []
 
             # 7. Validiere und bereinige die Vorschläge
             if not isinstance(suggestions_raw, list):
-                print("⚠️ AI-Antwort ist keine Liste")
+                log_event(logger, "patterns.not_a_list", logging.WARNING, user_id=user_id, response=response)
                 return []
 
             suggestions = []
@@ -149,7 +151,7 @@ Falls KEINE klaren Muster erkennbar: []
                         }
                     )
 
-            print(f"✅ {len(suggestions)} AI-Vorschläge generiert")
+            log_event(logger, "patterns.suggestions", user_id=user_id, count=len(suggestions), day=tomorrow_day_name)
 
             # 8. Speichere im Cache (gültig bis Mitternacht)
             SmartPatternService._cache[cache_key] = suggestions
@@ -158,11 +160,10 @@ Falls KEINE klaren Muster erkennbar: []
 
         except json.JSONDecodeError as e:
             # Fehlerbehandlung: JSON konnte nicht geparst werden
-            print(f"❌ JSON-Parsing-Fehler: {e}")
-            print(f"Rohe AI-Antwort: {response}")
+            log_event(logger, "patterns.json_error", logging.WARNING, user_id=user_id, error_detail=str(e), response=response)
             return []
 
         except Exception as e:
             # Fehlerbehandlung: Unerwarteter Fehler
-            print(f"❌ Unerwarteter Fehler: {e}")
+            logger.error(f"Unerwarteter Fehler bei AI-Vorschlägen: {e}")
             return []
@@ -1,23 +1,92 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import date
+from apscheduler.triggers.interval import IntervalTrigger
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+import threading
+import time
 import logging
+from app.utils.log import bind_log_context
+from app.utils.local_time import parse_hhmm, get_zone, local_date, default_zone
 
 logger = logging.getLogger(__name__)
 
+# Per-user outcomes of a batch job
+SUCCESS = 'success'
+SKIPPED = 'skipped'
+ERROR = 'error'
+
+# Bucketed mode: the longest gap a late tick catches up on
+MAX_CATCH_UP = timedelta(hours=1)
+
+
+def is_due(target_minutes, lead_minutes, window_start_local, window_minutes):
+    """
+    True if `target_minutes` (HH:MM as minutes after midnight) minus the lead
+    falls into the local window [start, start + window_minutes).
+    """
+    start = window_start_local.hour * 60 + window_start_local.minute
+    return (target_minutes - lead_minutes - start) % (24 * 60) < window_minutes
+
+
+class UserJobError(Exception):
+    """Expected per-user failure (e.g. the AI call failed); recorded as the user's error."""
+
+
+def merge_counts(totals, stats):
+    """Add one chunk's numeric stats into the run totals; lists are concatenated."""
+    for key, value in stats.items():
+        if isinstance(value, list):
+            totals[key] = sorted(set(totals.get(key, [])) | set(value))[:5]
+        else:
+            totals[key] = round(totals.get(key, 0) + value, 2)
+
 
 class SchedulerService:
     def __init__(self, app=None):
         self.scheduler = BackgroundScheduler()
         self.app = app
+        self.last_runs = {}
+        self._stats_lock = threading.Lock()
+        # Manual triggers run here, outside the request (and independent of leadership)
+        self._manual_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='manual-run')
 
     def init_app(self, app):
+        """
+        Every process registers the jobs, but the scheduler starts paused:
+        only the elected leader (see LeaderElection) resumes it, so each job
+        runs once per deployment however many workers there are.
+        """
+        from app.services.leader_service import scheduler_leader
+
         self.app = app
-        self.add_jobs()
 
         if not self.scheduler.running:
-            self.scheduler.start()
-            logger.info("✅ Scheduler started successfully")
+            # A standby taking over shortly after a job was due still runs it
+            self.scheduler.configure(job_defaults={
+                'misfire_grace_time': 2 * app.config['SCHEDULER_LEADER_TTL'],
+                'coalesce': True
+            })
+
+        if app.config['SCHEDULER_MODE'] == 'bucketed':
+            self.add_bucketed_jobs()
+        else:
+            self.add_jobs()
+
+        self.scheduler.add_job(
+            func=self.resume_stale_runs,
+            trigger=IntervalTrigger(minutes=1),
+            id='resume_stale_runs',
+            name='Resume interrupted runs (every minute)',
+            max_instances=1,
+            replace_existing=True
+        )
+
+        if not self.scheduler.running:
+            self.scheduler.start(paused=True)
+            logger.info("✅ Scheduler started (paused until elected leader)")
+
+        scheduler_leader.init_app(app, on_elected=self.scheduler.resume, on_demoted=self.scheduler.pause)
 
     def add_jobs(self):
         # Morning Plans
@@ -38,166 +107,693 @@ class SchedulerService:
             replace_existing=True
         )
 
-        logger.info("✅ All scheduled jobs added")
+        # Model warm-up shortly before each burst
+        lead = self.app.config['OLLAMA_WARMUP_LEAD_MINUTES']
+        for job_id, (hour, minute) in (('warm_up_morning', (6, 0)), ('warm_up_evening', (20, 0))):
+            warm_hour, warm_minute = divmod((hour * 60 + minute - lead) % (24 * 60), 60)
+            self.scheduler.add_job(
+                func=self.warm_up_model,
+                trigger=CronTrigger(hour=warm_hour, minute=warm_minute),
+                id=job_id,
+                name=f'Warm up model ({warm_hour:02d}:{warm_minute:02d})',
+                replace_existing=True
+            )
 
-    def generate_morning_plans(self):
-        logger.info("🌅 Generating morning plans at 06:00")
+        logger.info("✅ All scheduled jobs added")
 
-        with self.app.app_context():
-            from app.models import User, MorningSession, JournalEntry
-            from app.services.ai_service import AIService
-            from app.services.weather_service import WeatherService
-            from app.extensions import db
+    def add_bucketed_jobs(self):
+        """
+        SCHEDULER_MODE=bucketed: one tick every SCHEDULER_BUCKET_MINUTES
+        generates artifacts for the users whose own morning_time/evening_time
+        (in their timezone) is SCHEDULER_LEAD_MINUTES ahead, spreading the
+        load over the day instead of two bursts.
+        """
+        bucket = self.app.config['SCHEDULER_BUCKET_MINUTES']
+        if bucket < 1 or 60 % bucket:
+            raise ValueError(f"SCHEDULER_BUCKET_MINUTES must divide 60, got {bucket}")
 
-            users = User.query.all()
-            logger.info(f"Processing morning plans for {len(users)} users")
-
-            success_count = 0
-            error_count = 0
-
-            for user in users:
-                try:
-                    today = date.today()
-
-                    existing = MorningSession.query.filter_by(
-                        user_id=user.id,
-                        date=today
-                    ).first()
-
-                    if existing:
-                        logger.info(f"User {user.username}: Plan already exists, skipping")
-                        continue
-
-                    weather_info, weather_error = WeatherService.get_weather(user.city)
-                    weather_string = WeatherService.format_weather_string(weather_info) if weather_info else "Wetter nicht verfügbar"
-
-                    if weather_error:
-                        logger.warning(f"User {user.username}: Weather API error - {weather_error}")
-
-                    recent_entries = (JournalEntry.query
-                                      .filter_by(user_id=user.id)
-                                      .order_by(JournalEntry.date.desc())
-                                      .limit(3)
-                                      .all())
-
-                    last_entries_summary = None
-                    if recent_entries:
-                        entries_text = []
-                        for entry in recent_entries:
-                            mood_emoji = "😊" if entry.mood and entry.mood >= 4 else "😐" if entry.mood == 3 else "😔"
-                            entries_text.append(f"{entry.date.strftime('%d.%m.')}: {mood_emoji} Stimmung {entry.mood}/5")
-                        last_entries_summary = "\n".join(entries_text)
-
-                    # Use the latest what_to_improve as tomorrow plan input
-                    latest_entry = (JournalEntry.query
-                                    .filter_by(user_id=user.id)
-                                    .order_by(JournalEntry.date.desc())
-                                    .first())
-                    tomorrow_plan_text = latest_entry.what_to_improve if latest_entry and latest_entry.what_to_improve else None
-
-                    plan, error = AIService.generate_morning_plan(
-                        user_name=user.username,
-                        city=user.city,
-                        weather=weather_string,
-                        sleep_hours=user.sleep_goal_hours,
-                        last_entries=last_entries_summary,
-                        tomorrow_plan=tomorrow_plan_text
-                    )
-
-                    if error:
-                        logger.error(f"User {user.username}: Failed to generate plan - {error}")
-                        error_count += 1
-                        continue
-
-                    if not plan:
-                        logger.error(f"User {user.username}: AI returned empty plan")
-                        error_count += 1
-                        continue
-
-                    session = MorningSession(
-                        user_id=user.id,
-                        date=today,
-                        plan_text=plan,
-                        weather=weather_string,
-                        sleep_duration=user.sleep_goal_hours
-                    )
-                    db.session.add(session)
-                    db.session.commit()
-
-                    success_count += 1
-                    logger.info(f"✅ User {user.username}: Morning plan generated")
-
-                except Exception as e:
-                    logger.error(f"User {user.username}: Morning plan generation error - {str(e)}")
-                    db.session.rollback()
-                    error_count += 1
-                    continue
-
-            logger.info(f"Morning plans generation completed: {success_count} success, {error_count} errors")
-
-    def prepare_evening_data(self):
-        logger.info("🌙 Preparing evening reflection data at 20:00")
+        self.scheduler.add_job(
+            func=self.run_due_users,
+            trigger=CronTrigger(minute=f'*/{bucket}'),
+            id='run_due_users',
+            name=f'Generate due morning plans / evening prompts (every {bucket} min)',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
 
+        logger.info(f"✅ Bucketed scheduler job added ({bucket} min buckets)")
+
+    def run_due_users(self, now=None):
+        """
+        Handle every user due in [cursor, now + bucket). The cursor lives in
+        the job ledger and only moves once the bucket's runs have started,
+        so a tick that was skipped or blocked (previous run still in
+        progress, leader failover) is picked up by the next one, looking
+        back at most MAX_CATCH_UP. Users re-selected that way already have
+        their plan and are skipped cheaply.
+        """
+        from app.services.job_ledger import JobLedger
+
+        bucket_minutes = self.app.config['SCHEDULER_BUCKET_MINUTES']
+        bucket = timedelta(minutes=bucket_minutes)
+        now = now or datetime.now(timezone.utc)
+        window_end = now.replace(minute=now.minute - now.minute % bucket_minutes, second=0, microsecond=0) + bucket
+
+        cursor = JobLedger.bucket_cursor(self.app)
+        window_start = cursor or window_end - bucket
+        window_start = max(window_start, window_end - MAX_CATCH_UP)
+        if window_start >= window_end:
+            return
+
+        morning_ids = self._due_user_ids('morning_time', window_start, window_end)
+        evening_ids = self._due_user_ids('evening_time', window_start, window_end)
+
+        if morning_ids or evening_ids:
+            logger.info(
+                f"Bucket {window_start:%H:%M}-{window_end:%H:%M} UTC: "
+                f"{len(morning_ids)} morning plans, {len(evening_ids)} evening prompts due"
+            )
+            self._ensure_model_loaded()
+
+        started = True
+        if morning_ids:
+            started = self.generate_morning_plans(morning_ids, job_name='morning_bucket') is not None and started
+        if evening_ids:
+            started = self.prepare_evening_data(evening_ids, job_name='evening_bucket') is not None and started
+
+        if not started:
+            logger.warning(f"Bucket {window_start:%H:%M}-{window_end:%H:%M} UTC: a run was blocked, retrying next tick")
+            if cursor is None:
+                # First tick: pin the window start so the next tick covers this bucket too
+                JobLedger.save_bucket_cursor(self.app, window_start)
+            return
+
+        JobLedger.save_bucket_cursor(self.app, window_end)
+
+    def _due_user_ids(self, time_column, window_start, window_end):
+        """Users whose local `time_column` minus the lead lies in [window_start, window_end)."""
         with self.app.app_context():
-            from app.models import User, MorningSession, EveningPrompt
-            from app.services.ai_service import AIService
+            from sqlalchemy import and_, func, or_
+            from app.models import User, UserSettings
             from app.extensions import db
 
-            users = User.query.all()
-            logger.info(f"Preparing evening data for {len(users)} users")
-
-            success_count = 0
+            config = self.app.config
+            default_zone = get_zone(config['SCHEDULER_DEFAULT_TIMEZONE'], timezone.utc)
+            lead = config['SCHEDULER_LEAD_MINUTES']
+            window_minutes = int((window_end - window_start).total_seconds() // 60)
+
+            column = getattr(UserSettings, time_column)
+            default_time = column.default.arg
+            local_time = func.coalesce(column, default_time)
+            zone_name = func.coalesce(UserSettings.timezone, '')
+
+            combos = (self._active_only(db.session.query(zone_name, local_time)
+                                        .select_from(User)
+                                        .outerjoin(UserSettings, UserSettings.user_id == User.id))
+                      .distinct()
+                      .all())
+
+            # Few distinct (timezone, time) pairs: decide in Python, then select their users
+            due = []
+            for tz_name, value in combos:
+                target = parse_hhmm(value)
+                if target is None:
+                    target = parse_hhmm(default_time)
+                zone = get_zone(tz_name, default_zone)
+                if is_due(target, lead, window_start.astimezone(zone), window_minutes):
+                    due.append(and_(zone_name == tz_name, local_time == value))
+
+            if not due:
+                return []
+
+            return [row.id for row in (self._active_only(User.query.with_entities(User.id))
+                                       .outerjoin(UserSettings, UserSettings.user_id == User.id)
+                                       .filter(or_(*due))
+                                       .all())]
+
+    def _ensure_model_loaded(self):
+        from app.services.ai_service import ollama_client
+
+        if not ollama_client.is_model_resident():
+            ollama_client.warm_up()
+
+    def warm_up_model(self):
+        from app.services.ai_service import ollama_client
+
+        logger.info("🔥 Warming up Ollama model before scheduled run")
+        ollama_client.warm_up()
+
+    def start_manual_run(self, kind):
+        """
+        Open a ledger run for all users and execute it in the background.
+        Returns the run id; raises RunInProgress if the job is already running.
+        """
+        from app.services.job_ledger import JobLedger
+        from app.services.leader_service import scheduler_leader
+
+        job_name, job = {
+            'morning': ('generate_morning_plans', self.generate_morning_plans),
+            'evening': ('prepare_evening_data', self.prepare_evening_data)
+        }[kind]
+
+        ledger = JobLedger.start(self.app, job_name, kind, None, self._count_users(), scheduler_leader.identity)
+        self._manual_executor.submit(self._run_manual, job, job_name, ledger)
+        return ledger.run_id
+
+    def _run_manual(self, job, job_name, ledger):
+        try:
+            job(job_name=job_name, ledger=ledger)
+        except Exception as e:
+            logger.error(f"Manual {job_name} run {ledger.run_id} failed - {str(e)}")
+            # No-op if the batch already recorded the failure
+            ledger.finish('failed', error=str(e))
+
+    def generate_morning_plans(self, user_ids=None, job_name='generate_morning_plans', ledger=None):
+        if user_ids is None and ledger is None:
+            logger.info("🌅 Generating morning plans at 06:00")
+
+        from app.models import MorningSession
+
+        weather_totals = {}
+        writer = self._writer(MorningSession)
+
+        def prepare_chunk(chunk):
+            days = self._local_days(chunk)
+            contexts = self._load_contexts('load_morning_contexts', days)
+            # Weather for this chunk's places only; later chunks mostly hit the cache
+            weather_by_place, weather_stats = self._prefetch_weather(
+                {(context['city'], context['city_id']) for context in contexts.values() if not context['has_plan']}
+            )
+            merge_counts(weather_totals, weather_stats)
+            return {'weather_by_place': weather_by_place, 'contexts': contexts, 'days': days, 'writer': writer}
+
+        try:
+            stats = self._run_batch(
+                job_name, 'morning', user_ids, self._generate_morning_plan_for_user,
+                prepare_chunk=prepare_chunk, writer=writer, ledger=ledger
+            )
+        finally:
+            writes = writer.close()
+        if stats is None:
+            return
+        with self._stats_lock:
+            stats['weather'] = weather_totals
+            stats['writes'] = writes
+
+        logger.info(
+            f"Morning plans generation completed: {stats['success']} success, "
+            f"{stats['skipped']} skipped, {stats['errors']} errors "
+            f"in {stats['duration_s']}s ({stats['users_per_minute']} users/min); "
+            f"weather for {weather_totals.get('fetched', 0)}/{weather_totals.get('distinct_places', 0)} places "
+            f"in {weather_totals.get('duration_s', 0)}s; "
+            f"{writes['rows']} plans saved in {writes['flushes']} commits, {writes['conflicts']} already existed, {writes['failed_rows']} failed"
+        )
+        return stats
+
+    def prepare_evening_data(self, user_ids=None, job_name='prepare_evening_data', ledger=None):
+        if user_ids is None and ledger is None:
+            logger.info("🌙 Preparing evening reflection data at 20:00")
+
+        from app.models import EveningPrompt
+
+        writer = self._writer(EveningPrompt)
+
+        def prepare_chunk(chunk):
+            days = self._local_days(chunk)
+            return {'contexts': self._load_contexts('load_evening_contexts', days), 'days': days, 'writer': writer}
+
+        try:
+            stats = self._run_batch(
+                job_name, 'evening', user_ids, self._prepare_evening_prompt_for_user,
+                prepare_chunk=prepare_chunk, writer=writer, ledger=ledger
+            )
+        finally:
+            writes = writer.close()
+        if stats is None:
+            return
+        with self._stats_lock:
+            stats['writes'] = writes
+
+        logger.info(
+            f"Evening data preparation completed: {stats['success']} prompts created, "
+            f"{stats['skipped']} skipped, {stats['errors']} errors "
+            f"in {stats['duration_s']}s ({stats['users_per_minute']} users/min); "
+            f"{writes['rows']} saved in {writes['flushes']} commits, {writes['conflicts']} already existed, {writes['failed_rows']} failed"
+        )
+        return stats
+
+    def _writer(self, model):
+        from app.services.write_behind import WriteBehindBuffer
+
+        return WriteBehindBuffer(
+            self.app,
+            model,
+            batch_size=self.app.config['SCHEDULER_WRITE_BATCH_SIZE'],
+            max_delay=self.app.config['SCHEDULER_WRITE_MAX_DELAY'],
+            # A plan created meanwhile by /today wins
+            ignore_conflicts=True
+        )
 
-            for user in users:
-                try:
-                    today = date.today()
+    def _active_only(self, query):
+        """
+        Restrict a query over User to users active within SCHEDULER_ACTIVE_DAYS
+        (0 = everyone). Dormant users get their plan lazily on their next /today.
+        """
+        from app.models import User
 
-                    existing = EveningPrompt.query.filter_by(
-                        user_id=user.id,
-                        date=today
-                    ).first()
+        days = self.app.config['SCHEDULER_ACTIVE_DAYS']
+        if days <= 0:
+            return query
+        return query.filter(User.last_active_at >= datetime.utcnow() - timedelta(days=days))
 
-                    if existing:
-                        logger.info(f"User {user.username}: Evening prompt already exists")
-                        continue
+    def _count_users(self):
+        with self.app.app_context():
+            from app.models import User
+
+            active = self._active_only(User.query).count()
+            if self.app.config['SCHEDULER_ACTIVE_DAYS'] > 0:
+                logger.info(
+                    f"{active} of {User.query.count()} users active in the last "
+                    f"{self.app.config['SCHEDULER_ACTIVE_DAYS']} days, dormant users are skipped"
+                )
+            return active
+
+    def _user_id_chunks(self, user_ids=None, after=None):
+        """
+        Yield user ids in chunks of SCHEDULER_CHUNK_SIZE, in id order and
+        starting after the `after` checkpoint. Without an explicit list, users
+        are read with keyset pagination (id > last id), each page in its own
+        app context, so memory stays flat however many users exist.
+        """
+        chunk_size = max(1, self.app.config['SCHEDULER_CHUNK_SIZE'])
+
+        if user_ids is not None:
+            user_ids = sorted(user_id for user_id in user_ids if after is None or user_id > after)
+            for i in range(0, len(user_ids), chunk_size):
+                yield user_ids[i:i + chunk_size]
+            return
+
+        from app.models import User
+
+        last_id = after
+        while True:
+            with self.app.app_context():
+                query = self._active_only(User.query.with_entities(User.id)).order_by(User.id)
+                if last_id is not None:
+                    query = query.filter(User.id > last_id)
+                chunk = [row.id for row in query.limit(chunk_size)]
+
+            if not chunk:
+                return
+
+            yield chunk
+            last_id = chunk[-1]
+
+    def _local_days(self, user_ids):
+        """
+        {user_id: today in the user's timezone} (see User.local_today): a
+        bucketed run fires at the user's local time, so its artifact must
+        carry the date /today will look it up by, not the server's.
+        """
+        from app.extensions import db
+        from app.models import User, UserSettings
 
-                    morning_session = MorningSession.query.filter_by(
-                        user_id=user.id,
-                        date=today
-                    ).first()
+        with self.app.app_context():
+            try:
+                rows = (db.session.query(User.id, UserSettings.timezone)
+                        .outerjoin(UserSettings, UserSettings.user_id == User.id)
+                        .filter(User.id.in_(user_ids))
+                        .all())
+            finally:
+                db.session.remove()
+
+        fallback = default_zone(self.app.config)
+        now = datetime.now(timezone.utc)
+        return {user_id: local_date(get_zone(tz_name, fallback), now) for user_id, tz_name in rows}
+
+    def _load_contexts(self, loader, days):
+        """Per-user context records for a chunk, loaded per local date; see BatchContextService."""
+        from app.extensions import db
+        from app.services.batch_context_service import BatchContextService
+
+        by_day = {}
+        for user_id, day in days.items():
+            by_day.setdefault(day, []).append(user_id)
+
+        contexts = {}
+        with self.app.app_context():
+            try:
+                for day, user_ids in by_day.items():
+                    contexts.update(getattr(BatchContextService, loader)(user_ids, day))
+            finally:
+                db.session.remove()
+        return contexts
+
+    def _prefetch_weather(self, places):
+        """Distinct (city, city_id) places fetched concurrently before the per-user loop."""
+        with self.app.app_context():
+            from app.services.weather_service import WeatherService
 
-                    today_plan = morning_session.plan_text if morning_session else None
+            return WeatherService.prefetch(places, self.app.config['WEATHER_PREFETCH_WORKERS'])
+
+    def _run_batch(self, job_name, kind, user_ids, func, prepare_chunk=None, writer=None, ledger=None):
+        """
+        Run `func(user_id, **kwargs)` for the given users (all users if None),
+        chunk by chunk, serially or across SCHEDULER_WORKERS threads.
+        `prepare_chunk(chunk)` returns the kwargs for that chunk. Each call
+        gets its own app context and therefore its own scoped DB session.
+
+        Progress goes to the run ledger (job_runs); after each chunk the
+        artifact `writer` is flushed and the chunk's last user id saved as
+        checkpoint. A user whose row went to the `writer` is recorded once
+        the writer reports the insert, as an error if it failed. Pass a
+        claimed `ledger` to resume a run after it.
+        """
+        from app.services.job_ledger import JobLedger, RunInProgress
+        from app.services.leader_service import scheduler_leader
+
+        workers = max(1, self.app.config['SCHEDULER_WORKERS'])
+        if ledger is None:
+            total = len(user_ids) if user_ids is not None else self._count_users()
+            try:
+                ledger = JobLedger.start(self.app, job_name, kind, user_ids, total, scheduler_leader.identity)
+            except RunInProgress as e:
+                logger.warning(f"{job_name}: not started, run {e.run_id} is still in progress")
+                return None
+
+        user_ids = ledger.user_ids
+        if ledger.checkpoint is None and not ledger.processed:
+            logger.info(f"{job_name}: processing {ledger.total} users (run {ledger.run_id})")
+        else:
+            logger.info(
+                f"{job_name}: resuming run {ledger.run_id} after {ledger.checkpoint}, "
+                f"{ledger.processed}/{ledger.total} users done"
+            )
+
+        total = ledger.total
+        processed_before = ledger.processed
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        chunks = 0
+
+        user_started = {}
+
+        def run_one(user_id, kwargs):
+            user_started[user_id] = time.monotonic()
+            outcome, error = self._run_for_user(func, user_id, **kwargs)
+            if outcome == SUCCESS and writer is not None:
+                # Only queued: recorded by on_written once the row is committed
+                return
+            ledger.record(user_id, outcome, error, (time.monotonic() - user_started.pop(user_id)) * 1000)
+
+        def on_written(values, error):
+            user_id = values['user_id']
+            latency_ms = (time.monotonic() - user_started.pop(user_id, started)) * 1000
+            ledger.record(user_id, ERROR if error else SUCCESS, f"Save failed - {error}" if error else None, latency_ms)
+
+        if writer is not None:
+            writer.on_result = on_written
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=job_name) if workers > 1 else None
+        try:
+            for chunk in self._user_id_chunks(user_ids, after=ledger.checkpoint):
+                kwargs = prepare_chunk(chunk) if prepare_chunk else {}
+
+                if executor is None:
+                    for user_id in chunk:
+                        run_one(user_id, kwargs)
+                else:
+                    # list() re-raises nothing: run_one never raises
+                    list(executor.map(lambda user_id: run_one(user_id, kwargs), chunk))
+
+                # Artifacts first: a checkpoint must never cover unsaved plans
+                if writer is not None:
+                    writer.flush()
+                ledger.save_checkpoint(chunk[-1])
+
+                chunks += 1
+                counts = ledger.counts
+                logger.info(
+                    f"{job_name}: chunk {chunks} done, {ledger.processed}/{total} users "
+                    f"({counts[SUCCESS]} success, {counts[SKIPPED]} skipped, {counts[ERROR]} errors, "
+                    f"{time.monotonic() - started:.1f}s)"
+                )
+
+                if ledger.lost:
+                    break
+        except Exception as e:
+            ledger.finish('failed', error=str(e))
+            raise
+        else:
+            ledger.finish('done')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        duration = time.monotonic() - started
+        processed = ledger.processed - processed_before
+        counts = ledger.counts
+
+        stats = {
+            'run_id': ledger.run_id,
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'workers': workers,
+            'chunks': chunks,
+            'users': processed,
+            'success': counts[SUCCESS],
+            'skipped': counts[SKIPPED],
+            'errors': counts[ERROR],
+            'duration_s': round(duration, 2),
+            'users_per_minute': round(processed / duration * 60, 1) if duration > 0 else 0.0
+        }
+
+        with self._stats_lock:
+            self.last_runs[job_name] = stats
+
+        return stats
+
+    def resume_stale_runs(self):
+        """
+        Resume runs of today whose process died (heartbeat older than
+        SCHEDULER_RUN_STALE_AFTER) from their checkpoint; older ones are
+        marked abandoned. Runs on the leader every minute.
+        """
+        from app.extensions import db
+        from app.services.job_ledger import JobLedger
+        from app.services.leader_service import scheduler_leader
 
-                    prompt, error = AIService.generate_evening_reflection_prompt(
-                        user_name=user.username,
-                        today_plan=today_plan
-                    )
+        with self.app.app_context():
+            stale = [(run.id, run.job_name, run.kind, run.day) for run in
+                     JobLedger.stale_runs(self.app.config['SCHEDULER_RUN_STALE_AFTER'])]
+            for run_id, _, _, day in stale:
+                if day != date.today():
+                    JobLedger.abandon(run_id)
+            db.session.remove()
+
+        for run_id, job_name, kind, day in stale:
+            if day != date.today():
+                logger.warning(f"{job_name}: run {run_id} from {day} abandoned")
+                continue
+
+            ledger = JobLedger.claim(self.app, run_id, scheduler_leader.identity)
+            if ledger is None:
+                continue
+
+            if kind == 'morning':
+                self.generate_morning_plans(job_name=job_name, ledger=ledger)
+            else:
+                self.prepare_evening_data(job_name=job_name, ledger=ledger)
+
+    def _run_for_user(self, func, user_id, **kwargs):
+        """Returns (outcome, error text)."""
+        from app.extensions import db
+
+        with self.app.app_context(), bind_log_context(user_id=user_id, job=func.__name__):
+            try:
+                return func(user_id, **kwargs), None
+            except Exception as e:
+                logger.error(f"User {user_id}: {func.__name__} error - {str(e)}")
+                db.session.rollback()
+                return ERROR, str(e)
+            finally:
+                db.session.remove()
+
+    def _generate_morning_plan_for_user(self, user_id, weather_by_place=None, contexts=None, days=None, writer=None):
+        from app.models import MorningSession
+        from app.services.ai_service import AIService
+        from app.services.batch_context_service import BatchContextService
+        from app.services.weather_service import WeatherService
+        from app.services.lease_service import GenerationLeaseService
+        from app.utils.mood import mood_emoji
+
+        if days is None:
+            days = self._local_days([user_id])
+        today = days.get(user_id)
+        if today is None:
+            return SKIPPED
+        if contexts is None:
+            contexts = BatchContextService.load_morning_contexts([user_id], today)
+
+        context = contexts.get(user_id)
+        if not context:
+            return SKIPPED
+
+        username = context['username']
+
+        # Loaded with the chunk; the lease below re-checks before generating
+        if context['has_plan']:
+            logger.info(f"User {username}: Plan already exists, skipping")
+            return SKIPPED
+
+        failed = []
+
+        def find_existing():
+            return MorningSession.query.filter_by(
+                user_id=user_id,
+                date=today
+            ).first()
+
+        def generate(lease_owner=None):
+            # Prefetched by the batch (None = failed there, don't retry per user);
+            # places of users added since then fall back to a direct lookup
+            place_key, _ = WeatherService.resolve_place(context['city'], context['city_id'])
+            if weather_by_place is not None and place_key in weather_by_place:
+                weather_info = weather_by_place[place_key]
+                weather_error = None if weather_info else "Weather unavailable (prefetch failed)"
+            else:
+                weather_info, weather_error = WeatherService.get_weather(context['city'], city_id=context['city_id'])
+            weather_string = WeatherService.format_weather_string(weather_info) if weather_info else "Wetter nicht verfügbar"
+
+            if weather_error:
+                logger.warning(f"User {username}: Weather API error - {weather_error}")
+
+            last_entries_summary = None
+            if context['recent_moods']:
+                last_entries_summary = "\n".join(
+                    f"{entry_date.strftime('%d.%m.')}: {mood_emoji(mood)} Stimmung {mood}"
+                    for entry_date, mood in context['recent_moods']
+                )
+
+            plan, error = AIService.generate_morning_plan(
+                user_name=username,
+                city=context['city'],
+                weather=weather_string,
+                sleep_hours=context['sleep_goal_hours'],
+                last_entries=last_entries_summary,
+                # The latest what_to_improve as tomorrow plan input
+                tomorrow_plan=context['tomorrow_plan']
+            )
+
+            if error:
+                failed.append(f"Failed to generate plan - {error}")
+                return None
+
+            if not plan:
+                failed.append("AI returned empty plan")
+                return None
+
+            values = dict(
+                user_id=user_id,
+                date=today,
+                plan_text=plan,
+                weather=weather_string,
+                sleep_duration=context['sleep_goal_hours']
+            )
+            return self._save(MorningSession, values, writer, lease_owner)
+
+        # Another worker/request may be generating this plan already
+        session, generated = GenerationLeaseService.single_flight(
+            user_id, today, 'morning_plan', find_existing, generate, wait_timeout=0, hand_off=writer is not None
+        )
 
-                    if error:
-                        prompt = f"Hallo {user.username}! 🌙 Wie war dein Tag heute? Zeit für eine kurze Reflexion!"
+        if failed:
+            raise UserJobError(failed[0])
+
+        if not generated:
+            logger.info(f"User {username}: Plan already exists or is being generated, skipping")
+            return SKIPPED
+
+        logger.info(f"✅ User {username}: Morning plan generated")
+        return SUCCESS
+
+    def _prepare_evening_prompt_for_user(self, user_id, contexts=None, days=None, writer=None):
+        from app.models import EveningPrompt
+        from app.services.ai_service import AIService
+        from app.services.batch_context_service import BatchContextService
+        from app.services.lease_service import GenerationLeaseService
+
+        if days is None:
+            days = self._local_days([user_id])
+        today = days.get(user_id)
+        if today is None:
+            return SKIPPED
+        if contexts is None:
+            contexts = BatchContextService.load_evening_contexts([user_id], today)
+
+        context = contexts.get(user_id)
+        if not context:
+            return SKIPPED
+
+        username = context['username']
+
+        if context['has_prompt']:
+            logger.info(f"User {username}: Evening prompt already exists")
+            return SKIPPED
+
+        def find_existing():
+            return EveningPrompt.query.filter_by(
+                user_id=user_id,
+                date=today
+            ).first()
+
+        def generate(lease_owner=None):
+            prompt, error = AIService.generate_evening_reflection_prompt(
+                user_name=username,
+                today_plan=context['today_plan']
+            )
+
+            if error:
+                prompt = f"Hallo {username}! 🌙 Wie war dein Tag heute? Zeit für eine kurze Reflexion!"
+
+            values = dict(
+                user_id=user_id,
+                date=today,
+                prompt_text=prompt
+            )
+            return self._save(EveningPrompt, values, writer, lease_owner)
+
+        evening_prompt, generated = GenerationLeaseService.single_flight(
+            user_id, today, 'evening_prompt', find_existing, generate, wait_timeout=0, hand_off=writer is not None
+        )
 
-                    evening_prompt = EveningPrompt(
-                        user_id=user.id,
-                        date=today,
-                        prompt_text=prompt
-                    )
-                    db.session.add(evening_prompt)
-                    db.session.commit()
+        if not generated:
+            logger.info(f"User {username}: Evening prompt already exists or is being generated")
+            return SKIPPED
 
-                    success_count += 1
-                    logger.info(f"✅ User {user.username}: Evening prompt prepared")
+        logger.info(f"✅ User {username}: Evening prompt prepared")
+        return SUCCESS
 
-                except Exception as e:
-                    logger.error(f"User {user.username}: Evening data preparation error - {str(e)}")
-                    db.session.rollback()
-                    continue
+    @staticmethod
+    def _save(model, values, writer, lease_owner):
+        """Hand the row to the run's write-behind buffer (which releases the lease), or commit it now."""
+        if writer is not None:
+            writer.add(values, lease_owner=lease_owner)
+            return values
 
-            logger.info(f"Evening data preparation completed: {success_count} prompts created")
+        values = dict(values)
+        artifact, _ = model.insert_if_absent(values.pop('user_id'), values.pop('date'), **values)
+        return artifact
 
     def shutdown(self):
+        from app.services.leader_service import scheduler_leader
+
+        scheduler_leader.stop()
+        self._manual_executor.shutdown(wait=False)
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Scheduler shut down")
 
 
-scheduler_service = SchedulerService()
\ No newline at end of file
+scheduler_service = SchedulerService()
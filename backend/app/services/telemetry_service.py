@@ -0,0 +1,148 @@
+from collections import deque
+from datetime import datetime, timezone
+import bisect
+import threading
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000, 120000)
+
+# Durations Ollama reports (nanoseconds) that we aggregate, besides wall time
+DURATION_FIELDS = ('total_duration', 'load_duration', 'prompt_eval_duration', 'eval_duration')
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile."""
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS + (None,), self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, round(self.max, 1)) if bound is not None else round(self.max, 1)
+        return round(self.max, 1)
+
+    def to_dict(self):
+        labels = [f"le_{bound}" for bound in LATENCY_BUCKETS_MS] + ["gt_" + str(LATENCY_BUCKETS_MS[-1])]
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count, 1) if self.count else None,
+            'max_ms': round(self.max, 1),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+class _KindStats:
+    def __init__(self):
+        self.outcomes = {}
+        self.wall = _Histogram()
+        self.durations = {field: _Histogram() for field in DURATION_FIELDS}
+        self.prompt_tokens = 0
+        self.eval_tokens = 0
+        self.eval_seconds = 0.0
+        self.last_tokens_per_sec = None
+
+    def observe(self, record):
+        self.outcomes[record['outcome']] = self.outcomes.get(record['outcome'], 0) + 1
+        self.wall.observe(record['wall_ms'])
+
+        for field in DURATION_FIELDS:
+            if record.get(field) is not None:
+                self.durations[field].observe(record[field])
+
+        if record.get('prompt_eval_count'):
+            self.prompt_tokens += record['prompt_eval_count']
+        if record.get('eval_count') and record.get('eval_duration'):
+            self.eval_tokens += record['eval_count']
+            self.eval_seconds += record['eval_duration'] / 1000
+            self.last_tokens_per_sec = record['tokens_per_sec']
+
+    def to_dict(self):
+        generated = self.durations['eval_duration'].count
+        return {
+            'outcomes': dict(self.outcomes),
+            'wall': self.wall.to_dict(),
+            **{field: hist.to_dict() for field, hist in self.durations.items()},
+            'tokens_per_sec': {
+                'last': self.last_tokens_per_sec,
+                'avg': round(self.eval_tokens / self.eval_seconds, 2) if self.eval_seconds else None
+            },
+            'avg_prompt_tokens': round(self.prompt_tokens / generated, 1) if generated else None,
+            'avg_eval_tokens': round(self.eval_tokens / generated, 1) if generated else None
+        }
+
+
+class GenerationTelemetry:
+    """
+    Per-generation performance records taken from Ollama's response
+    (eval_count, eval_duration, prompt_eval_count, load_duration,
+    total_duration) plus wall time, prompt kind and outcome.
+    Keeps the last `max_records` raw records and running per-kind aggregates.
+    """
+
+    def __init__(self, max_records=500):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self._kinds = {}
+
+    def record(self, kind, outcome, wall_seconds, data=None, stream=False):
+        data = data or {}
+        record = {
+            'at': datetime.now(timezone.utc).isoformat(),
+            'kind': kind or 'other',
+            'outcome': outcome,
+            'stream': stream,
+            'wall_ms': round(wall_seconds * 1000, 1),
+            'prompt_eval_count': data.get('prompt_eval_count'),
+            'eval_count': data.get('eval_count'),
+            'time_to_first_chunk_ms': data.get('time_to_first_chunk_ms'),
+            'tokens_per_sec': None
+        }
+
+        for field in DURATION_FIELDS:
+            # ns -> ms
+            record[field] = round(data[field] / 1e6, 1) if data.get(field) is not None else None
+
+        if record['eval_count'] and record['eval_duration']:
+            record['tokens_per_sec'] = round(record['eval_count'] / (record['eval_duration'] / 1000), 2)
+
+        with self._lock:
+            self._records.append(record)
+            self._kinds.setdefault(record['kind'], _KindStats()).observe(record)
+
+        return record
+
+    def summary(self, kind=None):
+        with self._lock:
+            if kind:
+                stats = self._kinds.get(kind)
+                return {kind: stats.to_dict()} if stats else {}
+            return {name: stats.to_dict() for name, stats in self._kinds.items()}
+
+    def recent(self, limit=20, kind=None):
+        with self._lock:
+            records = [r for r in self._records if not kind or r['kind'] == kind]
+        return records[-limit:] if limit > 0 else []
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._kinds.clear()
+
+
+generation_telemetry = GenerationTelemetry()
@@ -0,0 +1,204 @@
+import json
+import re
+import time
+import threading
+import unicodedata
+import logging
+
+from sqlalchemy import insert, update, delete
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWeatherBackend:
+    """Per-process dict; fine for a single worker or as a fallback."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, data, fetched_at):
+        with self._lock:
+            self._entries[key] = (data, fetched_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DatabaseWeatherBackend:
+    """
+    Rows in the weather_cache table, shared by every worker using the app
+    database. Uses its own connection so it never commits the caller's session.
+    """
+
+    @staticmethod
+    def _table():
+        from app.models import WeatherCacheEntry
+        return WeatherCacheEntry.__table__
+
+    def get(self, key):
+        from app.extensions import db
+
+        table = self._table()
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                table.select().where(table.c.city_key == key)
+            ).first()
+        return (json.loads(row.data), row.fetched_at) if row else None
+
+    def set(self, key, data, fetched_at):
+        from app.extensions import db
+
+        table = self._table()
+        values = {'data': json.dumps(data, ensure_ascii=False), 'fetched_at': fetched_at}
+
+        with db.engine.begin() as conn:
+            result = conn.execute(update(table).where(table.c.city_key == key).values(**values))
+            if result.rowcount:
+                return
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table).values(city_key=key, **values))
+        except IntegrityError:
+            # Another worker inserted the same city in between
+            with db.engine.begin() as conn:
+                conn.execute(update(table).where(table.c.city_key == key).values(**values))
+
+    def clear(self):
+        from app.extensions import db
+
+        with db.engine.begin() as conn:
+            conn.execute(delete(self._table()))
+
+
+BACKENDS = {
+    'memory': MemoryWeatherBackend,
+    'database': DatabaseWeatherBackend,
+}
+
+
+class WeatherCache:
+    """
+    Weather readings keyed by place (canonical city id, or the normalized
+    free text for unknown cities) with a TTL, so users in the same place
+    share one OpenWeatherMap request. The backend is chosen by
+    WEATHER_CACHE_BACKEND (memory | database | none).
+    Readings older than the TTL stay available as last-known-good values for
+    `max_stale` seconds, see WeatherService.get_weather.
+    """
+
+    def __init__(self):
+        self.ttl = 900
+        self.max_stale = 21600
+        self.backend = MemoryWeatherBackend()
+        self._lock = threading.Lock()
+        self._city_locks = {}
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'stores': 0,
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'errors': 0
+        }
+
+    def init_app(self, app):
+        self.ttl = app.config['WEATHER_CACHE_TTL']
+        self.max_stale = max(app.config['WEATHER_CACHE_MAX_STALE'], self.ttl)
+        name = app.config['WEATHER_CACHE_BACKEND']
+
+        if name == 'none' or self.ttl <= 0:
+            self.backend = None
+        elif name in BACKENDS:
+            self.backend = BACKENDS[name]()
+        else:
+            raise ValueError(f"Unknown WEATHER_CACHE_BACKEND: {name}")
+
+    @staticmethod
+    def normalize_city(city):
+        """Key for cities the gazetteer does not know: '  Foo  Bar ' and 'foo bar' share one entry."""
+        city = unicodedata.normalize('NFKC', city or '')
+        return re.sub(r'\s+', ' ', city).strip().casefold()
+
+    def lock_for(self, key):
+        """Per-place lock so concurrent misses in this process fetch only once."""
+        with self._lock:
+            return self._city_locks.setdefault(key, threading.Lock())
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def lookup(self, key, record=True):
+        """
+        (weather_info, age_s) of the last reading for the place, or None when
+        there is none younger than max_stale. The caller checks is_fresh(age_s).
+        """
+        if self.backend is None:
+            return None
+
+        try:
+            entry = self.backend.get(key)
+        except SQLAlchemyError as e:
+            logger.warning(f"Weather cache read failed: {str(e)}")
+            self._count('errors')
+            entry = None
+
+        age = time.time() - entry[1] if entry else None
+
+        if entry is None or age >= self.max_stale:
+            if record:
+                self._count('misses')
+            return None
+
+        if record:
+            self._count('hits' if self.is_fresh(age) else 'stale_hits')
+        return entry[0], age
+
+    def is_fresh(self, age):
+        return age < self.ttl
+
+    def set(self, key, weather_info):
+        if self.backend is None:
+            return
+
+        try:
+            self.backend.set(key, weather_info, time.time())
+            self._count('stores')
+        except SQLAlchemyError as e:
+            logger.warning(f"Weather cache write failed: {str(e)}")
+            self._count('errors')
+
+    def record_bypass(self):
+        self._count('bypassed')
+
+    def record_refresh(self, ok):
+        self._count('refreshes' if ok else 'refresh_failures')
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        stats['backend'] = next(
+            (name for name, cls in BACKENDS.items() if isinstance(self.backend, cls)), 'none'
+        )
+        stats['ttl_s'] = self.ttl
+        stats['max_stale_s'] = self.max_stale
+        return stats
+
+
+weather_cache = WeatherCache()
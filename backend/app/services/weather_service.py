@@ -1,25 +1,213 @@
 import requests
 import os
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app.services.circuit_breaker import weather_breaker
+from app.services.weather_cache import weather_cache
+from app.services.city_service import city_index
+
+logger = logging.getLogger(__name__)
 
 
 class WeatherService:
+    api_key = os.getenv('OPENWEATHERMAP_API_KEY', '')
+    base_url = os.getenv('OPENWEATHERMAP_BASE_URL', 'https://api.openweathermap.org/data/2.5/weather')
+    timeout = 5
+
+    # Background stale-while-revalidate refreshes, at most one per place at a time
+    _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='weather-refresh')
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+
+    @classmethod
+    def init_app(cls, app):
+        cls.api_key = app.config['OPENWEATHERMAP_API_KEY']
+        cls.base_url = app.config['OPENWEATHERMAP_BASE_URL']
+        cls.timeout = app.config['OPENWEATHERMAP_TIMEOUT']
+
+    @staticmethod
+    def resolve_place(city, city_id=None):
+        """
+        (cache key, OpenWeatherMap location params) for a user's city.
+        Known places use their canonical id, so "Berlin", "berlin " and
+        "Berlin, DE" share one entry; unknown cities fall back to the
+        normalized free text.
+        """
+        place = city_index.get(city_id) if city_id else city_index.resolve(city)
+        if place is None:
+            return weather_cache.normalize_city(city), {'q': city}
+        if 'lat' in place:
+            return place['id'], {'lat': place['lat'], 'lon': place['lon']}
+        return place['id'], {'q': place['query']}
+
+    @staticmethod
+    def get_weather(city, use_cache=True, allow_stale=True, city_id=None):
+        """
+        Current weather for a city from the shared per-place cache.
+        Pass the user's stored city_id to skip resolving the free text.
+
+        Fresh readings are returned as is. An expired reading (younger than
+        WEATHER_CACHE_MAX_STALE) is returned immediately, flagged with
+        stale=True and its age_s, while a background refresh runs. Only
+        places without any usable reading wait for OpenWeatherMap.
+
+        use_cache=False (force regenerate) and allow_stale=False (batch
+        prefetch) fetch synchronously instead and fall back to the
+        last-known-good reading if the upstream call fails.
+        """
+        key, location = WeatherService.resolve_place(city, city_id)
+        cached = weather_cache.lookup(key, record=use_cache)
+
+        if not use_cache:
+            weather_cache.record_bypass()
+            return WeatherService._fetch_and_store(key, location, cached)
+
+        if cached is not None:
+            weather_info, age = cached
+            if weather_cache.is_fresh(age):
+                return WeatherService._annotate(weather_info, age), None
+            if allow_stale:
+                WeatherService._refresh_in_background(key, location)
+                return WeatherService._annotate(weather_info, age), None
+
+        with weather_cache.lock_for(key):
+            # Another thread may have fetched this place while we waited
+            latest = weather_cache.lookup(key, record=False)
+            if latest is not None and weather_cache.is_fresh(latest[1]):
+                return WeatherService._annotate(*latest), None
+
+            return WeatherService._fetch_and_store(key, location, latest or cached)
+
+    @staticmethod
+    def _annotate(weather_info, age):
+        return {**weather_info, 'stale': not weather_cache.is_fresh(age), 'age_s': int(age)}
+
+    @staticmethod
+    def _fetch_and_store(key, location, last_known=None):
+        weather_info, error = WeatherService.fetch_weather(location)
+        if weather_info:
+            weather_cache.set(key, weather_info)
+            return WeatherService._annotate(weather_info, 0), None
+
+        if last_known is not None:
+            logger.warning(f"Weather for {key!r}: {error}, serving last known reading")
+            return WeatherService._annotate(*last_known), None
+
+        return None, error
+
+    @staticmethod
+    def _refresh_in_background(key, location):
+        with WeatherService._refreshing_lock:
+            if key in WeatherService._refreshing:
+                return
+            WeatherService._refreshing.add(key)
+
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    weather_info, error = WeatherService.fetch_weather(location)
+                    if weather_info:
+                        weather_cache.set(key, weather_info)
+                    else:
+                        logger.warning(f"Background weather refresh for {key!r} failed: {error}")
+                    weather_cache.record_refresh(bool(weather_info))
+            finally:
+                with WeatherService._refreshing_lock:
+                    WeatherService._refreshing.discard(key)
+
+        WeatherService._refresh_executor.submit(refresh)
+
     @staticmethod
-    def get_weather(city):
+    def prefetch(places, max_workers=8):
+        """
+        Fetch several places concurrently (through the cache) before a batch
+        job. `places` are (city, city_id) pairs. Places that fail, or only got
+        a last-known-good reading, get one retry pass.
+        Returns ({place key: weather_info or None}, stats); None marks places
+        that failed even after the retry. Look users up with resolve_place(...)[0].
+        """
+        started = time.monotonic()
+        app = current_app._get_current_object()
+
+        # One request per distinct place
+        distinct = {}
+        for city, city_id in places:
+            if city and city.strip():
+                distinct.setdefault(WeatherService.resolve_place(city, city_id)[0], (city, city_id))
+
+        def fetch(place):
+            city, city_id = place
+            with app.app_context():
+                return WeatherService.get_weather(city, allow_stale=False, city_id=city_id)
+
+        def fetch_all(keys):
+            if not keys:
+                return {}
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys))),
+                                    thread_name_prefix='weather-prefetch') as executor:
+                return dict(zip(keys, executor.map(fetch, [distinct[key] for key in keys])))
+
+        results = fetch_all(list(distinct))
+        failed = [key for key, (weather_info, _) in results.items() if not weather_info or weather_info['stale']]
+
+        retried = fetch_all(failed)
+        results.update(retried)
+
+        weather_by_place = {key: weather_info for key, (weather_info, _) in results.items()}
+        errors = {key: error for key, (weather_info, error) in results.items() if not weather_info}
+
+        stats = {
+            'distinct_places': len(distinct),
+            'fetched': len(distinct) - len(errors),
+            'retried': len(failed),
+            'recovered_on_retry': sum(1 for weather_info, _ in retried.values() if weather_info and not weather_info['stale']),
+            'stale': sum(1 for weather_info in weather_by_place.values() if weather_info and weather_info['stale']),
+            'failed': len(errors),
+            'errors': sorted(set(errors.values()))[:5],
+            'duration_s': round(time.monotonic() - started, 2)
+        }
+        return weather_by_place, stats
+
+    @staticmethod
+    def fetch_weather(location):
+        """One OpenWeatherMap call; location is {'q': 'Berlin,DE'} or {'lat': .., 'lon': ..}."""
         try:
-            api_key = os.getenv('OPENWEATHERMAP_API_KEY', '')
+            api_key = WeatherService.api_key
             
             if not api_key:
                 return None, "Weather API key not configured"
+
+            # Fail fast while OpenWeatherMap is unhealthy
+            if not weather_breaker.allow():
+                return None, "Weather API unavailable"
             
-            url = 'https://api.openweathermap.org/data/2.5/weather'
+            url = WeatherService.base_url
             params = {
-                'q': city,
+                **location,
                 'appid': api_key,
                 'units': 'metric',  # Celsius
                 'lang': 'de'
             }
             
-            response = requests.get(url, params=params, timeout=5)
+            try:
+                response = requests.get(url, params=params, timeout=WeatherService.timeout)
+            except requests.exceptions.RequestException as e:
+                weather_breaker.record_failure(e)
+                raise
+
+            if response.status_code >= 500:
+                weather_breaker.record_failure(f"HTTP {response.status_code}")
+            else:
+                # 4xx (unknown city, bad key) is a healthy upstream answering
+                weather_breaker.record_success()
+
             response.raise_for_status()
             
             data = response.json()
@@ -49,7 +237,11 @@ class WeatherService:
         
         temp = weather_info['temperature']
         desc = weather_info['description']
-        
+
+        # Last-known-good reading while OpenWeatherMap is unavailable
+        if weather_info.get('stale'):
+            return f"{temp}°C, {desc} (Stand vor {max(1, weather_info['age_s'] // 60)} Min.)"
+
         return f"{temp}°C, {desc}"
     
     @staticmethod
@@ -0,0 +1,180 @@
+import threading
+import time
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.services.lease_service import GenerationLeaseService
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Collects rows generated by a batch job and bulk-inserts them, so a run
+    commits once per batch instead of once per user (one fsync each on
+    SQLite).
+
+    A batch is flushed when it reaches `batch_size` rows, when its oldest
+    row is `max_delay` seconds old (checked by a background thread) and on
+    close(). Each row may carry a generation lease owner: the lease is
+    released in the same transaction as the insert, so other callers keep
+    waiting until the row is visible. If a batch insert fails, its rows are
+    retried one transaction each, so one bad row does not drop its
+    neighbours.
+
+    With ignore_conflicts=True (DailyRecordMixin models), rows whose
+    (user_id, date) already exists are skipped instead of failing the batch
+    (counted as `conflicts`, not `rows`); on dialects without ON CONFLICT
+    the batch then fails and the row-by-row retry skips them.
+
+    `on_result(values, error)` is called for every row once its transaction
+    has committed (error None) or its row-by-row retry failed.
+
+    `on_flush(conn)` runs in the flush transaction; with it set, the
+    background thread flushes every `max_delay` seconds even when no rows
+    are pending (used as a heartbeat by JobLedger).
+    """
+
+    def __init__(self, app, model, batch_size=50, max_delay=2.0, on_flush=None, ignore_conflicts=False,
+                 on_result=None):
+        self.app = app
+        self.model = model
+        self.table = model.__table__
+        self.ignore_conflicts = ignore_conflicts
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self.on_result = on_result
+        self.stats = {'rows': 0, 'conflicts': 0, 'flushes': 0, 'failed_rows': 0, 'errors': []}
+
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name=f"{self.table.name}-writer", daemon=True)
+        self._flusher.start()
+
+    def add(self, values, lease_owner=None):
+        """Queue one row (column values); returns immediately unless the batch is full."""
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((values, lease_owner))
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._oldest = self._pending, [], None
+
+            if batch or self.on_flush:
+                with self.app.app_context():
+                    self._write(batch)
+                if batch:
+                    with self._lock:
+                        self.stats['flushes'] += 1
+
+    def close(self):
+        """Stop the background thread and write whatever is left; returns the stats."""
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        return self.stats
+
+    def _flush_periodically(self):
+        last_flush = time.monotonic()
+        while not self._closed.wait(min(self.max_delay, 1.0) / 2):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.max_delay
+            if self.on_flush is not None and time.monotonic() - last_flush >= self.max_delay:
+                due = True
+            if due:
+                last_flush = time.monotonic()
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"{self.table.name}: write-behind flush failed - {str(e)}")
+
+    def _statement(self):
+        return self.model.insert_ignoring_conflicts() if self.ignore_conflicts else insert(self.table)
+
+    def _write(self, batch):
+        owners = [owner for _, owner in batch if owner]
+
+        try:
+            inserted = 0
+            with db.engine.begin() as conn:
+                if batch:
+                    inserted = self._inserted(conn.execute(self._statement(), [values for values, _ in batch]), len(batch))
+                if owners:
+                    GenerationLeaseService.release_many(owners, conn=conn)
+                if self.on_flush:
+                    self.on_flush(conn)
+            self._count(rows=inserted, conflicts=len(batch) - inserted)
+            for values, _ in batch:
+                self._report(values)
+            return
+        except Exception as e:
+            if not batch:
+                raise
+            logger.warning(f"{self.table.name}: batch insert of {len(batch)} rows failed, retrying row by row - {str(e)}")
+
+        for values, owner in batch:
+            try:
+                with db.engine.begin() as conn:
+                    inserted = self._inserted(conn.execute(self._statement(), [values]), 1)
+                    if owner:
+                        GenerationLeaseService.release_many([owner], conn=conn)
+                self._count(rows=inserted, conflicts=1 - inserted)
+                self._report(values)
+            except IntegrityError as e:
+                if not (self.ignore_conflicts and not self.model.supports_on_conflict()):
+                    self._fail(values, owner, e)
+                    continue
+                # Plain INSERT (no ON CONFLICT on this dialect): the row already exists
+                self._count(conflicts=1)
+                if owner:
+                    GenerationLeaseService.release_many([owner])
+                self._report(values)
+            except Exception as e:
+                self._fail(values, owner, e)
+
+        if self.on_flush:
+            with db.engine.begin() as conn:
+                self.on_flush(conn)
+
+    def _fail(self, values, owner, e):
+        logger.error(f"{self.table.name}: insert for user {values.get('user_id')} failed - {str(e)}")
+        error = str(getattr(e, 'orig', e))
+        self._count(failed_rows=1, error=error)
+        if owner:
+            GenerationLeaseService.release_many([owner])
+        self._report(values, error)
+
+    @staticmethod
+    def _inserted(result, attempted):
+        # rowcount of an executemany is -1 on drivers that don't report it
+        return result.rowcount if result.rowcount >= 0 else attempted
+
+    def _report(self, values, error=None):
+        if self.on_result is None:
+            return
+        try:
+            self.on_result(values, error)
+        except Exception as e:
+            logger.error(f"{self.table.name}: result callback for user {values.get('user_id')} failed - {str(e)}")
+
+    def _count(self, rows=0, conflicts=0, failed_rows=0, error=None):
+        with self._lock:
+            self.stats['rows'] += rows
+            self.stats['conflicts'] += conflicts
+            self.stats['failed_rows'] += failed_rows
+            if error and len(self.stats['errors']) < 5:
+                self.stats['errors'].append(error)
@@ -0,0 +1,38 @@
+import re
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+_HHMM_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*$")
+
+
+def parse_hhmm(value):
+    """'07:30' / '7:30' -> minutes after midnight, None if malformed."""
+    match = _HHMM_RE.match(value or "")
+    if not match:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def format_hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def get_zone(name, default=None):
+    """ZoneInfo for an IANA name ('Europe/Berlin'); falls back to `default` if unknown."""
+    try:
+        return ZoneInfo(name) if name else default
+    except (ZoneInfoNotFoundError, ValueError):
+        return default
+
+
+def local_date(zone, now=None):
+    """Calendar date in `zone` at `now` (aware; default: the current time)."""
+    return (now or datetime.now(timezone.utc)).astimezone(zone).date()
+
+
+def default_zone(config):
+    """Zone of users without their own timezone setting."""
+    return get_zone(config['SCHEDULER_DEFAULT_TIMEZONE'], timezone.utc)
@@ -0,0 +1,207 @@
+"""
+Structured, non-blocking logging.
+
+Records are handed to a QueueHandler on the calling thread and written by a
+QueueListener thread, so request handlers never block on stdout. Hot-path
+events are logged with `log_event(logger, 'llm.generate', kind=..., ...)`;
+their fields go through the redaction policy and INFO/DEBUG events can be
+sampled. Warnings and errors are never sampled.
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import has_request_context
+from flask_jwt_extended import get_jwt_identity
+
+# Fields bound for the current request / job (e.g. user_id), see bind_log_context()
+_log_context = contextvars.ContextVar('log_context', default={})
+
+_listener = None
+_salt = ''
+
+
+def hash_user_id(user_id):
+    """Stable, non-reversible user reference for log lines."""
+    if user_id is None:
+        return None
+    return hashlib.sha256(f"{_salt}:{user_id}".encode('utf-8')).hexdigest()[:12]
+
+
+@contextmanager
+def bind_log_context(**fields):
+    """Attach fields (user_id, job, ...) to every event logged inside the block."""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def _request_user_id():
+    if not has_request_context():
+        return None
+    try:
+        return get_jwt_identity()
+    except Exception:
+        # Public endpoint or JWT not verified yet
+        return None
+
+
+def log_event(logger, event, level=logging.INFO, **fields):
+    """Log a structured event; fields are redacted before they are formatted, None fields dropped."""
+    if logger.isEnabledFor(level):
+        fields = {key: value for key, value in fields.items() if value is not None}
+        logger.log(level, event, extra={'event': event, 'fields': fields})
+
+
+class ContextFilter(logging.Filter):
+    """
+    Merges bound context (or the JWT identity of the current request) into
+    structured events and hashes user ids. Runs on the emitting thread.
+    """
+
+    def filter(self, record):
+        fields = getattr(record, 'fields', None)
+        if fields is None:
+            return True
+
+        merged = {**_log_context.get(), **fields}
+        if 'user_id' not in merged:
+            user_id = _request_user_id()
+            if user_id is not None:
+                merged['user_id'] = user_id
+        if 'user_id' in merged:
+            merged['user'] = hash_user_id(merged.pop('user_id'))
+        record.fields = merged
+        return True
+
+
+class RedactionFilter(logging.Filter):
+    """
+    Applies the redaction policy to content-bearing fields (prompts, AI
+    responses, journal text):
+        hash     - replaced by length and a short digest (default)
+        truncate - first `keep` characters
+        off      - logged as is (local debugging only)
+    """
+
+    def __init__(self, policy='hash', fields=(), keep=40):
+        super().__init__()
+        self.policy = policy
+        self.fields = set(fields)
+        self.keep = keep
+
+    def redact(self, value):
+        if value is None or self.policy == 'off':
+            return value
+        value = str(value)
+        if self.policy == 'truncate':
+            return value[:self.keep] + ('…' if len(value) > self.keep else '')
+        digest = hashlib.sha256(value.encode('utf-8')).hexdigest()[:10]
+        return f"<{len(value)} chars sha256:{digest}>"
+
+    def filter(self, record):
+        fields = getattr(record, 'fields', None)
+        if fields:
+            for name in self.fields.intersection(fields):
+                fields[name] = self.redact(fields[name])
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of INFO/DEBUG structured events; per-event rates override the default."""
+
+    def __init__(self, rate=1.0, rates=None):
+        super().__init__()
+        self.rate = rate
+        self.rates = rates or {}
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(event, self.rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            **(getattr(record, 'fields', None) or {})
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(app):
+    """Install the queue-based root handler from app config (idempotent)."""
+    global _listener, _salt
+
+    _salt = app.config['SECRET_KEY']
+
+    if _listener is not None:
+        _listener.stop()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(app.config['LOG_LEVEL'])
+
+    output = logging.StreamHandler()
+    if app.config['LOG_FORMAT'] == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE']))
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SamplingFilter(app.config['LOG_SAMPLE_RATE'], app.config['LOG_SAMPLE_RATES']))
+    handler.addFilter(RedactionFilter(
+        app.config['LOG_REDACT'],
+        app.config['LOG_REDACT_FIELDS'],
+        app.config['LOG_REDACT_KEEP']
+    ))
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+@atexit.register
+def _flush_logs():
+    if _listener is not None:
+        _listener.stop()
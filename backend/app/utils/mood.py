@@ -0,0 +1,18 @@
+MOOD_EMOJIS = {
+    "Excited": "⚡",
+    "Happy": "😄",
+    "Calm": "😌",
+    "Focused": "🎯",
+    "Tired": "😴",
+    "Sad": "😢",
+    "Stressed": "😖",
+    "Angry": "😠",
+}
+
+
+def mood_emoji(mood):
+    # Numeric moods (old system) are still present in unmigrated databases
+    if isinstance(mood, (int, float)):
+        return "😊" if mood >= 4 else "😐" if mood == 3 else "😔"
+
+    return MOOD_EMOJIS.get(mood, "😐")
@@ -0,0 +1,16 @@
+import json
+
+
+def format_sse(event, data):
+    """
+    Format one Server-Sent Event frame.
+    `data` is serialized as JSON so multi-line text stays in one frame.
+    """
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
@@ -0,0 +1,115 @@
+import argparse
+
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+
+parser = argparse.ArgumentParser(description="Enforce one journal entry / morning session / evening prompt per user and day.")
+parser.add_argument("--dry-run", action="store_true", help="only report the duplicates that would be merged and removed")
+args = parser.parse_args()
+
+app = create_app(with_scheduler=False)
+
+# One row per (user_id, date): unique indexes used by the ON CONFLICT upserts
+TABLES = {
+    "journal_entries": "uq_journal_entries_user_date",
+    "morning_sessions": "uq_morning_sessions_user_date",
+    "evening_prompts": "uq_evening_prompts_user_date",
+}
+
+# Text the user wrote: older same-day entries are appended to the kept one, never dropped
+JOURNAL_TEXT_FIELDS = ("what_went_well", "what_to_improve", "how_i_feel", "evening_reflection")
+
+
+def duplicate_ids(table):
+    """Ids of every row but the newest per (user_id, date)."""
+    return [row.id for row in db.session.execute(text(
+        f"SELECT id FROM ("
+        f"  SELECT id, ROW_NUMBER() OVER ("
+        f"    PARTITION BY user_id, date ORDER BY created_at DESC, id DESC"
+        f"  ) AS rn FROM {table}"
+        f") AS ranked WHERE rn > 1"
+    ))]
+
+
+def merge_journal_texts(columns):
+    """Append the text of older same-day entries to the newest one; returns the number of merged days."""
+    fields = [field for field in JOURNAL_TEXT_FIELDS if field in columns]
+    rows = db.session.execute(text(
+        f"SELECT id, user_id, date, {', '.join(fields)} FROM journal_entries j "
+        f"WHERE (SELECT COUNT(*) FROM journal_entries d WHERE d.user_id = j.user_id AND d.date = j.date) > 1 "
+        f"ORDER BY user_id, date, created_at, id"
+    )).mappings().all()
+
+    days = {}
+    for row in rows:
+        days.setdefault((row["user_id"], row["date"]), []).append(row)
+
+    for (user_id, day), entries in days.items():
+        keep = entries[-1]
+        merged = {}
+        for field in fields:
+            parts = []
+            for entry in entries:
+                value = (entry[field] or "").strip()
+                if value and value not in parts:
+                    parts.append(value)
+            merged[field] = "\n\n".join(parts) or None
+
+        print(f"  - {user_id} {day}: {len(entries)} entries merged into {keep['id']}")
+        if args.dry_run:
+            continue
+
+        assignments = ", ".join(f"{field} = :{field}" for field in merged)
+        if "ai_summary_status" in columns:
+            # Merged text needs a new summary (re-queued on the next start)
+            assignments += ", ai_summary = NULL, ai_summary_status = 'pending', ai_summary_attempts = 0"
+        db.session.execute(text(f"UPDATE journal_entries SET {assignments} WHERE id = :id"), {**merged, "id": keep["id"]})
+
+    return len(days)
+
+
+with app.app_context():
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+
+    if args.dry_run:
+        print("🔎 Dry run: nothing is changed")
+
+    for table, index in TABLES.items():
+        if table not in tables:
+            print(f"  - {table}: not present, skipped")
+            continue
+
+        print(f"🔄 Migrating {table}...")
+
+        ids = duplicate_ids(table)
+        if table == "journal_entries" and ids:
+            columns = {col["name"] for col in inspector.get_columns(table)}
+            merged = merge_journal_texts(columns)
+            print(f"  ✓ {merged} days with several entries merged")
+
+        if ids and not args.dry_run:
+            # Removed rows are kept in <table>_duplicates
+            backup = f"{table}_duplicates"
+            if backup not in tables:
+                db.session.execute(text(f"CREATE TABLE {backup} AS SELECT * FROM {table} WHERE 1 = 0"))
+                tables.add(backup)
+            for start in range(0, len(ids), 500):
+                params = {f"id{i}": value for i, value in enumerate(ids[start:start + 500])}
+                placeholders = ", ".join(f":{name}" for name in params)
+                db.session.execute(text(f"INSERT INTO {backup} SELECT * FROM {table} WHERE id IN ({placeholders})"), params)
+                db.session.execute(text(f"DELETE FROM {table} WHERE id IN ({placeholders})"), params)
+            print(f"  ✓ {len(ids)} duplicate rows removed (copied to {backup})")
+        else:
+            print(f"  ✓ {len(ids)} duplicate rows {'would be removed' if args.dry_run else 'removed'}")
+
+        if args.dry_run:
+            continue
+
+        db.session.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} (user_id, date)"))
+        print(f"  ✓ Index {index}")
+
+        db.session.commit()
+
+    print(f"\n✅ {'Dry run' if args.dry_run else 'Migration'} complete!")
@@ -0,0 +1,40 @@
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+
+app = create_app(with_scheduler=False)
+
+# New columns for the background AI summary (see JournalAnalysisService)
+NEW_COLUMNS = {
+    "ai_summary_status": "VARCHAR(20)",
+    "ai_summary_attempts": "INTEGER NOT NULL DEFAULT 0",
+    "ai_summary_claimed_at": "DATETIME",
+    "ai_summary_claim": "VARCHAR(36)",
+}
+
+with app.app_context():
+    existing = {col["name"] for col in inspect(db.engine).get_columns("journal_entries")}
+
+    print("🔄 Migrating journal_entries...")
+
+    for name, ddl in NEW_COLUMNS.items():
+        if name in existing:
+            print(f"  ✓ Column {name}: already present")
+            continue
+
+        db.session.execute(text(f"ALTER TABLE journal_entries ADD COLUMN {name} {ddl}"))
+        print(f"  ✓ Column {name}: added")
+
+    # Old entries were analyzed inline: mark them done (or failed if no summary)
+    done = db.session.execute(text(
+        "UPDATE journal_entries SET ai_summary_status = 'done' "
+        "WHERE ai_summary_status IS NULL AND ai_summary IS NOT NULL"
+    )).rowcount
+    failed = db.session.execute(text(
+        "UPDATE journal_entries SET ai_summary_status = 'failed' "
+        "WHERE ai_summary_status IS NULL AND ai_summary IS NULL"
+    )).rowcount
+
+    db.session.commit()
+    print(f"  ✓ {done} entries marked done, {failed} marked failed")
+    print(f"\n✅ Migration complete!")
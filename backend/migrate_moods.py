@@ -1,7 +1,7 @@
 from app import create_app, db
 from app.models import JournalEntry
 
-app = create_app()
+app = create_app(with_scheduler=False)
 
 # Mapping: Old numeric mood → New string mood
 MOOD_MAPPING = {5: "Happy", 4: "Calm", 3: "Focused", 2: "Tired", 1: "Sad"}
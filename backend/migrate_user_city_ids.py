@@ -0,0 +1,43 @@
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+from app.models import User
+from app.services.city_service import city_index
+
+app = create_app(with_scheduler=False)
+
+# Canonical city id for weather lookups (see CityIndex)
+with app.app_context():
+    existing = {col["name"] for col in inspect(db.engine).get_columns("users")}
+
+    print("🔄 Migrating users...")
+
+    if "city_id" in existing:
+        print("  ✓ Column city_id: already present")
+    else:
+        db.session.execute(text("ALTER TABLE users ADD COLUMN city_id VARCHAR(64)"))
+        print("  ✓ Column city_id: added")
+
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_users_city_id ON users (city_id)"))
+    print("  ✓ Index ix_users_city_id")
+
+    # Backfill: resolve each distinct free-text city once
+    cities = [row.city for row in User.query.with_entities(User.city).filter(User.city_id.is_(None)).distinct()]
+    resolved, unresolved = 0, []
+
+    for city in cities:
+        city_id = city_index.resolve_id(city)
+        if city_id is None:
+            unresolved.append(city)
+            continue
+
+        resolved += User.query.filter(User.city == city, User.city_id.is_(None)).update(
+            {User.city_id: city_id}, synchronize_session=False
+        )
+
+    db.session.commit()
+    print(f"  ✓ {resolved} users mapped to a canonical city ({len(cities)} distinct spellings)")
+    if unresolved:
+        print(f"  ⚠️ {len(unresolved)} spellings not in the gazetteer (weather keyed by free text): "
+              + ", ".join(sorted(unresolved)[:20]))
+    print(f"\n✅ Migration complete!")
@@ -0,0 +1,32 @@
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+
+app = create_app(with_scheduler=False)
+
+# Last activity per user: the scheduler only pre-generates for recently active users
+with app.app_context():
+    existing = {col["name"] for col in inspect(db.engine).get_columns("users")}
+
+    print("🔄 Migrating users...")
+
+    if "last_active_at" in existing:
+        print("  ✓ Column last_active_at: already present")
+    else:
+        db.session.execute(text("ALTER TABLE users ADD COLUMN last_active_at DATETIME"))
+        print("  ✓ Column last_active_at: added")
+
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_users_last_active_at ON users (last_active_at)"))
+    print("  ✓ Index ix_users_last_active_at")
+
+    # Backfill: latest journal entry, else the registration time
+    backfilled = db.session.execute(text(
+        "UPDATE users SET last_active_at = COALESCE("
+        "  (SELECT MAX(j.created_at) FROM journal_entries j WHERE j.user_id = users.id),"
+        "  created_at"
+        ") WHERE last_active_at IS NULL"
+    )).rowcount
+
+    db.session.commit()
+    print(f"  ✓ {backfilled} users backfilled from their latest journal entry or registration")
+    print(f"\n✅ Migration complete!")
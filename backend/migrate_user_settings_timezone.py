@@ -0,0 +1,37 @@
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+from app.utils.local_time import parse_hhmm, format_hhmm
+
+app = create_app(with_scheduler=False)
+
+# Per-user timezone for the bucketed scheduler (SCHEDULER_MODE=bucketed)
+with app.app_context():
+    existing = {col["name"] for col in inspect(db.engine).get_columns("user_settings")}
+
+    print("🔄 Migrating user_settings...")
+
+    if "timezone" in existing:
+        print("  ✓ Column timezone: already present")
+    else:
+        db.session.execute(text("ALTER TABLE user_settings ADD COLUMN timezone VARCHAR(64)"))
+        print("  ✓ Column timezone: added")
+
+    # Old values were free text; the scheduler expects zero-padded HH:MM
+    # (checked in Python: pattern matching differs between SQLite and PostgreSQL)
+    fixed = 0
+    rows = db.session.execute(text("SELECT user_id, morning_time, evening_time FROM user_settings")).all()
+    for user_id, *times in rows:
+        for column, value in zip(("morning_time", "evening_time"), times):
+            minutes = parse_hhmm(value)
+            if minutes is None or format_hhmm(minutes) == value:
+                continue
+            db.session.execute(
+                text(f"UPDATE user_settings SET {column} = :value WHERE user_id = :user_id"),
+                {"value": format_hhmm(minutes), "user_id": user_id}
+            )
+            fixed += 1
+
+    db.session.commit()
+    print(f"  ✓ {fixed} times zero-padded (users without a timezone use SCHEDULER_DEFAULT_TIMEZONE)")
+    print(f"\n✅ Migration complete!")
@@ -0,0 +1,65 @@
+import argparse
+from collections import Counter
+
+from sqlalchemy import update
+
+from app import create_app, db
+from app.models import JournalEntry
+from app.services.emotion_service import emotion_lexicon
+
+parser = argparse.ArgumentParser(description="Re-run emotion detection for all journal entries.")
+parser.add_argument("--chunk-size", type=int, default=1000, help="rows fetched and updated per batch")
+parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+args = parser.parse_args()
+
+app = create_app(with_scheduler=False)
+
+with app.app_context():
+    print(f"🔄 Reclassifying journal entries (chunks of {args.chunk_size})...")
+
+    last_id = None
+    scanned = 0
+    changed = 0
+    transitions = Counter()
+
+    while True:
+        # Keyset pagination: only id/text/label columns, never the full rows
+        query = db.session.query(JournalEntry.id, JournalEntry.how_i_feel, JournalEntry.emotion_detected)
+        if last_id is not None:
+            query = query.filter(JournalEntry.id > last_id)
+
+        rows = query.order_by(JournalEntry.id).limit(args.chunk_size).all()
+        if not rows:
+            break
+
+        labels = emotion_lexicon.classify_many([row.how_i_feel for row in rows])
+
+        updates = [
+            {"id": row.id, "emotion_detected": label}
+            for row, label in zip(rows, labels)
+            if row.emotion_detected != label
+        ]
+
+        transitions.update(
+            (row.emotion_detected, label)
+            for row, label in zip(rows, labels)
+            if row.emotion_detected != label
+        )
+
+        if updates and not args.dry_run:
+            db.session.execute(update(JournalEntry), updates)
+            db.session.commit()
+
+        scanned += len(rows)
+        changed += len(updates)
+        last_id = rows[-1].id
+        print(f"  ✓ {scanned} scanned, {changed} changed")
+
+    db.session.remove()
+
+    # Review these (run with --dry-run first) before overwriting stored labels
+    for (old, new), count in transitions.most_common():
+        print(f"  {old} -> {new}: {count}")
+
+    verb = "would change" if args.dry_run else "updated"
+    print(f"\n✅ Reclassification complete: {scanned} entries scanned, {changed} {verb}")
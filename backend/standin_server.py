@@ -0,0 +1,328 @@
+"""
+Local stand-in for Ollama (/api/generate, /api/ps) and OpenWeatherMap
+(/data/2.5/weather) for offline development and load testing.
+
+    python standin_server.py --port 5055 \
+        --generate-latency lognormal:8000,0.5 --chunk-latency uniform:20-60 \
+        --weather-latency fixed:80 --failure-rate 0.02
+
+Point the backend at it through Config / .env:
+
+    OLLAMA_API_URL=http://localhost:5055
+    OPENWEATHERMAP_BASE_URL=http://localhost:5055/data/2.5/weather
+    OPENWEATHERMAP_API_KEY=standin
+
+Fixtures (--fixtures file.json) replay recorded responses:
+    {"generate": {"<key>": {"response": "...", "eval_count": 120, ...}},
+     "weather":  {"berlin": {<raw OpenWeatherMap JSON>}}}
+The generate key is sha256(model, system, prompt), see fixture_key().
+With --record-ollama / --record-weather, unknown requests are proxied to
+the real upstream and the answers are written back to the fixtures file.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+DEFAULT_MODEL = "gemma3:4b"
+
+FILLER_WORDS = tuple((
+    "Guten Morgen! Heute ist ein guter Tag für kleine Schritte. "
+    "07:30 – Frühstück und ein Glas Wasser. 09:00 – Fokuszeit für die wichtigste Aufgabe. "
+    "12:30 – Mittagspause mit kurzem Spaziergang. 15:00 – E-Mails und Kleinkram erledigen. "
+    "18:00 – Sport oder Entspannung. Du schaffst das! 💪"
+).split(" "))
+
+
+def parse_latency(spec):
+    """
+    'fixed:200' | 'uniform:100-500' | 'normal:300,50' | 'lognormal:800,0.5'
+    (milliseconds; lognormal takes the median and sigma). Returns a sampler in seconds.
+    """
+    if not spec or spec == "0":
+        return lambda: 0.0
+
+    kind, _, args = spec.partition(":")
+
+    if kind == "fixed":
+        value = float(args) / 1000
+        return lambda: value
+    if kind == "uniform":
+        low, high = (float(x) / 1000 for x in args.split("-"))
+        return lambda: random.uniform(low, high)
+    if kind == "normal":
+        mean, std = (float(x) / 1000 for x in args.split(","))
+        return lambda: max(0.0, random.gauss(mean, std))
+    if kind == "lognormal":
+        median, sigma = args.split(",")
+        median, sigma = float(median) / 1000, float(sigma)
+        return lambda: median * random.lognormvariate(0, sigma)
+
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def fixture_key(model, system, prompt):
+    raw = json.dumps([model, system or "", prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Fixtures:
+    def __init__(self, path=None):
+        self.path = path
+        self.data = {"generate": {}, "weather": {}}
+        self._lock = threading.Lock()
+
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    loaded = json.load(f)
+                self.data["generate"].update(loaded.get("generate", {}))
+                self.data["weather"].update(loaded.get("weather", {}))
+            except FileNotFoundError:
+                pass
+
+    def get(self, section, key):
+        with self._lock:
+            return self.data[section].get(key)
+
+    def put(self, section, key, value):
+        with self._lock:
+            self.data[section][key] = value
+            if self.path:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(self.data, f, ensure_ascii=False, indent=2)
+
+
+def create_standin_app(
+    fixtures=None,
+    model=DEFAULT_MODEL,
+    generate_latency="fixed:0",
+    chunk_latency="fixed:0",
+    weather_latency="fixed:0",
+    load_latency="fixed:0",
+    failure_rate=0.0,
+    hang_rate=0.0,
+    hang_seconds=300,
+    record_ollama=None,
+    record_weather=None,
+    seed=None
+):
+    app = Flask(__name__)
+    fixtures = fixtures or Fixtures()
+    rng = random.Random(seed)
+
+    sample_generate = parse_latency(generate_latency)
+    sample_chunk = parse_latency(chunk_latency)
+    sample_weather = parse_latency(weather_latency)
+    sample_load = parse_latency(load_latency)
+
+    state = {"loaded": False, "lock": threading.Lock(), "requests": 0, "failures": 0}
+
+    def inject_failure():
+        """Returns an error response for injected failures (or hangs), else None."""
+        with state["lock"]:
+            state["requests"] += 1
+        roll = rng.random()
+        if roll < hang_rate:
+            time.sleep(hang_seconds)
+        if roll < hang_rate + failure_rate:
+            with state["lock"]:
+                state["failures"] += 1
+            return jsonify({"error": "injected failure"}), 500
+        return None
+
+    def ensure_loaded():
+        """First request after start pays the model load, like a cold Ollama."""
+        with state["lock"]:
+            if state["loaded"]:
+                return 0.0
+            state["loaded"] = True
+        load = sample_load()
+        time.sleep(load)
+        return load
+
+    def synthesize(prompt):
+        # Deterministic per prompt so cache behaviour is reproducible
+        middle = list(FILLER_WORDS[3:-3])
+        random.Random(prompt).shuffle(middle)
+        return " ".join(FILLER_WORDS[:3] + tuple(middle) + FILLER_WORDS[-3:])
+
+    def record_generation(payload):
+        upstream = requests.post(
+            f"{record_ollama}/api/generate",
+            json={**payload, "stream": False},
+            timeout=600
+        )
+        upstream.raise_for_status()
+        data = upstream.json()
+        return {key: data.get(key) for key in (
+            "response", "eval_count", "eval_duration", "prompt_eval_count",
+            "prompt_eval_duration", "load_duration", "total_duration"
+        )}
+
+    @app.route("/api/generate", methods=["POST"])
+    def generate():
+        failure = inject_failure()
+        if failure:
+            return failure
+
+        payload = request.get_json(silent=True) or {}
+        prompt = payload.get("prompt", "")
+        started = time.monotonic()
+        load = ensure_loaded()
+
+        # Empty prompt = load-only request (model warm-up)
+        if not prompt:
+            return jsonify({
+                "model": payload.get("model", model),
+                "response": "",
+                "done": True,
+                "load_duration": int(load * 1e9),
+                "total_duration": int((time.monotonic() - started) * 1e9)
+            })
+
+        key = fixture_key(payload.get("model", model), payload.get("system"), prompt)
+        fixture = fixtures.get("generate", key)
+
+        if fixture is None and record_ollama:
+            fixture = record_generation(payload)
+            fixtures.put("generate", key, fixture)
+
+        if fixture is None:
+            fixture = {"response": synthesize(prompt)}
+
+        text = fixture.get("response") or ""
+        chunks = re.findall(r"\S+\s*", text) or [text]
+        eval_count = fixture.get("eval_count") or len(chunks)
+        prompt_eval_count = fixture.get("prompt_eval_count") or len(prompt.split())
+
+        def final_stats():
+            total = time.monotonic() - started
+            return {
+                "done": True,
+                "done_reason": "stop",
+                "eval_count": eval_count,
+                "eval_duration": fixture.get("eval_duration") or int(max(total - load, 0.001) * 1e9),
+                "prompt_eval_count": prompt_eval_count,
+                "load_duration": fixture.get("load_duration") or int(load * 1e9),
+                "total_duration": fixture.get("total_duration") or int(total * 1e9)
+            }
+
+        if not payload.get("stream", True):
+            time.sleep(sample_generate())
+            return jsonify({
+                "model": payload.get("model", model),
+                "response": text,
+                **final_stats()
+            })
+
+        def stream():
+            for chunk in chunks:
+                time.sleep(sample_chunk())
+                yield json.dumps({"model": payload.get("model", model), "response": chunk, "done": False}) + "\n"
+            yield json.dumps({"model": payload.get("model", model), "response": "", **final_stats()}) + "\n"
+
+        return Response(stream(), mimetype="application/x-ndjson")
+
+    @app.route("/api/ps", methods=["GET"])
+    def ps():
+        with state["lock"]:
+            loaded = state["loaded"]
+        return jsonify({"models": [{"name": model, "model": model}] if loaded else []})
+
+    @app.route("/data/2.5/weather", methods=["GET"])
+    def weather():
+        time.sleep(sample_weather())
+
+        failure = inject_failure()
+        if failure:
+            return failure
+
+        city = (request.args.get("q") or "").strip()
+        if not city and request.args.get("lat") and request.args.get("lon"):
+            city = f"{request.args['lat']},{request.args['lon']}"
+        if not city:
+            return jsonify({"cod": "400", "message": "Nothing to geocode"}), 400
+
+        key = city.casefold()
+        data = fixtures.get("weather", key)
+
+        if data is None and record_weather:
+            upstream = requests.get(record_weather, params=request.args, timeout=10)
+            if upstream.status_code == 200:
+                data = upstream.json()
+                fixtures.put("weather", key, data)
+            else:
+                return Response(upstream.content, status=upstream.status_code, mimetype="application/json")
+
+        if data is None:
+            # Deterministic fake reading per city
+            city_rng = random.Random(key)
+            temp = round(city_rng.uniform(-5, 28), 1)
+            description, icon = city_rng.choice([
+                ("klarer Himmel", "01d"), ("Ein paar Wolken", "02d"),
+                ("bedeckt", "04d"), ("leichter Regen", "10d")
+            ])
+            data = {
+                "name": city.split(",")[0].strip().title(),
+                "main": {
+                    "temp": temp,
+                    "feels_like": round(temp - city_rng.uniform(0, 3), 1),
+                    "humidity": city_rng.randint(35, 95)
+                },
+                "weather": [{"description": description, "icon": icon}]
+            }
+
+        return jsonify(data)
+
+    @app.route("/_standin/stats", methods=["GET"])
+    def stats():
+        with state["lock"]:
+            return jsonify({
+                "requests": state["requests"],
+                "injected_failures": state["failures"],
+                "model_loaded": state["loaded"]
+            })
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ollama/OpenWeatherMap stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--fixtures", help="JSON fixtures file (read, and written when recording)")
+    parser.add_argument("--generate-latency", default="fixed:0", help="non-streaming generation time")
+    parser.add_argument("--chunk-latency", default="fixed:0", help="delay between streamed chunks")
+    parser.add_argument("--load-latency", default="fixed:0", help="one-time cold model load")
+    parser.add_argument("--weather-latency", default="fixed:0")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests that hang first")
+    parser.add_argument("--hang-seconds", type=float, default=300)
+    parser.add_argument("--record-ollama", help="real Ollama URL to proxy and record unknown prompts")
+    parser.add_argument("--record-weather", help="real OpenWeatherMap URL to proxy and record unknown cities")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    standin = create_standin_app(
+        fixtures=Fixtures(args.fixtures),
+        model=args.model,
+        generate_latency=args.generate_latency,
+        chunk_latency=args.chunk_latency,
+        weather_latency=args.weather_latency,
+        load_latency=args.load_latency,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        record_ollama=args.record_ollama,
+        record_weather=args.record_weather,
+        seed=args.seed
+    )
+    standin.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,186 @@
+import pytest
+import requests
+
+from app.services import ai_service
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Fake time.monotonic() (patched on the time module for the test) to step through cooldowns
+    now = [1000.0]
+    monkeypatch.setattr('app.services.circuit_breaker.time.monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('test', failure_threshold=3, cooldown=30)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure('boom')
+    breaker.record_failure('boom')
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure('boom')
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()['last_error'] == 'boom'
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_rejects_until_cooldown(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.snapshot()['rejected_calls'] == 1
+
+    clock[0] += 29
+    assert not breaker.allow()
+
+    clock[0] += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_half_open_allows_one_trial(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_half_open_trial_success_closes(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.check()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_trial_failure_reopens(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.check()
+
+    breaker.record_failure('still down')
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()['retry_in_s'] == 30
+
+
+def test_abandoned_trial_frees_the_slot(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.check()
+
+    breaker.abandon()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+class FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        for line in self.lines:
+            if isinstance(line, Exception):
+                raise line
+            yield line
+
+
+@pytest.fixture
+def ollama(monkeypatch, breaker):
+    # OllamaClient with `breaker` in place of the shared ollama_breaker
+    monkeypatch.setattr(ai_service, 'ollama_breaker', breaker)
+    client = ai_service.OllamaClient()
+    responses = []
+
+    class Session:
+        def post(self, url, **kwargs):
+            return FakeResponse(responses.pop(0))
+
+    client._session = Session()
+    return client, responses
+
+
+def test_stream_counts_malformed_lines_as_failures(ollama, breaker):
+    client, responses = ollama
+    responses.extend([[b'not json']] * 3)
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            list(client.stream({'prompt': 'x'}))
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        list(client.stream({'prompt': 'x'}))
+
+
+def test_stream_counts_broken_connections_as_failures(ollama, breaker):
+    client, responses = ollama
+    responses.append([b'{"response": "Hal", "done": false}', requests.exceptions.ChunkedEncodingError('reset')])
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        list(client.stream({'prompt': 'x'}))
+
+    assert breaker.snapshot()['consecutive_failures'] == 1
+
+
+def test_stream_done_line_closes_half_open_circuit(ollama, breaker, clock):
+    client, responses = ollama
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    responses.append([b'{"response": "Hallo", "done": false}', b'{"response": "", "done": true}'])
+
+    chunks = list(client.stream({'prompt': 'x'}))
+
+    assert [chunk['done'] for chunk in chunks] == [False, True]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stream_closed_early_abandons_the_trial(ollama, breaker, clock):
+    client, responses = ollama
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    responses.append([b'{"response": "Hal", "done": false}', b'{"response": "lo", "done": false}'])
+
+    stream = client.stream({'prompt': 'x'})
+    next(stream)
+    stream.close()
+
+    # No verdict: the trial slot is free again, the failure count unchanged
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
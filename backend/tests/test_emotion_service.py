@@ -0,0 +1,42 @@
+import pytest
+
+from app.services.emotion_service import stem, EmotionLexicon
+
+
+@pytest.mark.parametrize('forms', [
+    ('problem', 'probleme', 'problemen'),
+    ('zufrieden', 'zufriedener', 'zufriedenes'),
+    ('müde', 'müder', 'müden'),
+    ('sorge', 'sorgen'),
+    ('schlecht', 'schlechter', 'schlechteren'),
+])
+def test_inflected_forms_share_a_stem(forms):
+    assert len({stem(form) for form in forms}) == 1
+
+
+def test_stem_keeps_short_words():
+    assert stem('gut') == 'gut'
+    assert stem('gute') == 'gut'
+
+
+@pytest.fixture
+def lexicon():
+    return EmotionLexicon()
+
+
+@pytest.mark.parametrize('text, label', [
+    ("Ich habe viele Probleme", "negativ"),
+    ("Ich habe viele Problemen", "negativ"),
+    ("Ich bin heute zufriedener", "positiv"),
+    ("Ich bin sehr müde", "erschöpft"),
+    ("Gestresst und überfordert, aber glücklich", "gestresst"),
+    ("Voller Freude", "glücklich"),
+    ("Der Befund war gutartig", "neutral"),
+    ("", "neutral"),
+])
+def test_classify(lexicon, text, label):
+    assert lexicon.classify(text) == label
+
+
+def test_classify_many_keeps_order(lexicon):
+    assert lexicon.classify_many(["super Tag", "traurig"]) == ["positiv", "traurig"]
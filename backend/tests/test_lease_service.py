@@ -0,0 +1,185 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from werkzeug.test import EnvironBuilder
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.lease import GenerationLease
+from app.services import ai_service
+from app.services.lease_service import GenerationLeaseService
+
+DAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # File database: leases are written on their own connections, across threads
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(GenerationLeaseService, 'POLL_INTERVAL', 0.01)
+    app = create_app('testing', with_scheduler=False)
+    with app.app_context():
+        yield app
+
+
+def test_acquire_is_exclusive_until_released(app):
+    owner = GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+
+    assert owner
+    assert GenerationLeaseService.acquire('u1', DAY, 'morning_plan') is None
+    assert GenerationLeaseService.acquire('u1', DAY, 'evening_prompt')
+    assert GenerationLeaseService.acquire('u2', DAY, 'morning_plan')
+
+    GenerationLeaseService.release('u1', DAY, 'morning_plan', owner)
+
+    assert GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+
+
+def test_release_by_another_owner_keeps_the_lease(app):
+    owner = GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+
+    GenerationLeaseService.release('u1', DAY, 'morning_plan', 'someone-else')
+
+    assert GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+    GenerationLeaseService.release('u1', DAY, 'morning_plan', owner)
+    assert not GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_expired_lease_is_taken_over(app):
+    stale = GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+    with db.engine.begin() as conn:
+        conn.execute(update(GenerationLease.__table__).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+    owner = GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+
+    assert owner and owner != stale
+    # The stale holder's release no longer removes the new lease
+    GenerationLeaseService.release('u1', DAY, 'morning_plan', stale)
+    assert GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_single_flight_returns_existing_artifact(app):
+    def generate():
+        raise AssertionError("must not generate")
+
+    assert GenerationLeaseService.single_flight('u1', DAY, 'morning_plan', lambda: 'plan', generate) == ('plan', False)
+
+
+def test_single_flight_releases_the_lease_after_generating(app):
+    assert GenerationLeaseService.single_flight('u1', DAY, 'morning_plan', lambda: None, lambda: 'plan') == ('plan', True)
+    assert not GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_single_flight_releases_the_lease_when_generate_fails(app):
+    def generate():
+        raise RuntimeError("Ollama down")
+
+    with pytest.raises(RuntimeError):
+        GenerationLeaseService.single_flight('u1', DAY, 'morning_plan', lambda: None, generate)
+
+    assert not GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_single_flight_hand_off_keeps_the_lease(app):
+    owners = []
+
+    def generate(owner):
+        owners.append(owner)
+        return 'plan'
+
+    result = GenerationLeaseService.single_flight('u1', DAY, 'morning_plan', lambda: None, generate, hand_off=True)
+
+    assert result == ('plan', True)
+    assert GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+    GenerationLeaseService.release_many(owners)
+    assert not GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_single_flight_hand_off_without_result_releases(app):
+    GenerationLeaseService.single_flight('u1', DAY, 'morning_plan', lambda: None, lambda owner: None, hand_off=True)
+
+    assert not GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_single_flight_waits_for_the_holder(app):
+    artifacts = []
+    generating = threading.Event()
+    finish = threading.Event()
+    calls = []
+
+    def generate():
+        calls.append(threading.current_thread().name)
+        generating.set()
+        finish.wait(5)
+        artifacts.append('plan')
+        return 'plan'
+
+    def run(results):
+        with app.app_context():
+            results.append(GenerationLeaseService.single_flight(
+                'u1', DAY, 'morning_plan', lambda: artifacts[0] if artifacts else None, generate, wait_timeout=5
+            ))
+
+    holder_results, waiter_results = [], []
+    holder = threading.Thread(target=run, args=(holder_results,))
+    holder.start()
+    assert generating.wait(5)
+
+    waiters = [threading.Thread(target=run, args=(waiter_results,)) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    finish.set()
+    for thread in [holder, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert holder_results == [('plan', True)]
+    assert waiter_results == [('plan', False)] * 3
+
+
+def test_single_flight_gives_up_after_wait_timeout(app):
+    GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+
+    result = GenerationLeaseService.single_flight('u1', DAY, 'morning_plan', lambda: None, lambda: 'plan', wait_timeout=0.05)
+
+    assert result == (None, False)
+
+
+def test_releaser_is_idempotent_and_needs_no_context(app):
+    owner = GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+    release = GenerationLeaseService.releaser('u1', DAY, 'morning_plan', owner)
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(release()))
+    thread.start()
+    thread.join(5)
+
+    assert results == [None]
+    assert not GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+    # A later holder is not touched by a second call
+    GenerationLeaseService.acquire('u1', DAY, 'morning_plan')
+    release()
+    assert GenerationLeaseService.is_held('u1', DAY, 'morning_plan')
+
+
+def test_stream_closed_before_first_chunk_releases_the_lease(app, monkeypatch):
+    def stream(payload):
+        yield {'response': 'Guten Morgen', 'done': True}
+
+    monkeypatch.setattr(ai_service.ollama_client, 'stream', stream)
+    client = app.test_client()
+    client.post('/auth/register', json={'username': 'anna', 'city': 'Berlin', 'password': 'pw'})
+    token = client.post('/auth/login', json={'username': 'anna', 'password': 'pw'}).json['access_token']
+
+    # Call the WSGI app directly: the test client would already pull the first chunk
+    environ = EnvironBuilder(path='/morning/plan/stream', headers={'Authorization': f'Bearer {token}'}).get_environ()
+    body = app.wsgi_app(environ, lambda status, headers, exc_info=None: None)
+    assert GenerationLease.query.count() == 1
+
+    # Client goes away without reading the body: generate() never starts
+    body.close()
+
+    assert GenerationLease.query.count() == 0
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Fake time.time() (patched on the time module for the test) to step past TTLs
+    now = [1_000_000.0]
+    monkeypatch.setattr('app.services.llm_cache.time.time', lambda: now[0])
+    return now
+
+
+def make_cache(sqlite_path='', **overrides):
+    config = {
+        'LLM_CACHE_ENABLED': True,
+        'LLM_CACHE_MAX_ENTRIES': 3,
+        'LLM_CACHE_DEFAULT_TTL': 60,
+        'LLM_CACHE_TTLS': {'morning_plan': 600, 'journal_analysis': 0},
+        'LLM_CACHE_SQLITE_PATH': sqlite_path,
+        **overrides
+    }
+    cache = LLMResponseCache()
+    cache.init_app(SimpleNamespace(config=config))
+    return cache
+
+
+def test_key_depends_on_every_input():
+    key = LLMResponseCache.make_key('gemma3:4b', 'system', 'prompt', {'temperature': 0.7})
+
+    assert key == LLMResponseCache.make_key('gemma3:4b', 'system', 'prompt', {'temperature': 0.7})
+    assert key != LLMResponseCache.make_key('gemma3:1b', 'system', 'prompt', {'temperature': 0.7})
+    assert key != LLMResponseCache.make_key('gemma3:4b', 'other', 'prompt', {'temperature': 0.7})
+    assert key != LLMResponseCache.make_key('gemma3:4b', 'system', 'prompt', {'temperature': 0.2})
+
+
+def test_entries_expire_after_their_kind_ttl(clock):
+    cache = make_cache()
+    cache.set('plan', 'Plan', kind='morning_plan')
+    cache.set('prompt', 'Prompt', kind='evening_prompt')
+
+    clock[0] += 59
+    assert cache.get('plan', kind='morning_plan') == 'Plan'
+    assert cache.get('prompt', kind='evening_prompt') == 'Prompt'
+
+    # evening_prompt has no own TTL: LLM_CACHE_DEFAULT_TTL applies
+    clock[0] += 1
+    assert cache.get('prompt', kind='evening_prompt') is None
+    assert cache.get('plan', kind='morning_plan') == 'Plan'
+
+    clock[0] += 540
+    assert cache.get('plan', kind='morning_plan') is None
+
+
+def test_zero_ttl_disables_caching_for_a_kind(clock):
+    cache = make_cache()
+
+    cache.set('analysis', 'Analysis', kind='journal_analysis')
+
+    assert cache.get('analysis', kind='journal_analysis') is None
+    assert cache.stats()['stores'] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = make_cache()
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key.upper())
+    cache.get('a')
+
+    cache.set('d', 'D')
+
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in ('a', 'c', 'd')] == ['A', 'C', 'D']
+    assert cache.stats()['evictions'] == 1
+
+
+def test_sqlite_tier_is_shared_and_honours_ttl(tmp_path, clock):
+    path = str(tmp_path / 'llm_cache.db')
+    writer = make_cache(path)
+    reader = make_cache(path)
+
+    writer.set('plan', 'Plan', kind='morning_plan')
+
+    assert reader.get('plan', kind='morning_plan') == 'Plan'
+    assert reader.stats()['sqlite_hits'] == 1
+
+    clock[0] += 600
+    assert make_cache(path).get('plan', kind='morning_plan') is None
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = make_cache(LLM_CACHE_ENABLED=False)
+
+    cache.set('plan', 'Plan', kind='morning_plan')
+
+    assert cache.get('plan', kind='morning_plan') is None
@@ -0,0 +1,121 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import User, UserSettings
+from app.services.scheduler_service import is_due, scheduler_service
+from app.utils.local_time import get_zone, local_date, parse_hhmm
+
+WINDOW = timedelta(minutes=5)
+
+
+@pytest.mark.parametrize('value, minutes', [
+    ('07:30', 450),
+    ('7:05', 425),
+    (' 23:59 ', 1439),
+    ('24:00', None),
+    ('07:60', None),
+    ('7h30', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_hhmm(value, minutes):
+    assert parse_hhmm(value) == minutes
+
+
+@pytest.mark.parametrize('start, due', [
+    (time(6, 55), False),
+    (time(6, 56), True),
+    (time(7, 0), True),
+    (time(7, 1), False),
+])
+def test_is_due_in_window_before_target(start, due):
+    assert is_due(parse_hhmm('07:30'), 30, start, 5) is due
+
+
+def test_is_due_wraps_around_midnight():
+    # 00:10 with a 30 minute lead is due in the previous day's 23:40 window
+    assert is_due(parse_hhmm('00:10'), 30, time(23, 40), 5)
+    assert not is_due(parse_hhmm('00:10'), 30, time(0, 10), 5)
+
+
+def test_unknown_zone_falls_back_to_default():
+    berlin = ZoneInfo('Europe/Berlin')
+
+    assert get_zone('Mars/Olympus', berlin) is berlin
+    assert get_zone(None, berlin) is berlin
+    assert get_zone('Asia/Tokyo') == ZoneInfo('Asia/Tokyo')
+
+
+def test_local_date_follows_the_zone():
+    now = datetime(2026, 3, 2, 20, 0, tzinfo=timezone.utc)
+
+    assert local_date(ZoneInfo('Asia/Tokyo'), now) == date(2026, 3, 3)
+    assert local_date(ZoneInfo('America/New_York'), now) == date(2026, 3, 2)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(TestingConfig, 'SCHEDULER_DEFAULT_TIMEZONE', 'Europe/Berlin')
+    monkeypatch.setattr(TestingConfig, 'SCHEDULER_LEAD_MINUTES', 30)
+    monkeypatch.setattr(TestingConfig, 'SCHEDULER_ACTIVE_DAYS', 30)
+    app = create_app('testing', with_scheduler=False)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def users(app):
+    def add(username, morning_time=None, tz_name=None, active=True):
+        user = User(username=username, city='Berlin', password='pw')
+        user.last_active_at = datetime.utcnow() - timedelta(days=1 if active else 90)
+        db.session.add(user)
+        db.session.flush()
+        if morning_time or tz_name:
+            db.session.add(UserSettings(user_id=user.id, morning_time=morning_time or '07:30', timezone=tz_name))
+        return user
+
+    created = {
+        'berlin': add('berlin', '07:30', 'Europe/Berlin'),
+        'no_settings': add('no_settings'),
+        'unknown_zone': add('unknown_zone', '07:30', 'Mars/Olympus'),
+        'malformed_time': add('malformed_time', '7h30', 'Europe/Berlin'),
+        'new_york': add('new_york', '01:30', 'America/New_York'),
+        'tokyo_afternoon': add('tokyo_afternoon', '15:30', 'Asia/Tokyo'),
+        'tokyo_morning': add('tokyo_morning', '07:30', 'Asia/Tokyo'),
+        'dormant': add('dormant', '07:30', 'Europe/Berlin', active=False),
+    }
+    db.session.commit()
+    return {name: user.id for name, user in created.items()}
+
+
+def due_names(users, window_start):
+    ids = set(scheduler_service._due_user_ids('morning_time', window_start, window_start + WINDOW))
+    return sorted(name for name, user_id in users.items() if user_id in ids)
+
+
+def test_due_users_by_local_time_and_zone(users):
+    # 06:00 UTC = 07:00 Berlin = 01:00 New York = 15:00 Tokyo (winter time)
+    window_start = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+
+    assert due_names(users, window_start) == [
+        'berlin', 'malformed_time', 'new_york', 'no_settings', 'tokyo_afternoon', 'unknown_zone'
+    ]
+
+
+def test_due_users_across_dst_change(users):
+    # Berlin is on summer time (UTC+2) after 2026-03-29, New York since 2026-03-08
+    window_start = datetime(2026, 3, 30, 5, 0, tzinfo=timezone.utc)
+
+    assert due_names(users, window_start) == [
+        'berlin', 'malformed_time', 'new_york', 'no_settings', 'unknown_zone'
+    ]
+    assert due_names(users, window_start + timedelta(hours=1)) == ['tokyo_afternoon']
+
+
+def test_no_one_due_outside_their_window(users):
+    assert due_names(users, datetime(2026, 3, 2, 6, 5, tzinfo=timezone.utc)) == []
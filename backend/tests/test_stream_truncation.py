@@ -0,0 +1,44 @@
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.models import MorningSession
+from app.services import ai_service
+
+
+@pytest.fixture
+def truncated_stream(monkeypatch):
+    # Ollama drops the connection after the first chunk: no `done` line
+    def stream(payload):
+        yield {'response': 'Guten Mor', 'done': False}
+
+    monkeypatch.setattr(ai_service.ollama_client, 'stream', stream)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, truncated_stream):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    return create_app('testing', with_scheduler=False)
+
+
+@pytest.fixture
+def headers(app):
+    client = app.test_client()
+    client.post('/auth/register', json={'username': 'anna', 'city': 'Berlin', 'password': 'pw'})
+    token = client.post('/auth/login', json={'username': 'anna', 'password': 'pw'}).json['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_stream_text_reports_truncated_stream(truncated_stream):
+    results = list(ai_service.AIService.stream_text("prompt", kind='morning_plan', use_cache=False))
+
+    assert results == [("Guten Mor", None), (None, "AI stream ended before completion")]
+
+
+def test_truncated_morning_stream_is_not_saved(app, headers):
+    body = app.test_client().get('/morning/plan/stream?force=true', headers=headers).get_data(as_text=True)
+
+    assert 'event: error' in body
+    assert 'event: done' not in body
+    with app.app_context():
+        assert MorningSession.query.count() == 0
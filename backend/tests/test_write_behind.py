@@ -0,0 +1,176 @@
+import time
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.models import EveningPrompt
+from app.models.daily import DailyRecordMixin
+from app.models.lease import GenerationLease
+from app.services.lease_service import GenerationLeaseService
+from app.services.write_behind import WriteBehindBuffer
+
+DAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # File database: the buffer writes on its own connections and flusher thread
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app('testing', with_scheduler=False)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def results():
+    return []
+
+
+@pytest.fixture
+def buffer(app, results):
+    buffers = []
+
+    def make(**kwargs):
+        kwargs.setdefault('max_delay', 60)
+        writer = WriteBehindBuffer(app, EveningPrompt, on_result=lambda values, error: results.append((values['user_id'], error)), **kwargs)
+        buffers.append(writer)
+        return writer
+
+    yield make
+    for writer in buffers:
+        writer.close()
+
+
+def prompt(user_id):
+    return {'user_id': user_id, 'date': DAY, 'prompt_text': f"Wie war dein Tag, {user_id}?"}
+
+
+def stored():
+    return sorted(row.user_id for row in EveningPrompt.query.all())
+
+
+def test_full_batch_is_flushed_on_add(buffer):
+    writer = buffer(batch_size=3)
+
+    writer.add(prompt('u1'))
+    writer.add(prompt('u2'))
+    assert stored() == []
+
+    writer.add(prompt('u3'))
+
+    assert stored() == ['u1', 'u2', 'u3']
+    assert writer.stats['flushes'] == 1
+
+
+def test_old_rows_are_flushed_after_max_delay(buffer):
+    writer = buffer(batch_size=100, max_delay=0.1)
+
+    writer.add(prompt('u1'))
+
+    deadline = time.monotonic() + 5
+    while not stored() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert stored() == ['u1']
+
+
+def test_close_writes_the_rest_and_returns_stats(buffer, results):
+    writer = buffer(batch_size=2)
+    for user_id in ('u1', 'u2', 'u3'):
+        writer.add(prompt(user_id))
+
+    stats = writer.close()
+
+    assert stored() == ['u1', 'u2', 'u3']
+    assert stats['rows'] == 3
+    assert stats['flushes'] == 2
+    assert results == [('u1', None), ('u2', None), ('u3', None)]
+
+
+def test_lease_is_released_with_the_insert(buffer):
+    owner = GenerationLeaseService.acquire('u1', DAY, 'evening_prompt')
+    writer = buffer()
+
+    writer.add(prompt('u1'), lease_owner=owner)
+    assert GenerationLeaseService.is_held('u1', DAY, 'evening_prompt')
+
+    writer.flush()
+
+    assert stored() == ['u1']
+    assert GenerationLease.query.count() == 0
+
+
+def test_existing_rows_count_as_conflicts(buffer, results):
+    EveningPrompt.upsert('u1', DAY, prompt_text="Schon da")
+    writer = buffer(ignore_conflicts=True)
+    writer.add(prompt('u1'))
+    writer.add(prompt('u2'))
+
+    stats = writer.close()
+
+    assert stats['rows'] == 1
+    assert stats['conflicts'] == 1
+    assert stats['failed_rows'] == 0
+    assert EveningPrompt.query.filter_by(user_id='u1').one().prompt_text == "Schon da"
+    assert results == [('u1', None), ('u2', None)]
+
+
+def test_conflicts_without_on_conflict_support(buffer, monkeypatch, results):
+    EveningPrompt.upsert('u1', DAY, prompt_text="Schon da")
+    owner = GenerationLeaseService.acquire('u1', DAY, 'evening_prompt')
+    monkeypatch.setattr(DailyRecordMixin, 'supports_on_conflict', staticmethod(lambda: False))
+    writer = buffer(ignore_conflicts=True)
+    writer.add(prompt('u1'), lease_owner=owner)
+    writer.add(prompt('u2'))
+
+    # Plain INSERT: the batch fails and the row-by-row retry skips u1
+    stats = writer.close()
+
+    assert stored() == ['u1', 'u2']
+    assert (stats['rows'], stats['conflicts'], stats['failed_rows']) == (1, 1, 0)
+    assert GenerationLease.query.count() == 0
+    assert results == [('u1', None), ('u2', None)]
+
+
+def test_failed_row_does_not_drop_its_neighbours(buffer, results):
+    EveningPrompt.upsert('u2', DAY, prompt_text="Schon da")
+    owner = GenerationLeaseService.acquire('u2', DAY, 'evening_prompt')
+    writer = buffer()
+    for user_id in ('u1', 'u2', 'u3'):
+        writer.add(prompt(user_id), lease_owner=owner if user_id == 'u2' else None)
+
+    stats = writer.close()
+
+    assert stored() == ['u1', 'u2', 'u3']
+    assert (stats['rows'], stats['failed_rows']) == (2, 1)
+    assert len(stats['errors']) == 1
+    assert [user_id for user_id, error in results if error] == ['u2']
+    # The failed row's lease is released too, so waiters stop waiting
+    assert GenerationLease.query.count() == 0
+
+
+def test_failing_result_callback_is_contained(app):
+    def on_result(values, error):
+        raise RuntimeError("callback broke")
+
+    writer = WriteBehindBuffer(app, EveningPrompt, max_delay=60, on_result=on_result)
+    writer.add(prompt('u1'))
+
+    stats = writer.close()
+
+    assert stats['rows'] == 1
+    assert stored() == ['u1']
+
+
+def test_on_flush_runs_as_a_heartbeat(app):
+    beats = []
+    writer = WriteBehindBuffer(app, EveningPrompt, max_delay=0.1, on_flush=lambda conn: beats.append(conn))
+
+    deadline = time.monotonic() + 5
+    while len(beats) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stats = writer.close()
+
+    assert len(beats) >= 2
+    assert stats['flushes'] == 0